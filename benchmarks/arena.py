@@ -0,0 +1,106 @@
+"""
+Arena mode benchmark.
+
+Runs headless arena games with a mix of simulated human snakes (random turns)
+and AI snakes and reports the cost of SnakeGame.update and of AI decisions per
+tick, across several board sizes.
+
+Usage:
+    python -m benchmarks.arena [--grid-sizes 64 128 256 512] [--snakes 120] [--food 64] [--ticks 500]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict
+import config
+from game.snake import SnakeGame, Direction
+from game.ai import SnakeAI
+
+def run_arena(grid_size: int, snakes: int, food: int, ticks: int, difficulty: str, seed: int) -> Dict:
+    """Play one arena game and time its update and AI phases."""
+    random.seed(seed)
+    game = SnakeGame(config.ARENA, difficulty, grid_size=grid_size, food_count=food)
+
+    # Half the snakes are simulated humans, the other half AIs
+    humans = []
+    ais = []
+    for i in range(snakes):
+        if i % 2 == 0:
+            player_id = f'player_{i}'
+            game.add_player(player_id, config.GREEN)
+            humans.append(player_id)
+        else:
+            player_id = f'ai_{i}'
+            game.add_player(player_id, config.BLUE)
+            ais.append(SnakeAI(game, difficulty, player_id))
+
+    directions = list(Direction)
+    update_time = 0.0
+    ai_time = 0.0
+    played = 0
+    alive_ticks = 0  # Sum over ticks of snakes alive, to normalise the update cost
+    for _ in range(ticks):
+        if game.game_over:
+            break
+
+        # Simulated humans turn now and then
+        for player_id in humans:
+            if random.random() < 0.1:
+                game.handle_input(player_id, random.choice(directions))
+
+        start = time.perf_counter()
+        for ai in ais:
+            if game.snakes[ai.snake_id].alive:
+                game.handle_input(ai.snake_id, ai.get_next_move())
+        ai_time += time.perf_counter() - start
+
+        alive_ticks += sum(1 for snake in game.snakes.values() if snake.alive)
+        start = time.perf_counter()
+        game.update()
+        update_time += time.perf_counter() - start
+        played += 1
+
+    alive = sum(1 for snake in game.snakes.values() if snake.alive)
+    return {
+        'grid_size': grid_size,
+        'snakes': snakes,
+        'food': food,
+        'difficulty': difficulty,
+        'ticks': played,
+        'alive_at_end': alive,
+        'avg_alive': alive_ticks / played if played else 0.0,
+        'update_us_per_tick': update_time / played * 1e6 if played else 0.0,
+        'update_us_per_snake': update_time / alive_ticks * 1e6 if alive_ticks else 0.0,
+        'ai_us_per_tick': ai_time / played * 1e6 if played else 0.0,
+        'ticks_per_sec': played / (update_time + ai_time) if played else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark arena mode")
+    parser.add_argument('--grid-sizes', type=int, nargs='+', default=[64, 128, 256, 512])
+    parser.add_argument('--snakes', type=int, default=120)
+    parser.add_argument('--food', type=int, default=64)
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--difficulty', default=config.AI_MEDIUM)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_arena(size, args.snakes, args.food, args.ticks, args.difficulty, args.seed)
+               for size in args.grid_sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'grid':>9} {'snakes':>7} {'food':>5} {'ticks':>6} {'avg alive':>10} "
+          f"{'update us':>10} {'us/snake':>9} {'ai us':>10} {'ticks/s':>9}")
+    for r in results:
+        grid = f"{r['grid_size']}x{r['grid_size']}"
+        print(f"{grid:>9} {r['snakes']:>7} {r['food']:>5} {r['ticks']:>6} {r['avg_alive']:>10.1f} "
+              f"{r['update_us_per_tick']:>10.1f} {r['update_us_per_snake']:>9.2f} "
+              f"{r['ai_us_per_tick']:>10.1f} {r['ticks_per_sec']:>9.1f}")
+
+if __name__ == '__main__':
+    main()
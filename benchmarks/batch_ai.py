@@ -0,0 +1,132 @@
+"""
+Batched AI decision benchmark and parity check.
+
+Plays the same seeded games twice, once with every medium AI calling
+SnakeAI.get_next_move in turn and once with all games' AIs decided together
+by game.batch_ai.get_next_moves, and checks the decisions and the board
+hashes match on every tick. Then times both ways of deciding for growing
+numbers of games, reporting decisions per second. Exits with status 1 if
+any decision differs. Needs numpy.
+
+Usage:
+    python -m benchmarks.batch_ai [--batch-sizes 1 10 100 1000] [--grid-size 20] [--snakes 2]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+import config
+from game.ai import SnakeAI
+from game.snake import SnakeGame, Direction
+from game import batch_ai
+
+def build_games(count: int, grid_size: int, snakes: int, seed: int) -> Tuple[List[SnakeGame], List[SnakeAI]]:
+    """Arena games with medium AI snakes, and their AIs in order."""
+    random.seed(seed)
+    games = []
+    ais = []
+    for _ in range(count):
+        game = SnakeGame(config.ARENA, config.AI_MEDIUM, grid_size=grid_size, food_count=max(1, grid_size // 8))
+        for i in range(snakes):
+            game.add_player(f'ai_{i}', config.BLUE)
+            ais.append(SnakeAI(game, config.AI_MEDIUM, f'ai_{i}'))
+        games.append(game)
+    return games, ais
+
+def play(batched: bool, games: int, grid_size: int, snakes: int, ticks: int, seed: int) -> List[Tuple]:
+    """Play seeded games; returns each tick's decisions and board hashes."""
+    all_games, ais = build_games(games, grid_size, snakes, seed)
+    history = []
+    for _ in range(ticks):
+        playing = [ai for ai in ais if not ai.game.game_over and ai.game.snakes[ai.snake_id].alive]
+        if not playing:
+            break
+        moves = batch_ai.get_next_moves(playing) if batched else [ai.get_next_move() for ai in playing]
+        for ai, move in zip(playing, moves):
+            ai.game.handle_input(ai.snake_id, move)
+        for game in all_games:
+            game.update()
+        history.append((tuple(move.name for move in moves), tuple(game.zobrist for game in all_games)))
+    return history
+
+def run_parity(games: int, grid_size: int, snakes: int, ticks: int, seed: int) -> Dict:
+    """Compare scalar and batched play tick by tick."""
+    scalar = play(False, games, grid_size, snakes, ticks, seed)
+    batched = play(True, games, grid_size, snakes, ticks, seed)
+    mismatch = next((tick for tick, (a, b) in enumerate(zip(scalar, batched)) if a != b), None)
+    if mismatch is None and len(scalar) != len(batched):
+        mismatch = min(len(scalar), len(batched))
+    return {
+        'games': games,
+        'ticks': len(scalar),
+        'decisions': sum(len(moves) for moves, _ in scalar),
+        'first_mismatch_tick': mismatch,
+    }
+
+def run_throughput(batch_size: int, grid_size: int, snakes: int, warmup: int, repeat: int, seed: int) -> Dict:
+    """Time deciding every AI's move in a batch of games, one at a time and all at once."""
+    games, ais = build_games(batch_size, grid_size, snakes, seed)
+    directions = list(Direction)
+    # Play a few ticks so snakes have grown into more interesting boards
+    for _ in range(warmup):
+        for ai in ais:
+            if ai.game.snakes[ai.snake_id].alive:
+                ai.game.handle_input(ai.snake_id, ai.get_next_move() if random.random() < 0.9 else random.choice(directions))
+        for game in games:
+            game.update()
+    playing = [ai for ai in ais if ai.game.snakes[ai.snake_id].alive]
+
+    def timed(func) -> float:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    scalar = timed(lambda: [ai.get_next_move() for ai in playing])
+    batched = timed(lambda: batch_ai.get_next_moves(playing))
+    return {
+        'batch_size': batch_size,
+        'decisions': len(playing),
+        'scalar_per_sec': len(playing) / scalar if scalar else 0.0,
+        'batched_per_sec': len(playing) / batched if batched else 0.0,
+        'speedup': scalar / batched if batched else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark batched AI decisions across games")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000], help="Games decided together")
+    parser.add_argument('--grid-size', type=int, default=config.GRID_SIZE)
+    parser.add_argument('--snakes', type=int, default=2, help="Medium AI snakes per game")
+    parser.add_argument('--parity-games', type=int, default=50)
+    parser.add_argument('--parity-ticks', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20, help="Ticks played before timing decisions")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    if batch_ai.np is None:
+        sys.exit("numpy is required for batched AI decisions (pip install numpy)")
+
+    parity = run_parity(args.parity_games, args.grid_size, args.snakes, args.parity_ticks, args.seed)
+    results = [run_throughput(size, args.grid_size, args.snakes, args.warmup, args.repeat, args.seed)
+               for size in args.batch_sizes]
+    failed = parity['first_mismatch_tick'] is not None
+
+    if args.json:
+        print(json.dumps({'parity': parity, 'throughput': results}, indent=2))
+    else:
+        print(f"Parity: {parity['decisions']} decisions over {parity['ticks']} ticks of {parity['games']} games: "
+              + (f"FAILED at tick {parity['first_mismatch_tick']}" if failed else "identical"))
+        print(f"{'games':>6} {'decisions':>10} {'scalar/s':>10} {'batched/s':>10} {'speedup':>8}")
+        for r in results:
+            print(f"{r['batch_size']:>6} {r['decisions']:>10} {r['scalar_per_sec']:>10.0f} "
+                  f"{r['batched_per_sec']:>10.0f} {r['speedup']:>7.2f}x")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
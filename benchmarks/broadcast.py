@@ -0,0 +1,239 @@
+"""
+Live state broadcast benchmark.
+
+Connects a growing number of WebSocket spectators to one game on the live
+state server and times publishing each tick to all of them: once through the
+broadcast hub, which encodes the tick once and shares the bytes, and once the
+naive way, serializing and sending the message per connection.
+
+With --slow, it also connects spectators that never read, alongside ones that
+do, and checks that the slow ones are held to a bounded amount of unsent data
+and eventually disconnected while the others get every tick.
+
+Usage:
+    python -m benchmarks.broadcast [--spectators 1 10 100 1000] [--ticks 50] [--mode arena] [--slow 10]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import statistics
+import time
+from typing import Dict, List
+import aiohttp
+import config
+from game.snake import SnakeGame
+from game.ai import SnakeAI
+from discord_integration.live import LiveServer, encode_state
+from discord_integration.broadcast import BROADCAST_DROPPED, BROADCAST_SLOW_DISCONNECTS
+
+CHANNEL_ID = 1
+GROUP = (CHANNEL_ID, None)  # Spectators here ask for the whole board, so they all share one view
+
+def build_game(mode: str) -> Dict:
+    """A game for the spectators to watch."""
+    if mode == config.ARENA:
+        game = SnakeGame(mode, config.AI_MEDIUM, grid_size=config.ARENA_GRID_SIZE, food_count=config.ARENA_FOOD_COUNT)
+        ai_ids = [f'ai_{i}' for i in range(1, config.ARENA_AI_COUNT + 1)]
+    else:
+        game = SnakeGame(mode, config.AI_MEDIUM)
+        ai_ids = ['ai']
+    game.add_player('player', config.GREEN)
+    for ai_id in ai_ids:
+        game.add_player(ai_id, config.BLUE)
+    return {'game': game, 'ais': [SnakeAI(game, config.AI_MEDIUM, ai_id) for ai_id in ai_ids], 'players': {}}
+
+def advance(game_data: Dict) -> None:
+    """Play a tick, starting over when the game ends."""
+    game = game_data['game']
+    if game.game_over:
+        game_data.update(build_game(game.mode))
+        game = game_data['game']
+    for ai in game_data['ais']:
+        if game.snakes[ai.snake_id].alive:
+            game.handle_input(ai.snake_id, ai.get_next_move())
+    game.update()
+
+async def naive_publish(live: LiveServer, game: SnakeGame) -> None:
+    """Serialize and send the state separately for each connection."""
+    acks = live.channels[CHANNEL_ID].acks
+    for subscriber in list(live.hub.groups.get(GROUP, ())):
+        await subscriber.ws.send_str(json.dumps(encode_state(game, acks), separators=(',', ':')))
+
+async def run_broadcast(spectators: int, ticks: int, mode: str, port: int) -> Dict:
+    """Time publishing ticks to a number of spectators, both ways."""
+    games = {CHANNEL_ID: build_game(mode)}
+    live = LiveServer(games, lambda *args: None, host='127.0.0.1', port=port)
+    await live.start()
+    received = 0
+    stop = asyncio.Event()
+
+    async def spectate(session: aiohttp.ClientSession) -> None:
+        nonlocal received
+        async with session.ws_connect(f'ws://127.0.0.1:{port}/games/{CHANNEL_ID}/live?view=0') as ws:
+            async for msg in ws:
+                received += 1
+                if stop.is_set():
+                    break
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        clients = [asyncio.create_task(spectate(session)) for _ in range(spectators)]
+        while live.hub.group_size(GROUP) < spectators:
+            await asyncio.sleep(0.01)
+
+        async def wait_for(count: int) -> None:
+            # Let every spectator read the tick before the next one, so sends never queue up
+            deadline = time.monotonic() + 10
+            while received < count and time.monotonic() < deadline:
+                await asyncio.sleep(0.001)
+
+        timings: Dict[str, List[float]] = {'hub': [], 'naive': []}
+        for method in ('hub', 'naive'):
+            for _ in range(ticks):
+                advance(games[CHANNEL_ID])
+                game = games[CHANNEL_ID]['game']
+                expected = received + spectators
+                start = time.perf_counter()
+                if method == 'hub':
+                    live.publish(CHANNEL_ID, game)
+                else:
+                    await naive_publish(live, game)
+                timings[method].append(time.perf_counter() - start)
+                await wait_for(expected)
+
+        payload = json.dumps(encode_state(games[CHANNEL_ID]['game'], {}), separators=(',', ':'))
+        stop.set()
+        await live.stop()
+        await asyncio.gather(*clients, return_exceptions=True)
+
+    hub = statistics.median(timings['hub'])
+    naive = statistics.median(timings['naive'])
+    return {
+        'spectators': spectators,
+        'mode': mode,
+        'message_bytes': len(payload),
+        'hub_us_per_tick': hub * 1e6,
+        'hub_us_per_spectator': hub / spectators * 1e6,
+        'naive_us_per_tick': naive * 1e6,
+        'naive_us_per_spectator': naive / spectators * 1e6,
+    }
+
+async def connect_stalled(port: int) -> asyncio.StreamWriter:
+    """Open a WebSocket that never reads, with a tiny receive buffer."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /games/{CHANNEL_ID}/live?view=0 HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+                  f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  f"Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b'\r\n\r\n')
+    return writer
+
+async def run_slow_clients(fast: int, slow: int, ticks: int, mode: str, port: int) -> Dict:
+    """Publish to spectators that keep up and ones that never read."""
+    games = {CHANNEL_ID: build_game(mode)}
+    live = LiveServer(games, lambda *args: None, host='127.0.0.1', port=port)
+    await live.start()
+    dropped_before = BROADCAST_DROPPED.value
+    disconnects_before = BROADCAST_SLOW_DISCONNECTS.value
+    received = 0
+
+    async def spectate(session: aiohttp.ClientSession) -> None:
+        nonlocal received
+        async with session.ws_connect(f'ws://127.0.0.1:{port}/games/{CHANNEL_ID}/live?view=0') as ws:
+            async for msg in ws:
+                received += 1
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        clients = [asyncio.create_task(spectate(session)) for _ in range(fast)]
+        stalled = [await connect_stalled(port) for _ in range(slow)]
+        while live.hub.group_size(GROUP) < fast + slow:
+            await asyncio.sleep(0.01)
+        received = 0  # Count broadcasts only, not the state sent on connecting
+
+        # The kernel would otherwise buffer megabytes for each stalled connection before
+        # the server's own buffer starts to grow; shrink it so the limit is reached quickly
+        stalled_ports = {writer.get_extra_info('sockname')[1] for writer in stalled}
+        for subscriber in live.hub.groups[GROUP]:
+            if subscriber.transport.get_extra_info('peername')[1] in stalled_ports:
+                subscriber.transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+
+        max_buffered = 0
+        publish_times = []
+        for _ in range(ticks):
+            advance(games[CHANNEL_ID])
+            start = time.perf_counter()
+            live.publish(CHANNEL_ID, games[CHANNEL_ID]['game'])
+            publish_times.append(time.perf_counter() - start)
+            for subscriber in live.hub.groups.get(GROUP, ()):
+                max_buffered = max(max_buffered, subscriber.transport.get_write_buffer_size())
+            await asyncio.sleep(0.002)
+        await asyncio.sleep(0.2)
+        remaining = live.hub.group_size(GROUP)
+
+        await live.stop()
+        for writer in stalled:
+            writer.close()
+        await asyncio.gather(*clients, return_exceptions=True)
+
+    return {
+        'fast': fast,
+        'slow': slow,
+        'ticks': ticks,
+        'fast_ticks_received': received / fast if fast else 0,
+        'slow_ticks_dropped': BROADCAST_DROPPED.value - dropped_before,
+        'slow_disconnected': BROADCAST_SLOW_DISCONNECTS.value - disconnects_before,
+        'still_connected': remaining,
+        'max_buffered_bytes': max_buffered,
+        'buffer_limit_bytes': live.hub.max_buffer,
+        'publish_us_median': statistics.median(publish_times) * 1e6,
+    }
+
+async def run_all(args) -> Dict:
+    results = {'broadcast': [await run_broadcast(spectators, args.ticks, args.mode, args.port)
+                             for spectators in args.spectators]}
+    if args.slow:
+        results['slow_clients'] = await run_slow_clients(args.fast, args.slow, args.slow_ticks, args.mode, args.port)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark broadcasting live state to spectators")
+    parser.add_argument('--spectators', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--ticks', type=int, default=50, help="Ticks published with each method")
+    parser.add_argument('--mode', default=config.ARENA, choices=[config.SINGLEPLAYER, config.ARENA])
+    parser.add_argument('--port', type=int, default=8772)
+    parser.add_argument('--slow', type=int, default=0, help="Spectators that never read, for the slow client check")
+    parser.add_argument('--fast', type=int, default=10, help="Spectators that keep up during the slow client check")
+    parser.add_argument('--slow-ticks', type=int, default=300, help="Ticks published during the slow client check")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_all(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'viewers':>8} {'bytes':>7} {'hub us/tick':>12} {'us/viewer':>10} {'naive us/tick':>14} {'us/viewer':>10}")
+    for r in results['broadcast']:
+        print(f"{r['spectators']:>8} {r['message_bytes']:>7} {r['hub_us_per_tick']:>12.0f} {r['hub_us_per_spectator']:>10.2f} "
+              f"{r['naive_us_per_tick']:>14.0f} {r['naive_us_per_spectator']:>10.2f}")
+
+    slow = results.get('slow_clients')
+    if slow:
+        print(f"\n{slow['slow']} stalled and {slow['fast']} reading spectators, {slow['ticks']} ticks:")
+        print(f"  reading spectators received {slow['fast_ticks_received']:.0f} ticks each")
+        print(f"  stalled spectators: {slow['slow_ticks_dropped']:.0f} ticks dropped, "
+              f"{slow['slow_disconnected']:.0f} disconnected, {slow['still_connected'] - slow['fast']} still connected")
+        print(f"  most unsent bytes for one spectator: {slow['max_buffered_bytes']} "
+              f"(limit {slow['buffer_limit_bytes']} plus one message)")
+        print(f"  median publish {slow['publish_us_median']:.0f}us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Bot capacity benchmark against a simulated Discord.
+
+Runs the real SnakeBot with Discord replaced by benchmarks/fake_discord.py:
+keeps N games going at once, each started through SnakeBot.start_game like a
+/snek command and played by its own game_loop, while simulated players turn
+now and then. Finished games are replaced by new ones. For each N it reports
+the tick rate and tick jitter games actually got, event loop lag, CPU use,
+resident memory, and how often the simulated API rate limited the bot. N is
+"sustained" when games tick at least 90% of FPS, 99% of tick intervals are
+within 1.5 nominal intervals, and the event loop wakes up within a tick
+interval. Rate limiting is off unless asked for, and levels where it hit are
+flagged in their own column, since it slows games down for reasons that have
+nothing to do with the bot's capacity.
+
+Usage:
+    python -m benchmarks.capacity [--games 1 10 25 50 100 200] [--seconds 30] [--latency 50] [--edit-limit 5 --edit-window 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import time
+from typing import Dict, List
+import config
+import logs
+from game.snake import Direction
+from discord_integration import monitoring
+from discord_integration.bot import SnakeBot
+from discord_integration.embedded_app import app_manager
+from discord_integration.memory import resident_memory
+from benchmarks.fake_discord import FakeDiscord, FakeInteraction, FakeUser
+
+# A level is sustained when games tick at least this share of FPS...
+MIN_TICK_RATE = 0.9
+# ...and the 99th percentile tick interval is at most this many nominal intervals
+MAX_P99_INTERVAL = 1.5
+
+def percentile(values: List[float], fraction: float) -> float:
+    """The value below which `fraction` of the values fall."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def track_ticks(game, intervals: List[float], measuring: asyncio.Event) -> None:
+    """Record the time between a game's ticks, once measuring has begun."""
+    update = game.update
+    last = None
+
+    def timed_update():
+        nonlocal last
+        now = time.perf_counter()
+        if last is not None and measuring.is_set():
+            intervals.append(now - last)
+        last = now
+        update()
+
+    game.update = timed_update
+
+async def run_level(games: int, args, channel_ids) -> Dict:
+    """Keep a number of games running against a fresh bot and measure it."""
+    api = FakeDiscord(args.latency / 1000, args.jitter / 1000, args.edit_limit, args.edit_window, args.seed)
+    bot = SnakeBot()
+    monitor = bot.loop_monitor or monitoring.LoopMonitor()
+    monitor.start()
+    rng = random.Random(args.seed)
+    directions = list(Direction)
+    intervals: List[float] = []
+    measuring = asyncio.Event()
+    tracked = set()
+    starts: List[asyncio.Task] = []
+    rejected = 0
+    user = FakeUser(1, 'load')
+
+    async def start(channel_id: int) -> None:
+        nonlocal rejected
+        interaction = FakeInteraction(api, channel_id, user)
+        await bot.start_game(interaction, args.mode, args.difficulty)
+        if channel_id in bot.active_games:
+            track_ticks(bot.active_games[channel_id]['game'], intervals, measuring)
+        elif interaction.response.messages:
+            rejected += 1
+
+    rate_limits_before = api.rate_limited
+    calls_before = api.requests.copy()
+    start_timeout = time.monotonic() + 60  # Measure anyway if some games never manage to start
+    rss_start = resident_memory()
+    rss_peak = rss_start
+    deadline = None
+    cpu_start = wall_start = 0.0
+    while deadline is None or time.monotonic() < deadline:
+        # Replace finished games, so `games` are always running or starting
+        missing = games - len(bot.active_games) - len(bot.starting_games)
+        for _ in range(max(0, missing)):
+            channel_id = next(channel_ids)
+            tracked.add(channel_id)
+            starts.append(asyncio.create_task(start(channel_id)))
+
+        # Players turn now and then, which also keeps their games from going idle
+        for channel_id, game_data in list(bot.active_games.items()):
+            if rng.random() < args.turn_rate:
+                bot.handle_player_input(channel_id, 'player', rng.choice(directions))
+
+        # Measure once every game has started, after a warmup
+        started = len(bot.active_games) >= games and not bot.starting_games
+        if deadline is None and (started or time.monotonic() > start_timeout):
+            await asyncio.sleep(args.warmup)
+            measuring.set()
+            monitor.lags.clear()
+            rate_limits_before = api.rate_limited
+            calls_before = api.requests.copy()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            deadline = time.monotonic() + args.seconds
+        rss_peak = max(rss_peak, resident_memory())
+        await asyncio.sleep(1.0 / config.FPS)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    loop_lag = monitor.report()['loop_lag_ms']
+    api_calls = sum((api.requests - calls_before).values())
+
+    for task in starts:
+        task.cancel()
+    for channel_id in list(bot.active_games):
+        await bot._remove_game(channel_id)
+    await monitor.stop()
+
+    tick_interval = 1.0 / config.FPS
+    median = statistics.median(intervals) if intervals else 0.0
+    return {
+        'games': games,
+        'ticks': len(intervals),
+        # While running: finished games wait a few seconds before they're replaced, which isn't slow ticking
+        'ticks_per_game_per_sec': len(intervals) / sum(intervals) if intervals else 0.0,
+        'tick_interval_ms': {
+            'nominal': tick_interval * 1000,
+            'p50': median * 1000,
+            'p99': percentile(intervals, 0.99) * 1000,
+            'max': max(intervals, default=0.0) * 1000,
+        },
+        'tick_jitter_ms': (percentile(intervals, 0.99) - median) * 1000,
+        'loop_lag_ms': loop_lag,
+        'cpu_percent': cpu / wall * 100 if wall else 0.0,
+        'rss_start_mb': rss_start / 2 ** 20,
+        'rss_peak_mb': rss_peak / 2 ** 20,
+        'api_calls_per_sec': api_calls / wall if wall else 0.0,
+        'rate_limited_per_sec': (api.rate_limited - rate_limits_before) / wall if wall else 0.0,
+        'games_started': len(tracked),
+        'games_rejected': rejected,
+    }
+
+async def run_all(args) -> Dict:
+    monitoring.install_rate_limit_handler()
+    channel_ids = iter(range(1, 1 << 62))
+    results = []
+    try:
+        for games in args.games:
+            results.append(await run_level(games, args, channel_ids))
+    finally:
+        app_manager.stop_server()
+
+    # Judge every level against the configured tick rate, not the first level, which may be slow itself
+    interval_ms = 1000.0 / config.FPS
+    sustained = 0
+    for result in results:
+        result['rate_limited'] = result['rate_limited_per_sec'] > 0
+        result['sustained'] = (result['ticks_per_game_per_sec'] >= MIN_TICK_RATE * config.FPS
+                               and result['tick_interval_ms']['p99'] <= MAX_P99_INTERVAL * interval_ms
+                               and result['loop_lag_ms']['p99'] < interval_ms
+                               and not result['games_rejected'])
+        if result['sustained']:
+            sustained = max(sustained, result['games'])
+    return {
+        'mode': args.mode,
+        'difficulty': args.difficulty,
+        'latency_ms': args.latency,
+        'edit_limit': f"{args.edit_limit} per {args.edit_window:g}s" if args.edit_limit else None,
+        'levels': results,
+        'max_sustained_games': sustained,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Find how many games one bot process sustains")
+    parser.add_argument('--games', type=int, nargs='+', default=[1, 10, 25, 50, 100, 200],
+                        help="Concurrent games to try")
+    parser.add_argument('--seconds', type=float, default=30, help="Measured time per level")
+    parser.add_argument('--warmup', type=float, default=3, help="Seconds after every game started before measuring")
+    parser.add_argument('--mode', default=config.SINGLEPLAYER, choices=[config.SINGLEPLAYER, config.ARENA])
+    parser.add_argument('--difficulty', default=config.AI_MEDIUM)
+    parser.add_argument('--turn-rate', type=float, default=0.1, help="Chance a player turns on each tick")
+    parser.add_argument('--latency', type=float, default=50, help="Simulated Discord API round trip in milliseconds")
+    parser.add_argument('--jitter', type=float, default=20, help="Standard deviation of the round trip in milliseconds")
+    parser.add_argument('--edit-limit', type=int, default=0, help="Calls allowed per rate limit bucket per window (0 disables)")
+    parser.add_argument('--edit-window', type=float, default=5, help="Rate limit window in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="Show the bot's own output")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    # The bot logs every game start and end; keep that out of the table unless asked
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+        logs.setup_logging(game=monitoring.current_game, stream=None if args.verbose else devnull)
+        report = asyncio.run(run_all(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['mode']} games, {report['latency_ms']:g}ms API latency, "
+          f"rate limit {report['edit_limit'] or 'off'}")
+    print(f"{'games':>6} {'ticks/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'jitter':>7} {'lag p99':>8} {'cpu %':>6} "
+          f"{'rss MB':>7} {'429/s':>6} {'limited':>7} {'ok':>3}")
+    for r in report['levels']:
+        print(f"{r['games']:>6} {r['ticks_per_game_per_sec']:>8.2f} {r['tick_interval_ms']['p50']:>7.0f} "
+              f"{r['tick_interval_ms']['p99']:>7.0f} {r['tick_jitter_ms']:>7.0f} {r['loop_lag_ms']['p99']:>8.1f} "
+              f"{r['cpu_percent']:>6.0f} {r['rss_peak_mb']:>7.0f} {r['rate_limited_per_sec']:>6.1f} "
+              f"{'yes' if r['rate_limited'] else 'no':>7} {'yes' if r['sustained'] else 'no':>3}")
+        if r['games_rejected']:
+            print(f"       {r['games_rejected']} game(s) rejected by MAX_ACTIVE_GAMES or MAX_GAMES_PER_GUILD")
+    print(f"Sustained up to {report['max_sustained_games']} games per process")
+    if any(r['rate_limited'] for r in report['levels']):
+        print("Some levels were rate limited, which lowers their tick rate; use --edit-limit 0 to measure the bot alone")
+
+if __name__ == '__main__':
+    main()
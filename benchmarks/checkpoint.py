@@ -0,0 +1,113 @@
+"""
+Game checkpoint benchmark.
+
+Builds many games part way through play, checkpoints them all to a temporary
+log, and times capturing them (the part that runs on the event loop), writing
+them, loading the log's index at startup and fully restoring every game.
+
+Usage:
+    python -m benchmarks.checkpoint [--games 1000 5000] [--mode singleplayer] [--ticks 200]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict
+import config
+from game.snake import SnakeGame
+from game.ai import SnakeAI
+from discord_integration import checkpoints
+from discord_integration.checkpoints import CheckpointStore
+
+def build_game(mode: str, ticks: int) -> Dict:
+    """Play a game for a while and wrap it like the bot's game data."""
+    if mode == config.ARENA:
+        game = SnakeGame(mode, config.AI_MEDIUM, grid_size=config.ARENA_GRID_SIZE, food_count=config.ARENA_FOOD_COUNT)
+        snake_ids = ['player'] + [f'ai_{i}' for i in range(1, config.ARENA_AI_COUNT + 1)]
+    else:
+        game = SnakeGame(mode, config.AI_MEDIUM)
+        snake_ids = ['player', 'ai']
+    for snake_id in snake_ids:
+        game.add_player(snake_id, config.GREEN if snake_id == 'player' else config.BLUE)
+
+    ais = [SnakeAI(game, config.AI_MEDIUM, snake_id) for snake_id in snake_ids[1:]]
+    for _ in range(ticks):
+        if game.game_over:
+            break
+        for ai in ais:
+            if game.snakes[ai.snake_id].alive:
+                game.handle_input(ai.snake_id, ai.get_next_move())
+        game.update()
+
+    now = time.monotonic()
+    return {
+        'game': game, 'ais': ais, 'renderer': None, 'message': None, 'task': None,
+        'players': {'1': 'player'}, 'guild_id': None, 'started_at': now, 'last_input': now, 'end_reason': None
+    }
+
+def run_checkpoint(games: int, mode: str, ticks: int, seed: int) -> Dict:
+    """Checkpoint and restore a number of games, timing each step."""
+    random.seed(seed)
+    # A handful of distinct games is enough; checkpoint sizes and costs don't depend on which is which
+    templates = [build_game(mode, ticks) for _ in range(min(games, 20))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(os.path.join(directory, 'checkpoints.log'))
+
+        start = time.perf_counter()
+        now = time.monotonic()
+        captured = [checkpoints.capture(channel_id, templates[channel_id % len(templates)], now)
+                    for channel_id in range(games)]
+        capture_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.append(captured)
+        write_time = time.perf_counter() - start
+        size = os.path.getsize(store.path)
+
+        start = time.perf_counter()
+        payloads = CheckpointStore(store.path).load()
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        now = time.monotonic()
+        restored = [checkpoints.restore(CheckpointStore.decode(payload), now) for payload in payloads.values()]
+        restore_time = time.perf_counter() - start
+
+    assert len(restored) == games
+    return {
+        'games': games,
+        'mode': mode,
+        'bytes_per_game': size / games,
+        'capture_ms': capture_time * 1000,
+        'write_ms': write_time * 1000,
+        'load_ms': load_time * 1000,
+        'restore_ms': restore_time * 1000,
+        'restore_us_per_game': restore_time / games * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark game checkpoints")
+    parser.add_argument('--games', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--mode', default=config.SINGLEPLAYER, choices=[config.SINGLEPLAYER, config.ARENA])
+    parser.add_argument('--ticks', type=int, default=200, help="Ticks each game is played before checkpointing")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_checkpoint(games, args.mode, args.ticks, args.seed) for games in args.games]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'games':>6} {'mode':>12} {'bytes/game':>11} {'capture ms':>11} {'write ms':>9} "
+          f"{'load ms':>8} {'restore ms':>11} {'us/game':>8}")
+    for r in results:
+        print(f"{r['games']:>6} {r['mode']:>12} {r['bytes_per_game']:>11.0f} {r['capture_ms']:>11.1f} "
+              f"{r['write_ms']:>9.1f} {r['load_ms']:>8.1f} {r['restore_ms']:>11.1f} {r['restore_us_per_game']:>8.1f}")
+
+if __name__ == '__main__':
+    main()
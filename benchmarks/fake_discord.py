@@ -0,0 +1,168 @@
+"""
+Local stand-ins for the parts of Discord a game goes through.
+
+FakeDiscord plays the HTTP API. Every call waits a simulated round trip, and
+calls are counted against per-route buckets: a bucket allows `limit` calls
+per `window` seconds, and a call over the limit gets a 429. Like discord.py,
+the call then logs "We are being rate limited ... Retrying in N seconds" on
+the discord.http logger (so the bot's snek_discord_rate_limits_total counts
+it), sleeps out the retry and tries again.
+
+FakeInteraction, its response and followup webhook, FakeChannel and
+FakeMessage mimic discord.Interaction, InteractionResponse, Webhook.send,
+TextChannel.send and Message.edit closely enough for SnakeBot.start_game and
+game_loop to run against them without a connection to Discord.
+"""
+import asyncio
+import itertools
+import logging
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Hashable, Optional
+import discord
+
+_log = logging.getLogger('discord.http')
+
+class FakeDiscord:
+    """Simulated Discord HTTP API with latency and rate limits."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, limit: int = 5, window: float = 5.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.limit = limit  # Calls per bucket per window (0 for no rate limits)
+        self.window = window
+        self.random = random.Random(seed)
+        self.buckets: Dict[Hashable, Deque[float]] = {}  # Bucket -> times of its calls within the window
+        self.requests: Counter = Counter()  # Route -> successful calls
+        self.rate_limited = 0
+        self.rate_limit_wait = 0.0
+        self.upload_bytes = 0
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        """A new snowflake-like ID."""
+        return next(self._ids)
+
+    def _retry_after(self, bucket: Hashable) -> Optional[float]:
+        """Take a call from a bucket, or get how long until it has room."""
+        if not self.limit:
+            return None
+        now = time.monotonic()
+        calls = self.buckets.setdefault(bucket, deque())
+        while calls and calls[0] <= now - self.window:
+            calls.popleft()
+        if len(calls) >= self.limit:
+            return calls[0] + self.window - now
+        calls.append(now)
+        return None
+
+    async def request(self, method: str, route: str, bucket: Hashable) -> None:
+        """Make a simulated API call, waiting out 429s the way discord.py does."""
+        while True:
+            await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+            retry_after = self._retry_after(bucket)
+            if retry_after is None:
+                self.requests[route] += 1
+                return
+            self.rate_limited += 1
+            self.rate_limit_wait += retry_after
+            _log.warning('We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+                         method, route, retry_after)
+            await asyncio.sleep(retry_after)
+
+    def upload(self, files: Any) -> None:
+        """Count the bytes of attached files, and close them like discord.py does after sending."""
+        for file in files or ():
+            if isinstance(file, discord.File):
+                self.upload_bytes += len(file.fp.read())
+                file.close()
+
+class FakeUser:
+    """The user who ran a command."""
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.display_name = name
+        self.name = name
+
+class FakeMessage:
+    """A message the bot sent, which it edits every tick."""
+
+    def __init__(self, api: FakeDiscord, channel_id: int, route: str):
+        self.api = api
+        self.id = api.next_id()
+        self.channel_id = channel_id
+        self.route = route
+        self.edits = 0
+
+    async def edit(self, **kwargs) -> 'FakeMessage':
+        await self.api.request('PATCH', f'{self.route}/messages/{{message_id}}', ('edit', self.channel_id))
+        self.api.upload(kwargs.get('attachments'))
+        self.edits += 1
+        return self
+
+class FakeChannel:
+    """A channel the bot can send messages to."""
+
+    def __init__(self, api: FakeDiscord, channel_id: int):
+        self.api = api
+        self.id = channel_id
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        await self.api.request('POST', '/channels/{channel_id}/messages', ('send', self.id))
+        self.api.upload([kwargs['file']] if kwargs.get('file') else kwargs.get('files'))
+        return FakeMessage(self.api, self.id, '/channels/{channel_id}')
+
+class FakeFollowup:
+    """The interaction's webhook, used for follow-up messages."""
+
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        api = self.interaction.api
+        await api.request('POST', '/webhooks/{application_id}/{interaction_token}', ('webhook', self.interaction.id))
+        api.upload([kwargs['file']] if kwargs.get('file') else kwargs.get('files'))
+        return FakeMessage(api, self.interaction.channel_id, '/webhooks/{application_id}/{interaction_token}')
+
+class FakeResponse:
+    """The interaction's single initial response."""
+
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+        self.responded = False
+        self.messages = []  # Content of messages sent as the response, such as rejections
+
+    def is_done(self) -> bool:
+        return self.responded
+
+    async def _respond(self) -> None:
+        if self.responded:
+            raise discord.InteractionResponded(self.interaction)
+        self.responded = True
+        interaction = self.interaction
+        await interaction.api.request('POST', '/interactions/{interaction_id}/{interaction_token}/callback',
+                                      ('callback', interaction.id))
+
+    async def defer(self, **kwargs) -> None:
+        await self._respond()
+
+    async def send_message(self, content: Optional[str] = None, **kwargs) -> None:
+        await self._respond()
+        self.messages.append(content)
+
+class FakeInteraction:
+    """A slash command invocation in a DM-like channel, so no guild permissions are checked."""
+
+    def __init__(self, api: FakeDiscord, channel_id: int, user: FakeUser, guild_id: Optional[int] = None):
+        self.api = api
+        self.id = api.next_id()
+        self.channel_id = channel_id
+        self.channel = FakeChannel(api, channel_id)
+        self.guild = None
+        self.guild_id = guild_id
+        self.user = user
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
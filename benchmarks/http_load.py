@@ -0,0 +1,150 @@
+"""
+Local HTTP load test for server.py.
+
+Starts the web server in each serving mode, drives it with concurrent
+keep-alive clients and reports requests/sec and latency percentiles.
+
+Usage:
+    python -m benchmarks.http_load [--clients 32] [--duration 10] [--modes development production]
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+import config
+
+# Requests issued round-robin by every client
+ROUTES = [
+    ('GET', '/', None),
+    ('GET', '/api/config', None),
+    ('GET', '/discord-activity?mode=singleplayer&difficulty=hard', None),
+    ('POST', '/api/token', json.dumps({'code': 'loadtest-code'})),
+]
+
+def _find_available_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _client(port: int, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    """Issue requests over a single keep-alive connection until the deadline."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+    i = 0
+    while time.time() < deadline:
+        method, path, body = ROUTES[i % len(ROUTES)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.close()
+
+def run_load(mode: str, clients: int, duration: float) -> Dict:
+    """Start server.py in the given mode and measure it under load."""
+    port = _find_available_port()
+    env = os.environ.copy()
+    env['PORT'] = str(port)
+    env['SERVER_MODE'] = mode
+    env['SERVER_HOST'] = '127.0.0.1'
+
+    # Run in its own session so the Flask reloader child is stopped with it
+    process = subprocess.Popen(
+        [sys.executable, 'server.py'],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+    try:
+        if not _wait_for_port(port):
+            raise RuntimeError(f"server did not start in {mode} mode")
+
+        # Warm up routes and caches before measuring
+        _client(port, time.time() + 0.5, [], [])
+
+        latencies: List[List[float]] = [[] for _ in range(clients)]
+        errors: List[int] = []
+        deadline = time.time() + duration
+        threads = [
+            threading.Thread(target=_client, args=(port, deadline, latencies[i], errors))
+            for i in range(clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+    samples = sorted(latency for client in latencies for latency in client)
+    return {
+        'mode': mode,
+        'clients': clients,
+        'requests': len(samples),
+        'errors': len(errors),
+        'requests_per_sec': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': _percentile(samples, 50) * 1000,
+        'p99_ms': _percentile(samples, 99) * 1000,
+        'max_ms': (samples[-1] if samples else 0.0) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the embedded app web server")
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent keep-alive clients")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run each mode")
+    parser.add_argument('--modes', nargs='+', default=[config.SERVER_DEVELOPMENT, config.SERVER_PRODUCTION])
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_load(mode, args.clients, args.duration) for mode in args.modes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10} {'errors':>8}")
+    for result in results:
+        print(f"{result['mode']:<12} {result['requests_per_sec']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p99_ms']:>10.2f} {result['max_ms']:>10.2f} {result['errors']:>8}")
+
+if __name__ == '__main__':
+    main()
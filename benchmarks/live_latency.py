@@ -0,0 +1,250 @@
+"""
+Client-side prediction harness with simulated latency.
+
+Runs a local game on the Python engine, served by the bot's live state server,
+behind a proxy that delays every WebSocket message in both directions. Open
+the printed URL to play it in a browser, or pass --headless to connect clients
+running web/live.js under Node that turn at random, and report how often the
+server's states had to correct their predictions.
+
+Usage:
+    python -m benchmarks.live_latency [--latency 150] [--jitter 20] [--headless 4 --seconds 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+import aiohttp
+from aiohttp import web
+import config
+from game.snake import SnakeGame
+from game.ai import SnakeAI
+from discord_integration.live import LiveServer, LIVE_INPUTS, live_token
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHANNEL_ID = 1
+USER_ID = '1'
+
+# Loads the web client's engine and prediction code into Node and plays with random turns
+HEADLESS_CLIENT = """
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const [root, url, clients, seconds, fps, gridSize, lookahead] = process.argv.slice(1);
+vm.runInThisContext(`const GRID_SIZE = ${gridSize}; const FPS = ${fps}; let INPUT_LOOKAHEAD = ${lookahead};`);
+vm.runInThisContext(fs.readFileSync(path.join(root, 'web', 'game.js'), 'utf8'));
+vm.runInThisContext(fs.readFileSync(path.join(root, 'web', 'live.js'), 'utf8'));
+
+const directions = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT];
+const deadline = Date.now() + seconds * 1000;
+const totals = { states: 0, corrections: 0, inputs: 0, connections: 0, lead: [], rtt: [] };
+
+function play() {
+    return new Promise(resolve => {
+        const client = new LiveGameClient(url, 'player', { onClose: () => {
+            clearInterval(timer);
+            for (const key of ['states', 'corrections', 'inputs']) totals[key] += client.stats[key];
+            if (client.rtt) { totals.rtt.push(client.rtt); totals.lead.push(client.lead()); }
+            resolve();
+        } });
+        totals.connections++;
+        const timer = setInterval(() => {
+            if (Date.now() > deadline) return client.close();
+            client.step();
+            if (Math.random() < 0.2) client.input(directions[Math.floor(Math.random() * 4)]);
+        }, 1000 / fps);
+        client.connect();
+    });
+}
+
+async function run() {
+    while (Date.now() < deadline) await play();
+}
+
+Promise.all(Array.from({ length: Number(clients) }, run)).then(() => {
+    const mean = values => values.length ? values.reduce((a, b) => a + b, 0) / values.length : 0;
+    console.log(JSON.stringify({
+        states: totals.states, corrections: totals.corrections, inputs: totals.inputs,
+        connections: totals.connections, rtt_ms: mean(totals.rtt), lead_ticks: mean(totals.lead)
+    }));
+});
+"""
+
+def new_game(mode: str, difficulty: str) -> Dict:
+    """Set up a game like the bot's /snek command does, without Discord."""
+    if mode == config.ARENA:
+        game = SnakeGame(mode, difficulty, grid_size=config.ARENA_GRID_SIZE, food_count=config.ARENA_FOOD_COUNT)
+        ai_ids = [f'ai_{i}' for i in range(1, config.ARENA_AI_COUNT + 1)]
+    else:
+        game = SnakeGame(mode, difficulty)
+        ai_ids = ['ai']
+    game.add_player('player', config.GREEN)
+    for ai_id in ai_ids:
+        game.add_player(ai_id, config.BLUE)
+    return {'game': game, 'ais': [SnakeAI(game, difficulty, ai_id) for ai_id in ai_ids], 'players': {USER_ID: 'harness'}}
+
+async def run_games(games: Dict[int, Dict], live: LiveServer, mode: str, difficulty: str) -> None:
+    """Play games back to back on the bot's tick schedule."""
+    while True:
+        game_data = games[CHANNEL_ID] = new_game(mode, difficulty)
+        game = game_data['game']
+        while not game.game_over:
+            live.apply_inputs(CHANNEL_ID, game)
+            for ai in game_data['ais']:
+                if game.snakes[ai.snake_id].alive:
+                    game.handle_input(ai.snake_id, ai.get_next_move())
+            game.update()
+            live.publish(CHANNEL_ID, game)
+            await asyncio.sleep(1.0 / config.FPS)
+        await asyncio.sleep(2)
+        await live.discard(CHANNEL_ID)
+
+async def relay(source, target, latency: float, jitter: float) -> None:
+    """Forward text messages after a delay, keeping their order, then close the target."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def deliver():
+        while True:
+            due, data = await queue.get()
+            if data is None:
+                return
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            await target.send_str(data)
+
+    sender = asyncio.create_task(deliver())
+    last_due = 0.0
+    try:
+        async for msg in source:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                last_due = max(last_due, loop.time() + max(0.0, random.gauss(latency, jitter)))
+                queue.put_nowait((last_due, msg.data))
+        queue.put_nowait((0.0, None))
+        await sender
+    except (ConnectionError, RuntimeError):
+        sender.cancel()
+    finally:
+        await target.close()
+
+def build_app(live_port: int, latency: float, jitter: float) -> web.Application:
+    """Serve the web client, a config pointing it at the proxy, and the delaying proxy itself."""
+    async def handle_config(request: web.Request) -> web.Response:
+        return web.json_response({'clientId': None, 'liveStateUrl': f'ws://{request.host}'})
+
+    async def handle_proxy(request: web.Request) -> web.WebSocketResponse:
+        client = web.WebSocketResponse()
+        await client.prepare(request)
+        async with aiohttp.ClientSession() as session:
+            upstream = await session.ws_connect(f'ws://127.0.0.1:{live_port}{request.path_qs}')
+            await asyncio.gather(relay(client, upstream, latency, jitter), relay(upstream, client, latency, jitter))
+        return client
+
+    async def handle_index(request: web.Request) -> web.FileResponse:
+        return web.FileResponse(os.path.join(ROOT, 'web', 'index.html'))
+
+    app = web.Application()
+    app.router.add_get('/', handle_index)
+    app.router.add_get('/api/config', handle_config)
+    app.router.add_get('/games/{channel_id}/live', handle_proxy)
+    app.router.add_static('/', os.path.join(ROOT, 'web'))
+    return app
+
+def run_headless(url: str, clients: int, seconds: float, grid_size: int) -> Dict:
+    """Run prediction clients from web/live.js under Node and collect their totals."""
+    node = shutil.which('node')
+    if node is None:
+        sys.exit("Node.js is needed for --headless")
+    version = int(subprocess.run([node, '--version'], capture_output=True, text=True).stdout.strip().lstrip('v').split('.')[0])
+    flags = ['--experimental-websocket'] if version < 22 else []  # WebSocket is global from Node 22
+    output = subprocess.run(
+        [node, *flags, '-e', HEADLESS_CLIENT, ROOT, url, str(clients), str(seconds), str(config.FPS),
+         str(grid_size), str(config.INPUT_LOOKAHEAD)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+async def run(args) -> Optional[Dict]:
+    games: Dict[int, Dict] = {}
+
+    def on_input(channel_id, snake_id, direction):
+        games[channel_id]['game'].handle_input(snake_id, direction)
+
+    live = LiveServer(games, on_input, host='127.0.0.1', port=args.live_port)
+    if not await live.start():
+        sys.exit(1)
+    runner = web.AppRunner(build_app(args.live_port, args.latency / 1000, args.jitter / 1000), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.port).start()
+    game_task = asyncio.create_task(run_games(games, live, args.mode, args.difficulty))
+
+    token = live_token(CHANNEL_ID, USER_ID)
+    try:
+        if not args.headless:
+            print(f"Open http://127.0.0.1:{args.port}/?channel_id={CHANNEL_ID}&user={USER_ID}&token={token} "
+                  f"({args.latency:g}ms each way, {args.jitter:g}ms jitter); Ctrl+C to stop")
+            await asyncio.Event().wait()
+            return None
+
+        grid_size = config.ARENA_GRID_SIZE if args.mode == config.ARENA else config.GRID_SIZE
+        url = f'ws://127.0.0.1:{args.port}/games/{CHANNEL_ID}/live?user={USER_ID}&token={token}'
+        start = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, run_headless, url, args.headless, args.seconds, grid_size
+        )
+        result['seconds'] = time.perf_counter() - start
+    finally:
+        game_task.cancel()
+        await live.stop()
+        await runner.cleanup()
+
+    on_time = LIVE_INPUTS.labels('on_time').value
+    late = LIVE_INPUTS.labels('late').value
+    result.update({
+        'latency_ms': args.latency,
+        'jitter_ms': args.jitter,
+        'clients': args.headless,
+        'inputs_on_time': on_time,
+        'inputs_late': late,
+    })
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Play against the Python engine through simulated latency")
+    parser.add_argument('--latency', type=float, default=150, help="One-way delay in milliseconds")
+    parser.add_argument('--jitter', type=float, default=20, help="Standard deviation of the delay in milliseconds")
+    parser.add_argument('--mode', default=config.SINGLEPLAYER, choices=[config.SINGLEPLAYER, config.ARENA])
+    parser.add_argument('--difficulty', default=config.AI_MEDIUM)
+    parser.add_argument('--port', type=int, default=8770, help="Port for the web client and the delaying proxy")
+    parser.add_argument('--live-port', type=int, default=8771, help="Port for the live state server")
+    parser.add_argument('--headless', type=int, default=0, help="Node clients to run instead of waiting for a browser")
+    parser.add_argument('--seconds', type=float, default=30, help="How long headless clients play")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return
+    if result is None:
+        return
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    inputs = result['inputs_on_time'] + result['inputs_late']
+    print(f"{result['clients']} client(s) for {result['seconds']:.0f}s at {result['latency_ms']:g}ms "
+          f"each way (jitter {result['jitter_ms']:g}ms)")
+    print(f"  measured round trip {result['rtt_ms']:.0f}ms, prediction lead {result['lead_ticks']:.1f} ticks")
+    print(f"  inputs: {inputs:.0f}, arrived in time {result['inputs_on_time'] / inputs if inputs else 0:.1%}")
+    print(f"  states: {result['states']}, corrected the player's snake: "
+          f"{result['corrections']} ({result['corrections'] / result['states'] if result['states'] else 0:.2%})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Bot startup benchmark.
+
+Starts fresh interpreters that import the bot and construct SnakeBot (the
+work done before the bot can begin connecting to Discord), and reports the
+median times along with the modules that take longest to import.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Runs in a fresh interpreter, so every import is cold
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from discord_integration.bot import SnakeBot
+SnakeBot()
+constructed = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'construct_ms': (constructed - imported) * 1000}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_startup() -> Dict:
+    """Time one cold start, including interpreter startup."""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = total * 1000
+    return result
+
+def slowest_imports(top: int) -> List[Dict]:
+    """Get the modules with the largest self import time, from python -X importtime."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'self_ms': int(self_us) / 1000,
+                        'cumulative_ms': int(cumulative_us) / 1000})
+    modules.sort(key=lambda module: -module['self_ms'])
+    return modules[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bot startup")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    report = {
+        'runs': args.runs,
+        'median_ms': {key: statistics.median(run[key] for run in runs)
+                      for key in ('import_ms', 'construct_ms', 'process_ms')},
+        'slowest_imports': slowest_imports(args.top),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    median = report['median_ms']
+    print(f"Median of {args.runs} cold starts: import {median['import_ms']:.0f}ms, "
+          f"SnakeBot() {median['construct_ms']:.1f}ms, whole process {median['process_ms']:.0f}ms")
+    print(f"\n{'self ms':>8} {'cumulative ms':>14}  module")
+    for module in report['slowest_imports']:
+        print(f"{module['self_ms']:>8.1f} {module['cumulative_ms']:>14.1f}  {module['module']}")
+
+if __name__ == '__main__':
+    main()
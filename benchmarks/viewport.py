@@ -0,0 +1,116 @@
+"""
+Live state viewport benchmark.
+
+Fills boards of growing size with snakes and food at a fixed density, plays a
+few ticks, then compares what the live state server sends a client: the whole
+board, or a viewport around one snake plus the minimap. Reports the size of
+each message and the time to build and serialize it, and the per-tick cost
+of the segment index that all of a game's viewports share.
+
+Usage:
+    python -m benchmarks.viewport [--grid-sizes 64 128 256 512] [--cells-per-snake 256] [--radius 12]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Callable, Dict
+import config
+from game.snake import SnakeGame, Direction
+from game.viewport import BoardIndex, render_minimap
+from discord_integration.live import LiveChannel, encode_state, encode_view
+
+def build_board(grid_size: int, cells_per_snake: int, cells_per_food: int, ticks: int, seed: int) -> SnakeGame:
+    """An arena game with snakes and food in proportion to its area, a few ticks in."""
+    random.seed(seed)
+    area = grid_size * grid_size
+    game = SnakeGame(config.ARENA, config.AI_EASY, grid_size=grid_size, food_count=max(1, area // cells_per_food))
+    game.add_player('player', config.GREEN)
+    for i in range(1, max(2, area // cells_per_snake)):
+        game.add_player(f'ai_{i}', config.BLUE)
+    directions = list(Direction)
+    for _ in range(ticks):
+        for snake_id in game.snakes:
+            if random.random() < 0.1:
+                game.handle_input(snake_id, random.choice(directions))
+        game.update()
+    return game
+
+def time_call(func: Callable, repeat: int) -> float:
+    """Median seconds taken by a call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def run_viewport(grid_size: int, cells_per_snake: int, cells_per_food: int, radius: int,
+                 ticks: int, repeat: int, seed: int) -> Dict:
+    """Measure full state and viewport messages on one board."""
+    game = build_board(grid_size, cells_per_snake, cells_per_food, ticks, seed)
+    acks = LiveChannel().acks
+    dumps = lambda message: json.dumps(message, separators=(',', ':'))
+
+    full = dumps(encode_state(game, acks))
+    full_time = time_call(lambda: dumps(encode_state(game, acks)), repeat)
+
+    index_time = time_call(lambda: BoardIndex(game), repeat)
+    minimap_time = time_call(lambda: render_minimap(game, config.LIVE_MINIMAP_SIZE), repeat)
+    index = BoardIndex(game)
+    minimap = render_minimap(game, config.LIVE_MINIMAP_SIZE)
+
+    # Follow living snakes spread over the board, one viewport each
+    alive = [snake_id for snake_id, snake in game.snakes.items() if snake.alive]
+    followed = alive[::max(1, len(alive) // 20)][:20] or ['player']
+    sizes = []
+    view_times = []
+    for snake_id in followed:
+        view = (snake_id, radius, minimap is not None)
+        sizes.append(len(dumps(encode_view(game, acks, index, view, minimap))))
+        view_times.append(time_call(lambda: dumps(encode_view(game, acks, index, view, minimap)), repeat))
+
+    return {
+        'grid_size': grid_size,
+        'snakes_alive': len(alive),
+        'food': len(game.food),
+        'radius': radius,
+        'full_bytes': len(full),
+        'full_us': full_time * 1e6,
+        'view_bytes': statistics.mean(sizes),
+        'view_us': statistics.mean(view_times) * 1e6,
+        'minimap_bytes': len(minimap) if minimap else 0,
+        'index_us_per_tick': index_time * 1e6,
+        'minimap_us_per_tick': minimap_time * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark live state viewports against sending the whole board")
+    parser.add_argument('--grid-sizes', type=int, nargs='+', default=[64, 128, 256, 512])
+    parser.add_argument('--cells-per-snake', type=int, default=256, help="Board cells per snake")
+    parser.add_argument('--cells-per-food', type=int, default=64, help="Board cells per food")
+    parser.add_argument('--radius', type=int, default=config.LIVE_VIEW_RADIUS, help="Viewport radius in cells")
+    parser.add_argument('--ticks', type=int, default=20, help="Ticks played before measuring")
+    parser.add_argument('--repeat', type=int, default=20, help="Times each message is built to time it")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_viewport(grid_size, args.cells_per_snake, args.cells_per_food, args.radius,
+                            args.ticks, args.repeat, args.seed)
+               for grid_size in args.grid_sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'grid':>5} {'snakes':>7} {'food':>6} {'full bytes':>11} {'full us':>9} "
+          f"{'view bytes':>11} {'view us':>8} {'index us/tick':>14} {'minimap us/tick':>16}")
+    for r in results:
+        print(f"{r['grid_size']:>5} {r['snakes_alive']:>7} {r['food']:>6} {r['full_bytes']:>11} {r['full_us']:>9.0f} "
+              f"{r['view_bytes']:>11.0f} {r['view_us']:>8.0f} {r['index_us_per_tick']:>14.0f} "
+              f"{r['minimap_us_per_tick']:>16.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Zobrist hash parity check and benchmark.
+
+Plays headless arena games with random turns (so snakes eat, grow, collide
+and die) and after every tick compares SnakeGame.zobrist, which is updated
+incrementally, with a hash of the board computed from scratch, and checks
+that a game restored from its snapshot hashes the same. Reports any
+mismatch, and the cost of a tick against that of rehashing the board.
+Exits with status 1 if any hash differs.
+
+Usage:
+    python -m benchmarks.zobrist [--grid-sizes 16 64 256] [--snakes 40] [--food 32] [--ticks 500] [--games 5]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict
+import config
+from game.snake import SnakeGame, Direction
+
+def run_parity(grid_size: int, snakes: int, food: int, ticks: int, games: int, seed: int) -> Dict:
+    """Play games on one board size, checking the hash after every tick."""
+    random.seed(seed)
+    directions = list(Direction)
+    checked = 0
+    mismatches = 0
+    snapshot_mismatches = 0
+    deaths = 0
+    update_time = 0.0
+    rehash_time = 0.0
+    for _ in range(games):
+        game = SnakeGame(config.ARENA, config.AI_EASY, grid_size=grid_size, food_count=food)
+        for i in range(snakes):
+            try:
+                game.add_player(f'snake_{i}', config.GREEN)
+            except ValueError:
+                break
+        for tick in range(ticks):
+            if game.game_over:
+                break
+            for player_id in game.snakes:
+                if random.random() < 0.2:
+                    game.handle_input(player_id, random.choice(directions))
+
+            alive = sum(1 for snake in game.snakes.values() if snake.alive)
+            start = time.perf_counter()
+            game.update()
+            update_time += time.perf_counter() - start
+            deaths += alive - sum(1 for snake in game.snakes.values() if snake.alive)
+
+            start = time.perf_counter()
+            expected = game.compute_zobrist()
+            rehash_time += time.perf_counter() - start
+            checked += 1
+            if game.zobrist != expected:
+                mismatches += 1
+            if tick % 50 == 0 and SnakeGame.from_snapshot(game.to_snapshot()).zobrist != game.zobrist:
+                snapshot_mismatches += 1
+
+    return {
+        'grid_size': grid_size,
+        'snakes': snakes,
+        'ticks_checked': checked,
+        'deaths': deaths,
+        'mismatches': mismatches,
+        'snapshot_mismatches': snapshot_mismatches,
+        'update_us_per_tick': update_time / checked * 1e6 if checked else 0.0,
+        'rehash_us': rehash_time / checked * 1e6 if checked else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the incremental Zobrist hash against a full rehash")
+    parser.add_argument('--grid-sizes', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--snakes', type=int, default=40)
+    parser.add_argument('--food', type=int, default=32)
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--games', type=int, default=5, help="Games played per board size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run_parity(size, args.snakes, args.food, args.ticks, args.games, args.seed)
+               for size in args.grid_sizes]
+    failed = any(r['mismatches'] or r['snapshot_mismatches'] for r in results)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'grid':>9} {'ticks':>7} {'deaths':>7} {'mismatches':>11} {'snapshot':>9} "
+              f"{'update us':>10} {'rehash us':>10}")
+        for r in results:
+            grid = f"{r['grid_size']}x{r['grid_size']}"
+            print(f"{grid:>9} {r['ticks_checked']:>7} {r['deaths']:>7} {r['mismatches']:>11} "
+                  f"{r['snapshot_mismatches']:>9} {r['update_us_per_tick']:>10.1f} {r['rehash_us']:>10.1f}")
+        print("FAILED: incremental hash differs from a full rehash" if failed else "OK: hashes match on every tick")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import secrets
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -8,9 +9,52 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 APPLICATION_ID = os.getenv('APPLICATION_ID')
 GUILD_ID = os.getenv('GUILD_ID')  # Optional: For development in a specific server
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', 'false').lower() == 'true'  # Sync slash commands even if unchanged
+COMMAND_SYNC_STATE_PATH = os.getenv('COMMAND_SYNC_STATE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'command_tree.json'))
 
 # Embedded App Configuration
 EMBEDDED_APP_URL = os.getenv('EMBEDDED_APP_URL', 'http://localhost:5010')  # Default to localhost for development
+EMBEDDED_SERVER_LOG = os.getenv('EMBEDDED_SERVER_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'embedded_server.log'))  # Output of the web server the bot starts
+
+# Web Server Configuration
+SERVER_MODE = os.getenv('SERVER_MODE', 'development')  # 'development' (Flask debug server) or 'production'
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '8'))  # Worker threads handling requests in production mode
+SERVER_KEEPALIVE = int(os.getenv('SERVER_KEEPALIVE', '120'))  # Seconds an idle keep-alive connection stays open
+SERVER_CONNECTION_LIMIT = int(os.getenv('SERVER_CONNECTION_LIMIT', '1000'))  # Max simultaneous client connections
+SERVER_SHUTDOWN_TIMEOUT = float(os.getenv('SERVER_SHUTDOWN_TIMEOUT', '10'))  # Seconds to let in-flight requests finish on shutdown
+
+# Live Frame Configuration
+LIVE_FRAMES = os.getenv('LIVE_FRAMES', 'false').lower() == 'true'  # Reference frames by URL instead of uploading attachments
+FRAME_SERVER_URL = os.getenv('FRAME_SERVER_URL')  # Where the bot publishes rendered frames (default: the web server it starts)
+FRAME_PUSH_TOKEN = os.getenv('FRAME_PUSH_TOKEN')  # Shared secret for publishing frames (required in production mode)
+FRAME_STORE_MAX_GAMES = int(os.getenv('FRAME_STORE_MAX_GAMES', '1000'))  # Latest frames kept in server memory
+
+# Live Game State Configuration
+LIVE_STATE_HOST = os.getenv('LIVE_STATE_HOST', '127.0.0.1')
+LIVE_STATE_PORT = int(os.getenv('LIVE_STATE_PORT', '0'))  # Port for the bot's live game state WebSockets (0 disables them)
+LIVE_STATE_URL = os.getenv('LIVE_STATE_URL')  # Public ws:// or wss:// address of the live state server, given to web clients
+LIVE_CLIENT_BUFFER = int(os.getenv('LIVE_CLIENT_BUFFER', '65536'))  # Unsent bytes beyond which a client skips ticks
+LIVE_CLIENT_MAX_LAG = int(os.getenv('LIVE_CLIENT_MAX_LAG', '50'))  # Ticks in a row a client may skip before it's disconnected
+LIVE_VIEW_RADIUS = int(os.getenv('LIVE_VIEW_RADIUS', '12'))  # Cells around its snake a client sees on boards too large to send whole
+LIVE_MINIMAP_SIZE = int(os.getenv('LIVE_MINIMAP_SIZE', '16'))  # Cells per side of the board overview sent with a viewport (0 disables it)
+LIVE_TOKEN_SECRET = os.getenv('LIVE_TOKEN_SECRET') or secrets.token_hex(32)  # Signs players' live tokens (random per run unless set, so links expire on restart)
+
+# Logging Configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' for one JSON object per line, 'text' for plain lines
+LOG_QUEUE_SIZE = 10000  # Records waiting to be written before new ones are dropped
+LOG_ERROR_BURST = int(os.getenv('LOG_ERROR_BURST', '5'))  # Repeats of the same warning or error logged per game per window (0 disables rate limiting)
+LOG_ERROR_WINDOW = float(os.getenv('LOG_ERROR_WINDOW', '60'))  # Seconds in a rate limiting window
+
+# Metrics Configuration
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))  # Port for the bot's /metrics endpoint (0 disables it)
+SLOW_CALLBACK_MS = float(os.getenv('SLOW_CALLBACK_MS', '100'))  # Event loop callbacks longer than this are reported (0 disables monitoring)
+LOOP_LAG_INTERVAL = 0.25  # Seconds between event loop lag samples
+MEMORY_DIAGNOSTICS = os.getenv('MEMORY_DIAGNOSTICS', 'false').lower() == 'true'  # Per-game memory accounting and tracemalloc reports
+MEMORY_SAMPLE_INTERVAL = float(os.getenv('MEMORY_SAMPLE_INTERVAL', '60'))  # Seconds between memory samples
+TRACEMALLOC_FRAMES = int(os.getenv('TRACEMALLOC_FRAMES', '1'))  # Stack frames kept per allocation (0 skips tracemalloc)
 
 # Game Configuration
 GRID_SIZE = 20  # Size of the game grid (20x20)
@@ -18,6 +62,31 @@ CELL_SIZE = 20  # Size of each cell in pixels
 GAME_WIDTH = GRID_SIZE * CELL_SIZE
 GAME_HEIGHT = GRID_SIZE * CELL_SIZE
 FPS = 10  # Frames per second / game speed
+SPAWN_CLEARANCE = 4  # Free cells required ahead of a snake spawned at a random position
+SPAWN_ATTEMPTS = 32  # Random probes for a free cell before scanning the whole board
+SPATIAL_BUCKET_SIZE = 8  # Minimum cells per side of a spatial index bucket
+INPUT_LOOKAHEAD = int(os.getenv('INPUT_LOOKAHEAD', '3'))  # Turns a player can queue ahead of the game, one applied per tick
+
+# Game Limits
+GAME_IDLE_TIMEOUT = float(os.getenv('GAME_IDLE_TIMEOUT', '300'))  # Seconds without player input before a game is ended (0 disables)
+GAME_MAX_LIFETIME = float(os.getenv('GAME_MAX_LIFETIME', '1800'))  # Longest a game may run, in seconds (0 disables)
+MAX_ACTIVE_GAMES = int(os.getenv('MAX_ACTIVE_GAMES', '500'))  # Games the bot runs at once (0 for no limit)
+MAX_GAMES_PER_GUILD = int(os.getenv('MAX_GAMES_PER_GUILD', '5'))  # Games one server may run at once (0 for no limit)
+
+# Checkpoint Configuration
+CHECKPOINT_INTERVAL = float(os.getenv('CHECKPOINT_INTERVAL', '5'))  # Seconds between game checkpoints (0 disables checkpoints)
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'checkpoints.log'))
+
+# Leaderboard Configuration
+LEADERBOARD_PATH = os.getenv('LEADERBOARD_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'leaderboard.db'))
+LEADERBOARD_SIZE = 10  # Players listed per leaderboard
+LEADERBOARD_FLUSH_INTERVAL = 2.0  # Seconds between batched leaderboard writes
+
+# Arena Configuration
+ARENA_GRID_SIZE = int(os.getenv('ARENA_GRID_SIZE', '64'))
+ARENA_AI_COUNT = int(os.getenv('ARENA_AI_COUNT', '7'))  # AI snakes joining the player in an arena
+ARENA_FOOD_COUNT = int(os.getenv('ARENA_FOOD_COUNT', '8'))
+MAX_SCORE_LINES = 10  # Scores listed in rendered frames and embeds (highest first when there are more)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -27,11 +96,26 @@ RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 
+# Server Modes
+SERVER_DEVELOPMENT = 'development'
+SERVER_PRODUCTION = 'production'
+
 # Game Modes
 SINGLEPLAYER = 'singleplayer'
 MULTIPLAYER = 'multiplayer'
+ARENA = 'arena'
 
 # AI Difficulty Levels
 AI_EASY = 'easy'
 AI_MEDIUM = 'medium'
 AI_HARD = 'hard'
+AI_EXPERT = 'expert'
+AI_MASTER = 'master'
+
+# AI Configuration
+AI_CACHE_DIR = os.getenv('AI_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))  # Precomputed AI tables
+EXPERT_SHORTCUT_LIMIT = 0.5  # Expert AI only takes shortcuts while its snake fills less than this share of the board
+AI_SEARCH_BUDGET_MS = float(os.getenv('AI_SEARCH_BUDGET_MS', '5'))  # Time the master AI searches per move; it runs on the event loop
+AI_SEARCH_MAX_DEPTH = 24  # Deepest the master AI searches, in ticks
+AI_SEARCH_RADIUS = 8  # The master AI searches against the nearest opponent whose head is within this many cells
+AI_SEARCH_TABLE_SIZE = 200000  # Positions the master AI remembers before clearing its transposition table
@@ -2,12 +2,28 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 import config
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 from game.snake import SnakeGame, Direction
 from game.ai import SnakeAI
-from game.renderer import GameRenderer
-from discord_integration.embedded_app import create_embedded_app
+from discord_integration.embedded_app import create_embedded_app, FramePublisher, app_manager
+from discord_integration import monitoring
+from discord_integration import checkpoints
+from discord_integration.checkpoints import CheckpointStore
+from discord_integration.leaderboard import Leaderboard
+from discord_integration.live import LiveServer, live_token
+
+if TYPE_CHECKING:
+    from game.renderer import GameRenderer
+
+log = logging.getLogger(__name__)
 
 class SnakeBot(commands.Bot):
     def __init__(self):
@@ -17,22 +33,134 @@ class SnakeBot(commands.Bot):
 
         # Store active games
         self.active_games: Dict[int, Dict] = {}  # channel_id -> game_data
-        self.game_renderer = GameRenderer()
+        self.starting_games: Dict[int, Optional[int]] = {}  # channel_id -> guild_id of games being set up
+        self.pending_restores: Dict[int, bytes] = {}  # channel_id -> encoded checkpoint of a game not yet resumed
+        self._game_renderer: Optional['GameRenderer'] = None  # Created when the first game needs it
+        self.frame_publisher = FramePublisher() if config.LIVE_FRAMES else None
+        self.loop_monitor = monitoring.LoopMonitor() if config.SLOW_CALLBACK_MS > 0 else None
+        self.memory_diagnostics = None
+        if config.MEMORY_DIAGNOSTICS:
+            from discord_integration.memory import MemoryDiagnostics
+            self.memory_diagnostics = MemoryDiagnostics(self)
+
+        # Checkpoints are written by a single worker thread so the game loops never wait on disk
+        self.checkpoint_store = CheckpointStore() if config.CHECKPOINT_INTERVAL else None
+        self.checkpoint_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoints')
+        self.checkpointed: Dict[int, int] = {}  # channel_id -> tick of the game's latest checkpoint
+        self.checkpoint_task: Optional[asyncio.Task] = None
+        self.leaderboard = Leaderboard()
+        self.live_server = LiveServer(self.active_games, self.handle_player_input) if config.LIVE_STATE_PORT else None
+        self.metrics_server = monitoring.MetricsServer(
+            loop_monitor=self.loop_monitor, memory_diagnostics=self.memory_diagnostics, live_server=self.live_server
+        ) if config.METRICS_PORT else None
 
         # Register commands
         self.setup_commands()
 
     async def on_ready(self):
         """Called when the bot is ready."""
-        print(f'Logged in as {self.user} (ID: {self.user.id})')
-        print('------')
+        log.info("Logged in as %s (ID: %s)", self.user, self.user.id)
+
+        # Sync commands with Discord, unless Discord already has this exact command tree
+        try:
+            await self.sync_commands()
+        except Exception as e:
+            log.warning("Failed to sync commands: %s", e)
+
+    def command_tree_fingerprint(self) -> str:
+        """Hash the registered commands as they're sent to Discord, so any change alters the hash."""
+        payload = sorted((command.to_dict(self.tree) for command in self.tree.get_commands()),
+                         key=lambda command: (command['type'], command['name']))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def sync_commands(self, force: bool = config.FORCE_COMMAND_SYNC) -> bool:
+        """Sync the command tree if it changed since the last sync; returns whether it synced."""
+        fingerprint = self.command_tree_fingerprint()
+        application_id = str(self.application_id)
+
+        try:
+            with open(config.COMMAND_SYNC_STATE_PATH) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+        if not force and state.get(application_id) == fingerprint:
+            log.info("Command tree unchanged (%s), skipping sync", fingerprint[:12])
+            return False
 
-        # Sync commands with Discord
+        reason = 'forced' if force else 'changed' if application_id in state else 'never synced'
+        synced = await self.tree.sync()
+        log.info("Synced %d command(s) (%s, fingerprint %s)", len(synced), reason, fingerprint[:12])
+
+        # Only record the fingerprint once Discord has accepted the commands
+        state[application_id] = fingerprint
+        try:
+            os.makedirs(os.path.dirname(config.COMMAND_SYNC_STATE_PATH) or '.', exist_ok=True)
+            tmp_path = f"{config.COMMAND_SYNC_STATE_PATH}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, config.COMMAND_SYNC_STATE_PATH)
+        except OSError as e:
+            log.warning("Could not save command tree fingerprint: %s", e)
+        return True
+
+    async def setup_hook(self):
+        """Called before the bot connects to Discord."""
+        # Expose tick timings and game counts for Prometheus
+        monitoring.install_rate_limit_handler()
+        monitoring.ACTIVE_GAMES.set_function(lambda: len(self.active_games))
+        if self.loop_monitor:
+            self.loop_monitor.start()
+        if self.memory_diagnostics:
+            self.memory_diagnostics.start()
+        if self.metrics_server:
+            asyncio.create_task(self.metrics_server.start())
+        if self.live_server:
+            asyncio.create_task(self.live_server.start())
+
+        # Load the renderer and its fonts on a worker thread while the bot connects,
+        # so neither startup nor the first game waits for them
+        asyncio.get_running_loop().run_in_executor(None, self._preload_renderer)
+
+        await self.leaderboard.start()
+
+        # Pick up the games that were running when the bot last stopped
+        if self.checkpoint_store:
+            start = time.perf_counter()
+            self.pending_restores = await asyncio.get_running_loop().run_in_executor(
+                self.checkpoint_executor, self.checkpoint_store.load
+            )
+            log.info("Loaded %d game checkpoint(s) in %.0fms",
+                     len(self.pending_restores), (time.perf_counter() - start) * 1000)
+            self.checkpoint_task = asyncio.create_task(self.checkpoint_loop())
+            asyncio.create_task(self.restore_games())
+
+    async def close(self):
+        """Close the bot and release the embedded app server, frame publisher's HTTP session and monitoring."""
+        app_manager.stop_server()
+        if self.checkpoint_task:
+            # Record where every game got to so the next start resumes from there
+            self.checkpoint_task.cancel()
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                log.exception("Error writing final checkpoints: %s", e)
+            self.checkpoint_executor.shutdown(wait=False)
         try:
-            synced = await self.tree.sync()
-            print(f'Synced {len(synced)} command(s)')
+            await self.leaderboard.stop()
         except Exception as e:
-            print(f'Failed to sync commands: {e}')
+            log.exception("Error writing final leaderboard results: %s", e)
+        if self.frame_publisher:
+            await self.frame_publisher.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.live_server:
+            await self.live_server.stop()
+        if self.memory_diagnostics:
+            await self.memory_diagnostics.stop()
+        if self.loop_monitor:
+            await self.loop_monitor.stop()
+        await super().close()
 
     def setup_commands(self):
         """Set up the bot commands."""
@@ -40,18 +168,21 @@ class SnakeBot(commands.Bot):
         @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
         @self.tree.command(name="snek", description="Start a new Snake game")
         @app_commands.describe(
-            mode="Game mode (singleplayer or multiplayer)",
-            difficulty="AI difficulty for singleplayer mode (easy, medium, hard)"
+            mode="Game mode (singleplayer, multiplayer or arena)",
+            difficulty="AI difficulty for singleplayer and arena modes (easy, medium, hard, expert, master)"
         )
         @app_commands.choices(
             mode=[
                 app_commands.Choice(name="Singleplayer", value="singleplayer"),
-                app_commands.Choice(name="Multiplayer", value="multiplayer")
+                app_commands.Choice(name="Multiplayer", value="multiplayer"),
+                app_commands.Choice(name="Arena", value="arena")
             ],
             difficulty=[
                 app_commands.Choice(name="Easy", value="easy"),
                 app_commands.Choice(name="Medium", value="medium"),
-                app_commands.Choice(name="Hard", value="hard")
+                app_commands.Choice(name="Hard", value="hard"),
+                app_commands.Choice(name="Expert", value="expert"),
+                app_commands.Choice(name="Master", value="master")
             ]
         )
         async def snek_command(
@@ -69,12 +200,31 @@ class SnakeBot(commands.Bot):
             """Show help for the Snake game."""
             await self.show_help(interaction)
 
+        @self.tree.command(name="snek_leaderboard", description="Show the best Snake scores")
+        @app_commands.allowed_installs(guilds=True, users=True)
+        @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+        @app_commands.describe(scope="Best scores in this server or across every server")
+        @app_commands.choices(
+            scope=[
+                app_commands.Choice(name="This server", value="server"),
+                app_commands.Choice(name="Global", value="global")
+            ]
+        )
+        async def snek_leaderboard_command(interaction: discord.Interaction, scope: str = "server"):
+            """Show the best Snake scores."""
+            await self.show_leaderboard(interaction, scope)
+
     async def start_game(self, interaction: discord.Interaction, mode: str, difficulty: str):
         """Start a new Snake game."""
         channel_id = interaction.channel_id
+        monitoring.current_game.set(channel_id)
+
+        # Resume this channel's game now if it's still waiting to be restored
+        if channel_id in self.pending_restores:
+            await self.restore_game(channel_id)
 
         # Check if there's already an active game in this channel
-        if channel_id in self.active_games:
+        if channel_id in self.active_games or channel_id in self.starting_games:
             await interaction.response.send_message(
                 "There's already an active game in this channel. "
                 "Please wait for it to finish or use the embedded app controls.",
@@ -106,125 +256,331 @@ class SnakeBot(commands.Bot):
                 )
                 return
 
-        # Respond to the interaction immediately to prevent timeout
-        await interaction.response.defer(ephemeral=False, thinking=True)
+        # Check that there's room for another game, and hold its slot while it's set up
+        guild_id = interaction.guild_id
+        rejection = self._admission_error(guild_id)
+        if rejection:
+            await interaction.response.send_message(rejection, ephemeral=True)
+            return
+        self.starting_games[channel_id] = guild_id
 
         try:
-            # Create a new game
-            game = SnakeGame(mode, difficulty)
-
-            # Add the player
-            player_id = str(interaction.user.id)
-            player_name = interaction.user.display_name
-            game.add_player('player', config.GREEN)
-
-            # Add AI opponent for singleplayer mode
-            if mode == config.SINGLEPLAYER:
-                game.add_player('ai', config.BLUE)
-                ai = SnakeAI(game, difficulty)
-            else:
-                ai = None
+            # Respond to the interaction immediately to prevent timeout
+            await interaction.response.defer(ephemeral=False, thinking=True)
 
             try:
-                # Create the embedded app
-                app_message = await create_embedded_app(interaction, game, self.game_renderer)
-
-                # Store the game data
-                self.active_games[channel_id] = {
-                    'game': game,
-                    'ai': ai,
-                    'message': app_message,
-                    'task': None,
-                    'players': {player_id: player_name}
-                }
-
-                # Start the game loop
-                game_task = asyncio.create_task(self.game_loop(channel_id))
-                self.active_games[channel_id]['task'] = game_task
-
-                # Send a follow-up message instead of responding to the interaction
-                await interaction.followup.send(
-                    f"Snake game started in {mode} mode! "
-                    f"Use the embedded app to play."
-                )
-            except discord.errors.Forbidden as e:
-                await interaction.followup.send(
-                    "I don't have permission to send game messages in this channel. "
-                    "Please ask a server admin to check my permissions.",
-                    ephemeral=True
-                )
-                print(f"Permission error: {e}")
+                # Create a new game
+                if mode == config.ARENA:
+                    game = SnakeGame(mode, difficulty, grid_size=config.ARENA_GRID_SIZE, food_count=config.ARENA_FOOD_COUNT)
+                else:
+                    game = SnakeGame(mode, difficulty)
+
+                # Add the player
+                player_id = str(interaction.user.id)
+                player_name = interaction.user.display_name
+                game.add_player('player', config.GREEN)
+
+                # Add AI opponents: one in singleplayer mode, several in arena mode
+                ais = []
+                if mode == config.SINGLEPLAYER:
+                    game.add_player('ai', config.BLUE)
+                    ais.append(SnakeAI(game, difficulty))
+                elif mode == config.ARENA:
+                    for i in range(1, config.ARENA_AI_COUNT + 1):
+                        ai_id = f'ai_{i}'
+                        game.add_player(ai_id, config.BLUE)
+                        ais.append(SnakeAI(game, difficulty, ai_id))
+
+                renderer = self._renderer_for(game)
 
-        except Exception as e:
-            print(f"Error starting game: {e}")
-            import traceback
-            traceback.print_exc()
+                try:
+                    # Create the embedded app
+                    app_message = await create_embedded_app(interaction, game, renderer)
+
+                    # Store the game data
+                    now = time.monotonic()
+                    self.active_games[channel_id] = {
+                        'game': game,
+                        'ais': ais,
+                        'renderer': renderer,
+                        'message': app_message,
+                        'task': None,
+                        'players': {player_id: player_name},
+                        'guild_id': guild_id,
+                        'started_at': now,
+                        'last_input': now,
+                        'end_reason': None
+                    }
+
+                    # Start the game loop
+                    game_task = asyncio.create_task(self.game_loop(channel_id))
+                    self.active_games[channel_id]['task'] = game_task
+
+                    # Send a follow-up message instead of responding to the interaction
+                    await interaction.followup.send(
+                        f"Snake game started in {mode} mode! "
+                        f"Use the embedded app to play."
+                    )
+
+                    # Steering the snake over live state takes a token only the player gets
+                    if self.live_server:
+                        query = urlencode({
+                            'mode': game.mode, 'difficulty': game.ai_difficulty, 'channel_id': channel_id,
+                            'user': player_id, 'token': live_token(channel_id, player_id)
+                        })
+                        await interaction.followup.send(
+                            f"Your link to play: {config.EMBEDDED_APP_URL}/discord-activity?{query}",
+                            ephemeral=True
+                        )
+                except discord.errors.Forbidden as e:
+                    await interaction.followup.send(
+                        "I don't have permission to send game messages in this channel. "
+                        "Please ask a server admin to check my permissions.",
+                        ephemeral=True
+                    )
+                    log.warning("Permission error starting game: %s", e)
+
+            except Exception as e:
+                log.exception("Error starting game: %s", e)
+
+                try:
+                    await interaction.followup.send(
+                        f"An error occurred while starting the game: {str(e)}",
+                        ephemeral=True
+                    )
+                except Exception as follow_error:
+                    log.warning("Failed to send error message: %s", follow_error)
+        finally:
+            self.starting_games.pop(channel_id, None)
+
+    @staticmethod
+    def _preload_renderer() -> None:
+        from game import renderer
+        renderer.load_fonts()
+
+    @property
+    def game_renderer(self) -> 'GameRenderer':
+        """The renderer shared by games on the default board size."""
+        if self._game_renderer is None:
+            from game.renderer import GameRenderer
+            self._game_renderer = GameRenderer()
+        return self._game_renderer
+
+    def _renderer_for(self, game: SnakeGame) -> 'GameRenderer':
+        """Get a renderer for a game; larger boards get smaller cells so frames keep the same size."""
+        if game.grid_size == self.game_renderer.grid_size:
+            return self.game_renderer
+        from game.renderer import GameRenderer
+        return GameRenderer(game.grid_size, max(2, config.GAME_WIDTH // game.grid_size))
+
+    async def checkpoint(self) -> None:
+        """Write checkpoints of games that advanced since their last one, and drop finished games."""
+        now = time.monotonic()
+        captured = []
+        live = set()
+        for i, (channel_id, game_data) in enumerate(list(self.active_games.items())):
+            game = game_data['game']
+            if game.game_over:
+                continue
+            live.add(channel_id)
+            if self.checkpointed.get(channel_id) != game.tick_count:
+                captured.append(checkpoints.capture(channel_id, game_data, now))
+                self.checkpointed[channel_id] = game.tick_count
+            if i % 100 == 99:
+                await asyncio.sleep(0)  # Let game loops run between batches
+
+        deleted = [channel_id for channel_id in self.checkpointed if channel_id not in live]
+        for channel_id in deleted:
+            del self.checkpointed[channel_id]
+
+        if captured or deleted:
+            await asyncio.get_running_loop().run_in_executor(
+                self.checkpoint_executor, self.checkpoint_store.append, captured, deleted
+            )
 
+    async def checkpoint_loop(self) -> None:
+        """Checkpoint active games periodically."""
+        while True:
+            await asyncio.sleep(config.CHECKPOINT_INTERVAL)
             try:
-                await interaction.followup.send(
-                    f"An error occurred while starting the game: {str(e)}",
-                    ephemeral=True
-                )
-            except Exception as follow_error:
-                print(f"Failed to send error message: {follow_error}")
+                await self.checkpoint()
+            except Exception as e:
+                log.exception("Error writing checkpoints: %s", e)
+
+    async def restore_game(self, channel_id: int) -> bool:
+        """Resume a checkpointed game and reattach it to its message."""
+        payload = self.pending_restores.pop(channel_id, None)
+        if payload is None or channel_id in self.active_games:
+            return False
+
+        try:
+            record = CheckpointStore.decode(payload)
+            game_data = checkpoints.restore(record, time.monotonic())
+        except Exception as e:
+            log.warning("Could not restore game: %s", e, extra={'game': channel_id})
+            self.checkpointed[channel_id] = -1  # Deleted by the next checkpoint
+            return False
+
+        # A partial message can be edited without fetching it first
+        game_data['renderer'] = self._renderer_for(game_data['game'])
+        if record['message_id'] is not None:
+            game_data['message'] = self.get_partial_messageable(record['message_channel_id']).get_partial_message(
+                record['message_id']
+            )
+        self.active_games[channel_id] = game_data
+        self.checkpointed[channel_id] = game_data['game'].tick_count
+        game_data['task'] = asyncio.create_task(self.game_loop(channel_id))
+        return True
+
+    async def restore_games(self) -> None:
+        """Resume every checkpointed game in the background, a few at a time."""
+        start = time.perf_counter()
+        restored = 0
+        for channel_id in list(self.pending_restores):
+            if await self.restore_game(channel_id):
+                restored += 1
+                if restored % 50 == 0:
+                    await asyncio.sleep(0)  # Let restored games start ticking
+        if restored:
+            log.info("Restored %d game(s) in %.0fms", restored, (time.perf_counter() - start) * 1000)
+
+    def _admission_error(self, guild_id: Optional[int]) -> Optional[str]:
+        """Get the reason a new game can't start right now, or None if there's room for it."""
+        if config.MAX_ACTIVE_GAMES and len(self.active_games) + len(self.starting_games) >= config.MAX_ACTIVE_GAMES:
+            monitoring.GAMES_REJECTED.labels('global').inc()
+            return (f"The bot is already running the maximum of {config.MAX_ACTIVE_GAMES} games. "
+                    "Please try again in a few minutes.")
+
+        if guild_id is not None and config.MAX_GAMES_PER_GUILD:
+            guild_games = sum(1 for game_data in self.active_games.values() if game_data['guild_id'] == guild_id)
+            guild_games += sum(1 for starting_guild in self.starting_games.values() if starting_guild == guild_id)
+            if guild_games >= config.MAX_GAMES_PER_GUILD:
+                monitoring.GAMES_REJECTED.labels('guild').inc()
+                return (f"This server already has {config.MAX_GAMES_PER_GUILD} games running. "
+                        "Please wait for one of them to finish.")
+
+        return None
+
+    def _eviction_reason(self, game_data: Dict) -> Optional[str]:
+        """Get the reason a game should be ended early, or None if it can keep running."""
+        now = time.monotonic()
+        if config.GAME_MAX_LIFETIME and now - game_data['started_at'] >= config.GAME_MAX_LIFETIME:
+            return 'lifetime'
+        if config.GAME_IDLE_TIMEOUT and now - game_data['last_input'] >= config.GAME_IDLE_TIMEOUT:
+            return 'idle'
+        return None
+
+    def handle_player_input(self, channel_id: int, player_id: str, direction: Direction) -> None:
+        """Apply a player's input to the game in a channel and keep the game from going idle."""
+        game_data = self.active_games.get(channel_id)
+        if game_data is None:
+            return
+        game_data['last_input'] = time.monotonic()
+        game_data['game'].handle_input(player_id, direction)
+
+    async def _remove_game(self, channel_id: int) -> None:
+        """Drop a game and everything it holds, including its published frame."""
+        game_data = self.active_games.pop(channel_id, None)
+        if game_data is None:
+            return
+        task = game_data['task']
+        if task and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+        if self.frame_publisher:
+            await self.frame_publisher.discard(channel_id)
+        if self.live_server:
+            await self.live_server.discard(channel_id)
 
     async def game_loop(self, channel_id: int):
         """Main game loop for a Snake game."""
         if channel_id not in self.active_games:
-            print(f"Game loop started for non-existent game in channel {channel_id}")
+            log.warning("Game loop started for non-existent game", extra={'game': channel_id})
             return
 
+        monitoring.current_game.set(channel_id)
         game_data = self.active_games[channel_id]
         game = game_data['game']
-        ai = game_data['ai']
+        ais = game_data['ais']
         message = game_data['message']  # Keep this for reference even if not directly used
 
         try:
             while not game.game_over and channel_id in self.active_games:
-                # Update AI if in singleplayer mode
-                if ai and 'ai' in game.snakes and game.snakes['ai'].alive:
-                    ai_direction = ai.get_next_move()
-                    game.handle_input('ai', ai_direction)
+                # End games nobody is playing, and games that have run too long
+                end_reason = self._eviction_reason(game_data)
+                if end_reason:
+                    game_data['end_reason'] = end_reason
+                    game.game_over = True
+                    monitoring.GAMES_EVICTED.labels(end_reason).inc()
+                    log.info("Game ended early (%s)", end_reason)
+                    break
+
+                tick_start = time.perf_counter()
+
+                # Queue the turns web clients stamped with this tick
+                if self.live_server:
+                    self.live_server.apply_inputs(channel_id, game)
+
+                # Update AI snakes in singleplayer and arena modes
+                for ai in ais:
+                    if ai.snake_id in game.snakes and game.snakes[ai.snake_id].alive:
+                        with monitoring.phase('ai_decision'):
+                            ai_direction = ai.get_next_move()
+                        if ai.last_search:
+                            monitoring.record_search(ai.last_search)
+                        game.handle_input(ai.snake_id, ai_direction)
 
                 # Update game state
-                game.update()
+                with monitoring.phase('game_update'):
+                    game.update()
+
+                # Send the new state to web clients before the slower embed update
+                if self.live_server:
+                    with monitoring.phase('state_publish'):
+                        self.live_server.publish(channel_id, game)
 
                 # Update the embedded app
                 try:
                     await self.update_embedded_app(channel_id)
                 except discord.errors.Forbidden:
-                    print(f"Permission error updating game in channel {channel_id}")
+                    log.warning("Permission error updating game")
                     # End the game if we can't update it
                     game.game_over = True
                 except discord.errors.NotFound:
-                    print(f"Channel or message not found for game in channel {channel_id}")
+                    log.warning("Channel or message not found for game")
                     # End the game if the channel or message is gone
                     game.game_over = True
                 except Exception as update_error:
-                    print(f"Error updating game: {update_error}")
+                    log.error("Error updating game: %s", update_error)
                     # Continue the game even if we can't update it
 
-                # Sleep to control game speed
-                await asyncio.sleep(1.0 / config.FPS)
+                tick_time = time.perf_counter() - tick_start
+                monitoring.TICK_SECONDS.observe(tick_time)
+                if tick_time > 1.0 / config.FPS:
+                    monitoring.TICK_OVERRUNS.inc()
+
+                # Sleep for the rest of the tick, so the message edit doesn't slow the game down
+                await asyncio.sleep(max(0.0, 1.0 / config.FPS - tick_time))
 
             # Game is over, update one last time
             try:
+                if self.live_server:
+                    self.live_server.publish(channel_id, game)
                 await self.update_embedded_app(channel_id)
             except Exception as final_update_error:
-                print(f"Error in final game update: {final_update_error}")
+                log.error("Error in final game update: %s", final_update_error)
+
+            self.record_results(game_data)
 
             # Wait a bit before cleaning up
             await asyncio.sleep(5)
 
             # Clean up
             if channel_id in self.active_games:
-                del self.active_games[channel_id]
-                print(f"Game in channel {channel_id} ended and cleaned up")
+                await self._remove_game(channel_id)
+                log.info("Game ended and cleaned up")
 
         except Exception as e:
-            print(f"Error in game loop: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error in game loop: %s", e)
 
             # Try to send an error message to the channel
             try:
@@ -232,12 +588,12 @@ class SnakeBot(commands.Bot):
                 if channel:
                     await channel.send(f"An error occurred in the Snake game: {str(e)}")
             except Exception as msg_error:
-                print(f"Failed to send error message: {msg_error}")
+                log.warning("Failed to send error message: %s", msg_error)
 
             # Clean up on error
             if channel_id in self.active_games:
-                del self.active_games[channel_id]
-                print(f"Game in channel {channel_id} ended due to error and cleaned up")
+                await self._remove_game(channel_id)
+                log.info("Game ended due to error and cleaned up")
 
     async def update_embedded_app(self, channel_id: int):
         """Update the embedded app for a game."""
@@ -253,14 +609,22 @@ class SnakeBot(commands.Bot):
             game_state = game.get_state()
 
             # Render the game state to an image for the thumbnail
-            img_str = self.game_renderer.render_game(game_state)
+            renderer = game_data['renderer']
+            with monitoring.phase('render'):
+                image = renderer.render_image(game_state)
+            with monitoring.phase('frame_encode'):
+                image_binary = renderer.encode_png(image)
 
             # Create an embed with the game status
             embed = discord.Embed(title="Snake Game", color=0x00ff00)
 
             # Add game info to the embed
             if game.game_over:
-                if game.winner:
+                if game_data['end_reason'] == 'idle':
+                    embed.description = f"Game Over! No input for {config.GAME_IDLE_TIMEOUT / 60:g} minutes."
+                elif game_data['end_reason'] == 'lifetime':
+                    embed.description = f"Game Over! The {config.GAME_MAX_LIFETIME / 60:g} minute time limit was reached."
+                elif game.winner:
                     embed.description = f"Game Over! Winner: {game.winner}"
                 else:
                     embed.description = "Game Over! It's a draw!"
@@ -273,7 +637,7 @@ class SnakeBot(commands.Bot):
                 )
             else:
                 embed.description = f"Snake game is running in {game.mode.capitalize()} mode"
-                if game.mode == config.SINGLEPLAYER:
+                if game.mode in (config.SINGLEPLAYER, config.ARENA):
                     embed.description += f" (AI: {game.ai_difficulty.capitalize()})"
 
                 embed.add_field(
@@ -282,8 +646,12 @@ class SnakeBot(commands.Bot):
                     inline=False
                 )
 
-            # Add player scores
-            for player_id, snake_data in game_state['snakes'].items():
+            # Add player scores (highest first when there are too many to list)
+            scores = list(game_state['snakes'].items())
+            if len(scores) > config.MAX_SCORE_LINES:
+                scores.sort(key=lambda item: item[1]['score'], reverse=True)
+                scores = scores[:config.MAX_SCORE_LINES]
+            for player_id, snake_data in scores:
                 player_name = player_id
                 if player_id in game_data['players']:
                     player_name = game_data['players'][player_id]
@@ -293,36 +661,41 @@ class SnakeBot(commands.Bot):
                     inline=True
                 )
 
-            # Convert base64 image to file for the thumbnail
             import io
-            import base64
-            image_binary = base64.b64decode(img_str)
-            file = discord.File(io.BytesIO(image_binary), filename="game_thumbnail.png")
 
-            # Set the thumbnail
-            embed.set_thumbnail(url=f"attachment://game_thumbnail.png")
+            # Publish the frame to the web server and point the thumbnail at it,
+            # so the edit carries no upload
+            frame_url = None
+            if self.frame_publisher:
+                with monitoring.phase('frame_publish'):
+                    frame_url = await self.frame_publisher.publish(channel_id, image_binary, game.tick_count)
 
             # We don't need to update the view (button) since it's a link that doesn't change
 
-            # Update the message
-            await message.edit(embed=embed, attachments=[file])
+            with monitoring.phase('message_edit'):
+                if frame_url:
+                    embed.set_thumbnail(url=frame_url)
+                    await message.edit(embed=embed, attachments=[])
+                else:
+                    # Fall back to uploading the image as an attachment
+                    file = discord.File(io.BytesIO(image_binary), filename="game_thumbnail.png")
+                    embed.set_thumbnail(url=f"attachment://game_thumbnail.png")
+                    await message.edit(embed=embed, attachments=[file])
 
         except discord.errors.NotFound:
             # Message was deleted or channel no longer exists
-            print(f"Message or channel not found when updating game in channel {channel_id}")
+            log.warning("Message or channel not found when updating game")
             game.game_over = True  # End the game
             raise  # Re-raise to be handled by the caller
 
         except discord.errors.Forbidden as e:
             # Bot doesn't have permission to edit the message
-            print(f"Permission error updating game in channel {channel_id}: {e}")
+            log.warning("Permission error updating game: %s", e)
             game.game_over = True  # End the game
             raise  # Re-raise to be handled by the caller
 
         except Exception as e:
-            print(f"Error updating embedded app: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error updating embedded app: %s", e)
 
             # Try a simpler update without the image if possible
             try:
@@ -336,6 +709,38 @@ class SnakeBot(commands.Bot):
                 # If even this fails, re-raise the original exception
                 raise
 
+    def record_results(self, game_data: Dict) -> None:
+        """Add the human player's score from a finished game to the leaderboard."""
+        game = game_data['game']
+        snake = game.snakes.get('player')
+        if snake is None:
+            return
+        for user_id, name in game_data['players'].items():
+            self.leaderboard.record(game_data['guild_id'], int(user_id), name, snake.score, game.winner == 'player')
+
+    async def show_leaderboard(self, interaction: discord.Interaction, scope: str):
+        """Show the cached best scores of this server or of every server."""
+        guild_id = interaction.guild_id if scope == "server" else None
+        if scope == "server" and guild_id is None:
+            await interaction.response.send_message(
+                "There's no server leaderboard here. Try `/snek_leaderboard scope:Global`.",
+                ephemeral=True
+            )
+            return
+
+        entries = self.leaderboard.get_top(guild_id)
+        title = "Snake Leaderboard" if guild_id else "Global Snake Leaderboard"
+        embed = discord.Embed(title=title, color=0x00ff00)
+        if entries:
+            embed.description = "\n".join(
+                f"**{rank}.** {discord.utils.escape_markdown(name)} - {score}"
+                for rank, (score, user_id, name) in enumerate(entries, start=1)
+            )
+        else:
+            embed.description = "No scores yet. Use `/snek` to set one!"
+
+        await interaction.response.send_message(embed=embed)
+
     async def show_help(self, interaction: discord.Interaction):
         """Show help for the Snake game."""
         embed = discord.Embed(
@@ -354,7 +759,8 @@ class SnakeBot(commands.Bot):
             name="Game Modes",
             value=(
                 "**Singleplayer**: Play against an AI opponent. You can choose the difficulty level.\n"
-                "**Multiplayer**: Play against another Discord user."
+                "**Multiplayer**: Play against another Discord user.\n"
+                "**Arena**: Survive on a large board against a crowd of AI snakes."
             ),
             inline=False
         )
@@ -384,6 +790,7 @@ class SnakeBot(commands.Bot):
             name="Commands",
             value=(
                 "`/snek` - Start a new Snake game\n"
+                "`/snek_leaderboard` - Show the best scores\n"
                 "`/snek_help` - Show this help message"
             ),
             inline=False
@@ -0,0 +1,152 @@
+"""
+Fan-out of live game state to WebSocket subscribers.
+
+Subscribers are grouped by game. Each tick's message is serialized once and
+framed once as a WebSocket text frame, and the same immutable bytes are handed
+to every subscriber's transport, so a tick costs one encode however many
+people watch, plus a socket write per subscriber. Writes go straight to the
+transport without awaiting, so a broadcast never yields to the event loop
+partway through a group.
+
+A subscriber's transport buffer is its outbound queue, and it is bounded:
+while a subscriber has more than max_buffer bytes still to send, new ticks
+are dropped for it instead of queued. Every message is a complete state, so
+the first tick written once it catches up is a fresh keyframe and the ticks
+it missed are never sent. A subscriber that stays behind for max_lag ticks
+in a row is disconnected.
+"""
+import asyncio
+import logging
+import struct
+import time
+from typing import TYPE_CHECKING, Dict, Hashable, List, Set
+import config
+from metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+BROADCAST_BYTES = REGISTRY.counter('snek_broadcast_bytes', 'Bytes of live state written to subscribers')
+BROADCAST_MESSAGES = REGISTRY.counter('snek_broadcast_messages', 'Live state messages encoded for broadcast')
+BROADCAST_DROPPED = REGISTRY.counter(
+    'snek_broadcast_dropped', 'Ticks not sent to a subscriber because it had too much unsent data'
+)
+BROADCAST_SLOW_DISCONNECTS = REGISTRY.counter(
+    'snek_broadcast_slow_disconnects', 'Subscribers disconnected for falling too far behind'
+)
+BROADCAST_BUFFERED_BYTES = REGISTRY.gauge('snek_broadcast_buffered_bytes', 'Bytes waiting to be sent to subscribers')
+
+def text_frame(payload: bytes) -> bytes:
+    """Frame a payload as a single unmasked WebSocket text frame (RFC 6455), as servers send them."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x81, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x81, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x81, 127, length)
+    return header + payload
+
+class Subscriber:
+    """A WebSocket receiving a game's broadcasts, and how well it's keeping up."""
+    __slots__ = ('ws', 'transport', 'peer', 'connected_at', 'sent', 'dropped', 'lag')
+
+    def __init__(self, ws: 'web.WebSocketResponse', transport: asyncio.Transport):
+        self.ws = ws
+        self.transport = transport
+        peer = transport.get_extra_info('peername')
+        self.peer = f"{peer[0]}:{peer[1]}" if peer else None
+        self.connected_at = time.time()
+        self.sent = 0  # Messages written
+        self.dropped = 0  # Messages skipped because too much was still unsent
+        self.lag = 0  # Messages skipped in a row, so how many ticks behind the subscriber is
+
+    def report(self) -> Dict:
+        """Describe the subscriber's connection."""
+        return {
+            'peer': self.peer,
+            'connected_seconds': round(time.time() - self.connected_at, 1),
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'lag_ticks': self.lag,
+            'buffered_bytes': self.transport.get_write_buffer_size(),
+        }
+
+class BroadcastHub:
+    """Groups of subscribers, keyed by game, that share each encoded message."""
+
+    def __init__(self, max_buffer: int = config.LIVE_CLIENT_BUFFER, max_lag: int = config.LIVE_CLIENT_MAX_LAG):
+        self.max_buffer = max_buffer
+        self.max_lag = max_lag
+        self.groups: Dict[Hashable, Set[Subscriber]] = {}
+        BROADCAST_BUFFERED_BYTES.set_function(self.buffered_bytes)
+
+    def subscribe(self, key: Hashable, ws: 'web.WebSocketResponse', transport: asyncio.Transport) -> Subscriber:
+        """Add a prepared WebSocket to a group. It must not negotiate compression, as frames are sent as-is."""
+        subscriber = Subscriber(ws, transport)
+        self.groups.setdefault(key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, key: Hashable, subscriber: Subscriber) -> None:
+        """Remove a subscriber, dropping its group once empty."""
+        group = self.groups.get(key)
+        if group is None:
+            return
+        group.discard(subscriber)
+        if not group:
+            del self.groups[key]
+
+    def group_size(self, key: Hashable) -> int:
+        """Count the subscribers of a group."""
+        return len(self.groups.get(key, ()))
+
+    def broadcast(self, key: Hashable, payload: bytes) -> int:
+        """Send an encoded message to a group; returns how many subscribers it was written to."""
+        group = self.groups.get(key)
+        if not group:
+            return 0
+        frame = text_frame(payload)
+        sent = dropped = 0
+        for subscriber in group:
+            transport = subscriber.transport
+            if transport.is_closing():
+                continue  # Removed by its connection handler once it notices
+            if transport.get_write_buffer_size() > self.max_buffer:
+                # Skip this tick; the subscriber gets the latest state once it catches up
+                subscriber.dropped += 1
+                subscriber.lag += 1
+                dropped += 1
+                if subscriber.lag >= self.max_lag:
+                    log.warning("Disconnecting live subscriber %s of %s: %d ticks behind",
+                                subscriber.peer, key, subscriber.lag)
+                    BROADCAST_SLOW_DISCONNECTS.inc()
+                    transport.abort()  # Anything still unsent is discarded with the connection
+                continue
+            transport.write(frame)
+            subscriber.sent += 1
+            subscriber.lag = 0
+            sent += 1
+        BROADCAST_MESSAGES.inc()
+        BROADCAST_BYTES.inc(len(frame) * sent)
+        if dropped:
+            BROADCAST_DROPPED.inc(dropped)
+        return sent
+
+    def buffered_bytes(self) -> int:
+        """Total bytes waiting to be sent to all subscribers."""
+        return sum(subscriber.transport.get_write_buffer_size()
+                   for group in self.groups.values() for subscriber in group)
+
+    def report(self) -> Dict:
+        """Describe every subscriber, by group."""
+        return {
+            'max_buffer_bytes': self.max_buffer,
+            'max_lag_ticks': self.max_lag,
+            'groups': {str(key): [subscriber.report() for subscriber in group] for key, group in self.groups.items()},
+        }
+
+    def close_group(self, key: Hashable) -> List[Subscriber]:
+        """Forget a group, returning its subscribers so the caller can close them."""
+        return list(self.groups.pop(key, ()))
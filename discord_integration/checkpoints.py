@@ -0,0 +1,151 @@
+"""
+Checkpoints of active games, so a restarted bot can resume them.
+
+Checkpoints are appended to a single log file. Each record is a fixed header
+(payload length, channel ID, flags) followed by a JSON payload; a later record
+for a channel replaces earlier ones and a record with the deleted flag drops
+the channel. Loading only reads headers and slices out the latest payload of
+each channel, so games can be decoded lazily as they are restored. Once the
+log holds mostly superseded records it is rewritten with just the latest ones.
+"""
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List
+import config
+from game.snake import SnakeGame
+from game.ai import SnakeAI
+
+log = logging.getLogger(__name__)
+
+# Payload length, channel ID, flags
+HEADER = struct.Struct('<IqB')
+FLAG_DELETED = 1
+
+# Rewrite the log once it holds this many superseded records beyond the live ones
+COMPACT_SLACK = 1000
+
+def capture(channel_id: int, game_data: Dict, now: float) -> Dict:
+    """Copy what's needed to resume a game; the copy is safe to encode on another thread."""
+    message = game_data['message']
+    return {
+        'channel': channel_id,
+        'guild_id': game_data['guild_id'],
+        'message_channel_id': message.channel.id if message is not None else None,
+        'message_id': message.id if message is not None else None,
+        'players': dict(game_data['players']),
+        'age': now - game_data['started_at'],
+        'idle': now - game_data['last_input'],
+        'game': game_data['game'].to_snapshot(),
+    }
+
+def restore(record: Dict, now: float) -> Dict:
+    """Rebuild game data from a checkpoint; the caller attaches the renderer, message and task."""
+    game = SnakeGame.from_snapshot(record['game'])
+    ais = [SnakeAI(game, game.ai_difficulty, snake_id) for snake_id in game.snakes if snake_id != 'player']
+    return {
+        'game': game,
+        'ais': ais,
+        'renderer': None,
+        'message': None,
+        'task': None,
+        'players': record['players'],
+        'guild_id': record['guild_id'],
+        # Time spent offline counts towards neither the lifetime nor the idle timeout
+        'started_at': now - record['age'],
+        'last_input': now - record['idle'],
+        'end_reason': None
+    }
+
+class CheckpointStore:
+    """Append-only log of game checkpoints. Writes are meant to run on a single worker thread."""
+
+    def __init__(self, path: str = config.CHECKPOINT_PATH):
+        self.path = path
+        self.latest: Dict[int, bytes] = {}  # channel_id -> latest encoded payload
+        self.records = 0  # Records in the log, including superseded ones
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[int, bytes]:
+        """Read the log and get the latest payload of every live channel, still encoded."""
+        with self._lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return {}
+
+            latest: Dict[int, bytes] = {}
+            records = 0
+            offset = 0
+            while offset + HEADER.size <= len(data):
+                length, channel_id, flags = HEADER.unpack_from(data, offset)
+                end = offset + HEADER.size + length
+                if end > len(data):
+                    break
+                if flags & FLAG_DELETED:
+                    latest.pop(channel_id, None)
+                else:
+                    latest[channel_id] = data[offset + HEADER.size:end]
+                records += 1
+                offset = end
+
+            if offset < len(data):
+                # The bot stopped partway through a write; drop the partial record
+                log.warning("Discarding %d bytes of incomplete checkpoint data", len(data) - offset)
+                with open(self.path, 'r+b') as f:
+                    f.truncate(offset)
+
+            self.latest = latest
+            self.records = records
+            return dict(latest)
+
+    def append(self, checkpoints: Iterable[Dict], deleted: Iterable[int] = ()) -> None:
+        """Append checkpoints and deletions to the log, compacting it when it's mostly stale."""
+        chunks: List[bytes] = []
+        with self._lock:
+            for checkpoint in checkpoints:
+                payload = json.dumps(checkpoint, separators=(',', ':')).encode('utf-8')
+                chunks.append(HEADER.pack(len(payload), checkpoint['channel'], 0))
+                chunks.append(payload)
+                self.latest[checkpoint['channel']] = payload
+                self.records += 1
+            for channel_id in deleted:
+                chunks.append(HEADER.pack(0, channel_id, FLAG_DELETED))
+                self.latest.pop(channel_id, None)
+                self.records += 1
+            if not chunks:
+                return
+
+            if self.records > 2 * len(self.latest) + COMPACT_SLACK:
+                self._compact()
+                return
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(b''.join(chunks))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _compact(self) -> None:
+        """Atomically rewrite the log with only the latest checkpoint of each channel."""
+        start = time.perf_counter()
+        tmp_path = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            for channel_id, payload in self.latest.items():
+                f.write(HEADER.pack(len(payload), channel_id, 0))
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.records = len(self.latest)
+        log.info("Compacted checkpoints to %d games in %.0fms", self.records, (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def decode(payload: bytes) -> Dict:
+        """Decode a payload returned by load()."""
+        return json.loads(payload)
@@ -1,28 +1,51 @@
 import discord
+import aiohttp
 import asyncio
+import logging
 import os
 import socket
 import subprocess
 import sys
-from typing import Dict, Optional, Tuple
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 import config
 from game.snake import Direction, SnakeGame
-from game.renderer import GameRenderer
+
+if TYPE_CHECKING:
+    from game.renderer import GameRenderer
+
+log = logging.getLogger(__name__)
 
 class EmbeddedAppManager:
     """Manages the embedded app for the Snake game."""
 
+    # Every manager in the process, so diagnostics can count running servers
+    _instances = weakref.WeakSet()
+
     def __init__(self):
         self.server_process = None
         self.server_port = 5010
         self.server_url = None
+        self._start_lock = asyncio.Lock()
+        EmbeddedAppManager._instances.add(self)
+
+    @classmethod
+    def running_servers(cls) -> int:
+        """Count the server processes started by any manager that are still running."""
+        return sum(1 for manager in list(cls._instances)
+                   if manager.server_process and manager.server_process.poll() is None)
 
     async def start_server(self) -> bool:
         """Start the web server for the embedded app."""
+        # Games starting at the same time must not each launch a server
+        async with self._start_lock:
+            return await self._start_server()
+
+    async def _start_server(self) -> bool:
         try:
             # Check if the server is already running
             if self.server_process and self.server_process.poll() is None:
-                print("Server is already running")
+                log.debug("Embedded app server is already running")
                 return True
 
             # Find an available port
@@ -32,33 +55,37 @@ class EmbeddedAppManager:
             env = os.environ.copy()
             env['PORT'] = str(self.server_port)
 
-            # Start the server process
-            self.server_process = subprocess.Popen(
-                [sys.executable, 'server.py'],
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
+            # Start the server process, with its output going to a log file: a pipe
+            # nobody reads fills up after a while and then blocks the server
+            os.makedirs(os.path.dirname(config.EMBEDDED_SERVER_LOG) or '.', exist_ok=True)
+            with open(config.EMBEDDED_SERVER_LOG, 'ab') as output:
+                output_start = output.tell()
+                self.server_process = subprocess.Popen(
+                    [sys.executable, 'server.py'],
+                    env=env,
+                    stdout=output,
+                    stderr=subprocess.STDOUT
+                )
 
             # Wait a bit for the server to start
             await asyncio.sleep(2)
 
             # Check if the server started successfully
             if self.server_process.poll() is not None:
-                # Server failed to start
-                stdout, stderr = self.server_process.communicate()
-                print(f"Server failed to start: {stderr.decode('utf-8')}")
+                # Server failed to start; report the end of what it wrote
+                with open(config.EMBEDDED_SERVER_LOG, 'rb') as f:
+                    f.seek(output_start)
+                    output = f.read()[-4000:]
+                log.error("Embedded app server failed to start: %s", output.decode('utf-8', 'replace'))
                 return False
 
             # Set the server URL
             self.server_url = f"http://localhost:{self.server_port}"
-            print(f"Server started at {self.server_url}")
+            log.info("Embedded app server started at %s (output in %s)", self.server_url, config.EMBEDDED_SERVER_LOG)
             return True
 
         except Exception as e:
-            print(f"Error starting server: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error starting embedded app server: %s", e)
             return False
 
     def stop_server(self):
@@ -67,12 +94,12 @@ class EmbeddedAppManager:
             try:
                 self.server_process.terminate()
                 self.server_process.wait(timeout=5)
-                print("Server stopped")
+                log.info("Embedded app server stopped")
             except subprocess.TimeoutExpired:
                 self.server_process.kill()
-                print("Server killed")
+                log.warning("Embedded app server killed after not stopping in time")
             except Exception as e:
-                print(f"Error stopping server: {e}")
+                log.error("Error stopping embedded app server: %s", e)
 
             self.server_process = None
 
@@ -82,13 +109,76 @@ class EmbeddedAppManager:
             s.bind(('', 0))
             return s.getsockname()[1]
 
-async def create_embedded_app(interaction: discord.Interaction, game: SnakeGame, renderer: GameRenderer) -> discord.Message:
+# One embedded app server is shared by every game and stopped when the bot closes
+app_manager = EmbeddedAppManager()
+
+class FramePublisher:
+    """Publishes rendered frames to the web server so embeds can reference them by URL."""
+
+    def __init__(self, server_url: Optional[str] = config.FRAME_SERVER_URL, public_url: str = config.EMBEDDED_APP_URL,
+                 manager: EmbeddedAppManager = app_manager):
+        self._server_url = server_url.rstrip('/') if server_url else None
+        self.public_url = public_url.rstrip('/')
+        self.manager = manager
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def server_url(self) -> Optional[str]:
+        """Where frames are uploaded: FRAME_SERVER_URL, or else the server the manager started, on whatever port it got."""
+        return self._server_url or self.manager.server_url
+
+    async def publish(self, game_id: int, image_binary: bytes, version: int) -> Optional[str]:
+        """Upload a frame and return its cache-busting public URL, or None if publishing failed."""
+        if self.server_url is None:
+            return None  # The embedded app server hasn't started yet
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2))
+
+        headers = {'Content-Type': 'image/png'}
+        if config.FRAME_PUSH_TOKEN:
+            headers['Authorization'] = f"Bearer {config.FRAME_PUSH_TOKEN}"
+
+        try:
+            async with self.session.put(
+                f"{self.server_url}/api/games/{game_id}/frame.png",
+                params={'v': str(version)},
+                data=image_binary,
+                headers=headers
+            ) as response:
+                if response.status != 204:
+                    log.warning("Frame server rejected frame: HTTP %s", response.status, extra={'game': game_id})
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning("Failed to publish frame: %s", e, extra={'game': game_id})
+            return None
+
+        return f"{self.public_url}/api/games/{game_id}/frame.png?v={version}"
+
+    async def discard(self, game_id: int) -> None:
+        """Remove a finished game's frame from the web server."""
+        if self.session is None or self.session.closed or self.server_url is None:
+            return
+
+        headers = {}
+        if config.FRAME_PUSH_TOKEN:
+            headers['Authorization'] = f"Bearer {config.FRAME_PUSH_TOKEN}"
+
+        try:
+            async with self.session.delete(f"{self.server_url}/api/games/{game_id}/frame.png", headers=headers):
+                pass
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning("Failed to discard frame: %s", e, extra={'game': game_id})
+
+    async def close(self):
+        """Close the HTTP session."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+async def create_embedded_app(interaction: discord.Interaction, game: SnakeGame, renderer: 'GameRenderer') -> discord.Message:
     """Create and send the embedded app for a Snake game."""
     try:
-        # Create an instance of the embedded app manager
-        app_manager = EmbeddedAppManager()
-
-        # Start the server
+        # Start the server if it isn't already running
         server_started = await app_manager.start_server()
         if not server_started:
             raise Exception("Failed to start the embedded app server")
@@ -111,7 +201,7 @@ async def create_embedded_app(interaction: discord.Interaction, game: SnakeGame,
         )
 
         # Add game info to the embed
-        if game.mode == config.SINGLEPLAYER:
+        if game.mode in (config.SINGLEPLAYER, config.ARENA):
             embed.description += f" (AI: {game.ai_difficulty.capitalize()})"
 
         # Set the thumbnail
@@ -148,14 +238,14 @@ async def create_embedded_app(interaction: discord.Interaction, game: SnakeGame,
             message = await interaction.followup.send(embed=embed, file=file, view=activity)
             return message
         except Exception as followup_error:
-            print(f"Failed to send using followup: {followup_error}")
+            log.warning("Failed to send using followup: %s", followup_error)
 
             # Fall back to channel.send if followup fails
             message = await interaction.channel.send(embed=embed, file=file, view=activity)
             return message
 
     except discord.errors.Forbidden as e:
-        print(f"Permission error creating embedded app: {e}")
+        log.warning("Permission error creating embedded app: %s", e)
 
         # Try to send a simple error message
         try:
@@ -171,9 +261,7 @@ async def create_embedded_app(interaction: discord.Interaction, game: SnakeGame,
         raise discord.errors.Forbidden(e.response, e.text) from e
 
     except Exception as e:
-        print(f"Error creating embedded app: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error creating embedded app: %s", e)
 
         # Try to send a simple error message
         try:
@@ -183,7 +271,7 @@ async def create_embedded_app(interaction: discord.Interaction, game: SnakeGame,
             else:
                 await interaction.followup.send(error_message, ephemeral=True)
         except Exception as msg_error:
-            print(f"Failed to send error message: {msg_error}")
+            log.warning("Failed to send error message: %s", msg_error)
 
         # Re-raise the exception to be handled by the caller
         raise Exception(f"Failed to create embedded app: {str(e)}") from e
@@ -0,0 +1,194 @@
+"""
+Persistent leaderboard of players' best scores.
+
+Results are queued in memory when games end and written to SQLite (in WAL
+mode) in batches by a single worker thread, so recording a result never
+waits on the database. The top players of every server and of all servers
+combined are loaded into memory at startup and kept current as results come
+in; the leaderboard command only reads from that cache.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import config
+
+log = logging.getLogger(__name__)
+
+# Scope of the leaderboard across every server; guild IDs are never 0
+GLOBAL = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS best_scores (
+    scope INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    best_score INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    best_at REAL NOT NULL,
+    PRIMARY KEY (scope, user_id)
+);
+CREATE INDEX IF NOT EXISTS best_scores_rank ON best_scores (scope, best_score DESC);
+"""
+
+# best_at is when the best score was first reached, so a tie ranks whoever got there first higher;
+# it only moves when the best score goes up (SET expressions all see the row as it was)
+UPSERT = """
+INSERT INTO best_scores (scope, user_id, name, best_score, games, wins, updated_at, best_at)
+VALUES (?1, ?2, ?3, ?4, 1, ?5, ?6, ?6)
+ON CONFLICT (scope, user_id) DO UPDATE SET
+    name = excluded.name,
+    best_score = MAX(best_score, excluded.best_score),
+    games = games + 1,
+    wins = wins + excluded.wins,
+    updated_at = excluded.updated_at,
+    best_at = CASE WHEN excluded.best_score > best_score THEN excluded.best_at ELSE best_at END
+"""
+
+TOP_PER_SCOPE = """
+SELECT scope, user_id, name, best_score FROM (
+    SELECT scope, user_id, name, best_score,
+           ROW_NUMBER() OVER (PARTITION BY scope ORDER BY best_score DESC, best_at) AS rank
+    FROM best_scores
+) WHERE rank <= ? ORDER BY scope, rank
+"""
+
+# Failed writes in a row after which the queued results are dropped, so a broken database can't fill memory
+MAX_FLUSH_RETRIES = 5
+
+# A leaderboard entry: (best score, user ID, display name)
+Entry = Tuple[int, int, str]
+
+class Leaderboard:
+    """Best scores per server and overall, cached in memory and written behind to SQLite."""
+
+    def __init__(self, path: str = config.LEADERBOARD_PATH, size: int = config.LEADERBOARD_SIZE,
+                 flush_interval: float = config.LEADERBOARD_FLUSH_INTERVAL, max_batch: int = 1000):
+        self.path = path
+        self.size = size
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.top: Dict[int, List[Entry]] = {}  # scope -> entries, best first
+        self.pending: List[Tuple] = []
+        self.failed_flushes = 0  # Writes that have failed in a row
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='leaderboard')
+        self.connection: Optional[sqlite3.Connection] = None  # Only used on the worker thread
+        self.task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+
+    async def start(self) -> None:
+        """Open the database, load the cached top scores and start writing results behind."""
+        start = time.perf_counter()
+        rows = await asyncio.get_running_loop().run_in_executor(self.executor, self._load)
+        for scope, user_id, name, best_score in rows:
+            self.top.setdefault(scope, []).append((best_score, user_id, name))
+        for entries in self.top.values():
+            entries.sort(key=lambda entry: -entry[0])
+        log.info("Loaded leaderboard for %d scope(s) in %.0fms", len(self.top), (time.perf_counter() - start) * 1000)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write any queued results and close the database."""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._close)
+        self.executor.shutdown(wait=False)
+
+    def record(self, guild_id: Optional[int], user_id: int, name: str, score: int, won: bool) -> None:
+        """Queue a game result and update the cached top scores; never touches the database."""
+        now = time.time()
+        for scope in (GLOBAL, guild_id) if guild_id else (GLOBAL,):
+            self.pending.append((scope, user_id, name, score, int(won), now))
+            self._update_top(scope, user_id, name, score)
+        if len(self.pending) >= self.max_batch:
+            self._flush_now.set()
+
+    def get_top(self, guild_id: Optional[int] = None) -> List[Entry]:
+        """Get the cached top scores of a server, or of every server when guild_id is None."""
+        return list(self.top.get(guild_id or GLOBAL, ()))
+
+    def _update_top(self, scope: int, user_id: int, name: str, score: int) -> None:
+        """
+        Fold a result into a scope's cached top scores. Best scores never go down,
+        so a player outside the top can only enter it with the score just recorded.
+        """
+        entries = self.top.setdefault(scope, [])
+        for i, (best_score, entry_user, _) in enumerate(entries):
+            if entry_user == user_id:
+                if score <= best_score:
+                    entries[i] = (best_score, user_id, name)
+                    return
+                del entries[i]
+                break
+        else:
+            if len(entries) >= self.size and score <= entries[-1][0]:
+                return
+
+        # Insert after equal scores, so earlier results keep their rank
+        i = len(entries)
+        while i > 0 and entries[i - 1][0] < score:
+            i -= 1
+        entries.insert(i, (score, user_id, name))
+        del entries[self.size:]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write queued results to the database in one transaction, keeping them queued if it fails."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._write, batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            if self.failed_flushes >= MAX_FLUSH_RETRIES:
+                self.failed_flushes = 0
+                log.error("Dropping %d leaderboard result(s) after %d failed writes: %s",
+                          len(batch), MAX_FLUSH_RETRIES, e)
+                return
+            # The transaction was rolled back, so retry the whole batch next time, ahead of newer results
+            self.pending[:0] = batch
+            log.error("Error writing %d leaderboard result(s), will retry: %s", len(batch), e)
+            return
+        self.failed_flushes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')  # Durable at checkpoints; safe with WAL
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def _load(self) -> List[Tuple]:
+        return self._connect().execute(TOP_PER_SCOPE, (self.size,)).fetchall()
+
+    def _write(self, batch: List[Tuple]) -> None:
+        connection = self._connect()
+        with connection:
+            connection.executemany(UPSERT, batch)
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,284 @@
+"""
+Live game state for the web client.
+
+Each game has a WebSocket at /games/{channel_id}/live. A client first gets a
+hello with the engine settings its prediction depends on (how many turns a
+snake queues ahead), then after every tick the bot sends the game's state, along with each player's queued turns and the
+sequence number of the last input the state already includes. Players send
+their turns stamped with the tick they should take effect on: the web client
+predicts its own snake a round trip ahead of the server (see web/live.js), so
+turns arrive before their tick and are applied on exactly that tick, which is
+what the client predicted. A turn that arrives late is applied on the next
+tick, and the client corrects itself from the following state.
+
+States are sent through a BroadcastHub, which encodes each tick once for all
+of a game's viewers.
+
+On boards too large to send whole, each client gets a viewport instead: the
+cells within LIVE_VIEW_RADIUS of the snake it follows (its own, or the
+player's for spectators), cut out with a spatial index over the tick's
+segments and food, plus an optional coarse minimap of the whole board. What
+a client receives then depends on the viewport's size, not the board's.
+Clients that follow the same snake at the same radius share one encoded
+message.
+
+Only a game's players steer its snake, and a player proves who they are with
+the token the bot gave them when the game started: an HMAC of the channel
+and user IDs under LIVE_TOKEN_SECRET. A client without a valid token for the
+user it names is a spectator.
+"""
+import asyncio
+import heapq
+import hashlib
+import hmac
+import importlib
+import json
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+import config
+from metrics import REGISTRY
+from game.snake import SnakeGame, Direction
+from game.viewport import BoardIndex, render_minimap
+from discord_integration.broadcast import BroadcastHub
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+LIVE_CLIENTS = REGISTRY.gauge('snek_live_clients', 'Web clients connected to live game state')
+LIVE_INPUTS = REGISTRY.counter(
+    'snek_live_inputs', 'Turns received from web clients, by whether they arrived before their tick', ('timing',)
+)
+
+# Furthest ahead of the game a turn may be stamped, and turns held per game, so clients can't hoard memory
+MAX_INPUT_LEAD = 50
+MAX_SCHEDULED_INPUTS = 64
+# Largest viewport radius a client may ask for
+MAX_VIEW_RADIUS = 32
+
+def live_token(channel_id: int, user_id: str) -> str:
+    """The token that lets a user steer their snake in a game."""
+    message = f"{channel_id}:{user_id}".encode('utf-8')
+    return hmac.new(config.LIVE_TOKEN_SECRET.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+def verify_live_token(channel_id: int, user_id: Optional[str], token: Optional[str]) -> bool:
+    """Check a token a client sent against the one issued for its user."""
+    if not user_id or not token:
+        return False
+    return hmac.compare_digest(live_token(channel_id, user_id), token)
+
+# A client's view: None for the whole board, else (followed snake_id, radius, whether it gets a minimap)
+View = Optional[Tuple[str, int, bool]]
+
+class LiveChannel:
+    """The turns players of one game have sent for upcoming ticks, and the views its clients watch."""
+    __slots__ = ('inputs', 'acks', 'views')
+
+    def __init__(self):
+        self.inputs: List[Tuple[int, int, str, Direction]] = []  # Heap of (tick, seq, snake_id, direction)
+        self.acks: Dict[str, int] = {}  # snake_id -> seq of the last turn passed to the game
+        self.views: Set[View] = set()  # Views with at least one subscriber
+
+def encode_state(game: SnakeGame, acks: Dict[str, int]) -> Dict:
+    """Build the state message sent after a tick."""
+    return {
+        'type': 'state',
+        'game': game.to_snapshot(),
+        'pending': {
+            snake_id: [direction.name for direction in snake.pending_directions]
+            for snake_id, snake in game.snakes.items() if snake.pending_directions
+        },
+        'acks': acks,
+    }
+
+def encode_view(game: SnakeGame, acks: Dict[str, int], index: BoardIndex, view: View,
+                minimap: Optional[str] = None) -> Dict:
+    """Build the state message for a viewport, in the same shape as encode_state() plus the view."""
+    follow, radius, _ = view
+    state, window = index.viewport(follow, radius)
+    message = {
+        'type': 'state',
+        'game': state,
+        'view': window,
+        'pending': {},
+        'acks': acks,
+    }
+    for snake_id, *_ in state['snakes']:
+        snake = game.snakes[snake_id]
+        if snake.pending_directions:
+            message['pending'][snake_id] = [direction.name for direction in snake.pending_directions]
+    if minimap is not None:
+        message['minimap'] = {'size': config.LIVE_MINIMAP_SIZE, 'cells': minimap}
+    return message
+
+def choose_view(game: SnakeGame, follow: str, radius: int, minimap: bool) -> View:
+    """Get the view for a client, or None when the viewport would cover the whole board anyway."""
+    radius = max(0, min(radius, MAX_VIEW_RADIUS))
+    if radius == 0 or 2 * radius + 1 >= game.grid_size:
+        return None
+    return (follow, radius, minimap and 0 < config.LIVE_MINIMAP_SIZE < game.grid_size)
+
+class LiveServer:
+    """Serves live game state to web clients and schedules their turns."""
+
+    def __init__(self, games: Dict[int, Dict], on_input: Callable[[int, str, Direction], None],
+                 host: str = config.LIVE_STATE_HOST, port: int = config.LIVE_STATE_PORT):
+        self.games = games  # channel_id -> game data, as kept by the bot
+        self.on_input = on_input
+        self.host = host
+        self.port = port
+        self.channels: Dict[int, LiveChannel] = {}
+        self.hub = BroadcastHub()
+        self.runner: Optional['web.AppRunner'] = None
+
+    async def start(self) -> bool:
+        """Start serving live game state."""
+        # Imported on a worker thread for the same reason as the metrics server
+        web = await asyncio.get_running_loop().run_in_executor(None, importlib.import_module, 'aiohttp.web')
+        app = web.Application()
+        app.router.add_get('/games/{channel_id}/live', self.handle_live)
+        self.runner = web.AppRunner(app, access_log=None)
+        try:
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, self.host, self.port)
+            await site.start()
+        except OSError as e:
+            log.warning("Failed to start live state server on %s:%s: %s", self.host, self.port, e)
+            await self.runner.cleanup()
+            self.runner = None
+            return False
+
+        log.info("Live game state available at ws://%s:%s/games/<channel_id>/live", self.host, self.port)
+        return True
+
+    async def stop(self) -> None:
+        """Disconnect every client and stop serving."""
+        for channel_id in list(self.channels):
+            await self.discard(channel_id)
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_live(self, request: 'web.Request') -> 'web.WebSocketResponse':
+        from aiohttp import web, WSMsgType
+        try:
+            channel_id = int(request.match_info['channel_id'])
+        except ValueError:
+            raise web.HTTPNotFound()
+        game_data = self.games.get(channel_id)
+        if game_data is None:
+            raise web.HTTPNotFound()
+
+        # Only the game's own players, with the token the bot gave them, steer a snake; anyone else just watches
+        user_id = request.query.get('user')
+        is_player = user_id in game_data['players'] and verify_live_token(channel_id, user_id, request.query.get('token'))
+        snake_id = 'player' if is_player else None
+
+        # Players see around their own snake; spectators pick a snake to follow
+        game = game_data['game']
+        follow = snake_id or request.query.get('follow', 'player')
+        if follow not in game.snakes:
+            follow = 'player'
+        try:
+            radius = int(request.query.get('view', config.LIVE_VIEW_RADIUS))
+        except ValueError:
+            radius = config.LIVE_VIEW_RADIUS
+        view = choose_view(game, follow, radius, request.query.get('minimap', '1') != '0')
+
+        # Broadcast frames are written uncompressed, so don't negotiate compression
+        ws = web.WebSocketResponse(heartbeat=30, compress=False)
+        await ws.prepare(request)
+        # Clients queue turns the way the engine does, so they need its settings before the first state
+        await ws.send_json({'type': 'hello', 'inputLookahead': config.INPUT_LOOKAHEAD})
+        channel = self.channels.setdefault(channel_id, LiveChannel())
+        key = (channel_id, view)
+        subscriber = self.hub.subscribe(key, ws, request.transport)
+        channel.views.add(view)
+        LIVE_CLIENTS.inc()
+        try:
+            await ws.send_str(self.encode(game, channel, view))
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    message = json.loads(msg.data)
+                    if message['type'] == 'ping':
+                        await ws.send_json({'type': 'pong', 'time': message['time']})
+                    elif message['type'] == 'input' and snake_id is not None:
+                        self.schedule_input(channel_id, snake_id, int(message['seq']), int(message['tick']),
+                                            Direction[message['direction']])
+                except (ValueError, KeyError, TypeError):
+                    continue  # Ignore malformed messages
+        finally:
+            self.hub.unsubscribe(key, subscriber)
+            if not self.hub.group_size(key):
+                channel.views.discard(view)
+            LIVE_CLIENTS.dec()
+        return ws
+
+    def viewers(self, channel_id: int) -> int:
+        """Count the clients watching a game, whatever their view."""
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            return 0
+        return sum(self.hub.group_size((channel_id, view)) for view in channel.views)
+
+    def encode(self, game: SnakeGame, channel: LiveChannel, view: View,
+               index: Optional[BoardIndex] = None, minimap: Optional[str] = None) -> str:
+        """Serialize a game's state for one view."""
+        if view is None:
+            message = encode_state(game, channel.acks)
+        else:
+            if view[2] and minimap is None:
+                minimap = render_minimap(game, config.LIVE_MINIMAP_SIZE)
+            message = encode_view(game, channel.acks, index or BoardIndex(game), view, minimap if view[2] else None)
+        return json.dumps(message, separators=(',', ':'))
+
+    def schedule_input(self, channel_id: int, snake_id: str, seq: int, tick: int, direction: Direction) -> None:
+        """Hold a turn until the tick it's stamped with; late turns apply on the next tick."""
+        game_data = self.games.get(channel_id)
+        channel = self.channels.get(channel_id)
+        if game_data is None or channel is None or seq <= channel.acks.get(snake_id, 0):
+            return
+        current_tick = game_data['game'].tick_count
+        if tick > current_tick + MAX_INPUT_LEAD or len(channel.inputs) >= MAX_SCHEDULED_INPUTS:
+            return
+        LIVE_INPUTS.labels('on_time' if tick > current_tick else 'late').inc()
+        heapq.heappush(channel.inputs, (max(tick, current_tick + 1), seq, snake_id, direction))
+
+    def apply_inputs(self, channel_id: int, game: SnakeGame) -> None:
+        """Pass the turns due on the tick about to run to the game; call just before game.update()."""
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            return
+        inputs = channel.inputs
+        next_tick = game.tick_count + 1
+        while inputs and inputs[0][0] <= next_tick:
+            _, seq, snake_id, direction = heapq.heappop(inputs)
+            self.on_input(channel_id, snake_id, direction)
+            channel.acks[snake_id] = max(seq, channel.acks.get(snake_id, 0))
+
+    def publish(self, channel_id: int, game: SnakeGame) -> None:
+        """Send a game's state to everyone watching it, encoded once for each view."""
+        channel = self.channels.get(channel_id)
+        if channel is None or not channel.views:
+            return
+        # The segment index and minimap are built once per tick and shared by every viewport
+        index = minimap = None
+        if any(view is not None for view in channel.views):
+            index = BoardIndex(game)
+            if any(view is not None and view[2] for view in channel.views):
+                minimap = render_minimap(game, config.LIVE_MINIMAP_SIZE)
+        for view in channel.views:
+            payload = self.encode(game, channel, view, index, minimap).encode('utf-8')
+            self.hub.broadcast((channel_id, view), payload)
+
+    async def discard(self, channel_id: int) -> None:
+        """Disconnect a finished game's clients and drop its scheduled turns."""
+        channel = self.channels.pop(channel_id, None)
+        if channel is None:
+            return
+        for view in list(channel.views):
+            for subscriber in self.hub.close_group((channel_id, view)):
+                await subscriber.ws.close()
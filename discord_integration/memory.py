@@ -0,0 +1,266 @@
+"""
+Opt-in memory diagnostics for the bot.
+
+Periodically estimates how many bytes each active game holds, tracks process
+memory over time to show growth trends, and, with tracemalloc, reports which
+source lines allocate the most memory during each tick phase and which have
+grown the most since the bot started.
+"""
+import asyncio
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import types
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+import discord
+from discord.state import ConnectionState
+import config
+from metrics import REGISTRY
+from game.bitboard import Bitboard
+from game.hamiltonian import HamiltonianCycle
+from discord_integration import monitoring
+from discord_integration.embedded_app import EmbeddedAppManager
+
+if TYPE_CHECKING:
+    from game.renderer import GameRenderer
+
+log = logging.getLogger(__name__)
+
+GAME_MEMORY_BYTES = REGISTRY.gauge('snek_game_memory_bytes', 'Approximate bytes held by all active games')
+GAME_MEMORY_AVERAGE_BYTES = REGISTRY.gauge('snek_game_memory_average_bytes', 'Approximate bytes held per active game')
+PROCESS_RESIDENT_BYTES = REGISTRY.gauge('snek_process_resident_bytes', 'Resident memory of the bot process')
+TRACED_MEMORY_BYTES = REGISTRY.gauge('snek_traced_memory_bytes', 'Memory currently traced by tracemalloc')
+EMBEDDED_SERVERS = REGISTRY.gauge('snek_embedded_servers', 'Embedded app server processes still running')
+
+# Objects shared between games (or with the whole bot) are not charged to any game
+_SHARED_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    discord.Client, ConnectionState, asyncio.AbstractEventLoop, Bitboard, HamiltonianCycle,
+)
+
+# Phases that never await, so allocations during them belong to the phase alone
+SYNC_PHASES = ('ai_decision', 'game_update', 'render', 'frame_encode')
+
+def deep_sizeof(obj, seen: Set[int]) -> int:
+    """Approximate the bytes reachable from an object, skipping shared objects and anything already seen."""
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        stack.extend(gc.get_referents(current))
+    return total
+
+def resident_memory() -> int:
+    """Get the process's resident memory in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak rather than current usage, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    """Drop allocations made by tracemalloc, these diagnostics and the import machinery."""
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+
+def _format_stats(stats: Iterable[tracemalloc.StatisticDiff], limit: int) -> List[Dict]:
+    """Summarize tracemalloc statistics by allocation site."""
+    sites = []
+    for stat in stats:
+        if len(sites) >= limit:
+            break
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        sites.append({
+            'site': f"{frame.filename}:{frame.lineno}",
+            'size_diff': stat.size_diff,
+            'count_diff': stat.count_diff,
+            'size': stat.size,
+        })
+    return sites
+
+class MemoryDiagnostics:
+    """Samples per-game memory and process memory, and attributes allocations to tick phases."""
+
+    def __init__(self, bot: discord.Client, interval: float = config.MEMORY_SAMPLE_INTERVAL,
+                 trace_frames: int = config.TRACEMALLOC_FRAMES, top: int = 10):
+        self.bot = bot
+        self.interval = interval
+        self.trace_frames = trace_frames
+        self.top = top
+        self.history: deque = deque(maxlen=120)
+        self.games: Dict[int, Dict] = {}
+        self.phase_growth: Dict[str, Dict] = {name: {'calls': 0, 'net_bytes': 0} for name in SYNC_PHASES}
+        self.phase_sites: Dict[str, List[Dict]] = {}
+        self.growth_sites: List[Dict] = []
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_due: Set[str] = set()
+        self._phase_snapshots: Dict[str, tuple] = {}
+        self.task: Optional[asyncio.Task] = None
+        EMBEDDED_SERVERS.set_function(EmbeddedAppManager.running_servers)
+
+    def start(self) -> None:
+        """Start tracing allocations and sampling memory."""
+        if self.trace_frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        if tracemalloc.is_tracing():
+            self.baseline = tracemalloc.take_snapshot()
+        monitoring.memory_hook = self
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling and tracing."""
+        monitoring.memory_hook = None
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                log.exception("Error sampling memory: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def phase_started(self, name: str):
+        """Note traced memory before a phase, with a snapshot when one of this phase is due for diffing."""
+        if name not in self.phase_growth or not tracemalloc.is_tracing():
+            return None
+        snapshot = None
+        if name in self._snapshot_due:
+            self._snapshot_due.discard(name)
+            snapshot = tracemalloc.take_snapshot()
+        return tracemalloc.get_traced_memory()[0], snapshot
+
+    def phase_finished(self, name: str, before) -> None:
+        """Attribute the memory a phase left allocated to it."""
+        if before is None or not tracemalloc.is_tracing():
+            return
+        traced, snapshot = before
+        growth = self.phase_growth[name]
+        growth['calls'] += 1
+        growth['net_bytes'] += tracemalloc.get_traced_memory()[0] - traced
+        if snapshot is not None:
+            # Raw snapshots are cheap to take; they are filtered and diffed off the event loop
+            self._phase_snapshots[name] = (snapshot, tracemalloc.take_snapshot())
+
+    def measure_games(self, active_games: Iterable, renderer: Optional['GameRenderer'] = None) -> Dict[int, Dict]:
+        """Estimate the bytes held by each game, by component, not charging any of them for the shared renderer."""
+        shared = {id(self.bot), id(self.bot.active_games), id(renderer)}
+        games = {}
+        for channel_id, game_data in active_games:
+            # Each game's components share one seen set, so objects are charged once
+            seen = set(shared)
+            seen.add(id(game_data))
+            components = {key: deep_sizeof(value, seen) for key, value in list(game_data.items())}
+            games[channel_id] = {
+                'bytes': sum(components.values()) + sys.getsizeof(game_data),
+                'components': components,
+                'mode': game_data['game'].mode,
+                'tick': game_data['game'].tick_count,
+            }
+        return games
+
+    def _analyze(self, active_games: List, renderer: Optional['GameRenderer'], snapshot: Optional[tracemalloc.Snapshot],
+                 phase_snapshots: Dict):
+        """Measure games and diff snapshots; runs in a worker thread so the event loop keeps ticking."""
+        games = self.measure_games(active_games, renderer)
+        growth_sites = self.growth_sites
+        if snapshot is not None and self.baseline is not None:
+            growth_sites = _format_stats(_filtered(snapshot).compare_to(_filtered(self.baseline), 'lineno'), self.top)
+        phase_sites = {
+            name: _format_stats(_filtered(after).compare_to(_filtered(before), 'lineno'), self.top)
+            for name, (before, after) in phase_snapshots.items()
+        }
+        return games, growth_sites, phase_sites
+
+    async def sample(self) -> None:
+        """Measure games and process memory, and refresh the allocation site reports."""
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        phase_snapshots, self._phase_snapshots = self._phase_snapshots, {}
+        # Read here rather than through the lazy game_renderer property, which would create one on the worker thread
+        renderer = self.bot._game_renderer
+        games, self.growth_sites, phase_sites = await asyncio.get_running_loop().run_in_executor(
+            None, self._analyze, list(self.bot.active_games.items()), renderer, snapshot, phase_snapshots
+        )
+        self.games = games
+        self.phase_sites.update(phase_sites)
+
+        total = sum(game['bytes'] for game in games.values())
+        average = total / len(games) if games else 0.0
+        resident = resident_memory()
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+        GAME_MEMORY_BYTES.set(total)
+        GAME_MEMORY_AVERAGE_BYTES.set(average)
+        PROCESS_RESIDENT_BYTES.set(resident)
+        TRACED_MEMORY_BYTES.set(traced)
+        self.history.append({
+            'time': time.time(),
+            'games': len(games),
+            'game_bytes': total,
+            'resident_bytes': resident,
+            'traced_bytes': traced,
+        })
+
+        if tracemalloc.is_tracing():
+            # Diff one call of each phase before the next sample
+            self._snapshot_due = set(SYNC_PHASES)
+
+    def _trend(self, key: str) -> float:
+        """Least-squares slope of a history series, in bytes per minute."""
+        if len(self.history) < 2:
+            return 0.0
+        times = [entry['time'] for entry in self.history]
+        values = [entry[key] for entry in self.history]
+        mean_time = sum(times) / len(times)
+        mean_value = sum(values) / len(values)
+        variance = sum((t - mean_time) ** 2 for t in times)
+        if not variance:
+            return 0.0
+        covariance = sum((t - mean_time) * (v - mean_value) for t, v in zip(times, values))
+        return covariance / variance * 60
+
+    def report(self) -> Dict:
+        """Summarize memory per game, growth trends and top allocation sites."""
+        latest = self.history[-1] if self.history else {}
+        return {
+            'tracing': tracemalloc.is_tracing(),
+            'games': {str(channel_id): game for channel_id, game in self.games.items()},
+            'game_bytes': latest.get('game_bytes', 0),
+            'game_average_bytes': GAME_MEMORY_AVERAGE_BYTES.value,
+            'resident_bytes': latest.get('resident_bytes', 0),
+            'traced_bytes': latest.get('traced_bytes', 0),
+            'embedded_servers': EmbeddedAppManager.running_servers(),
+            'trend_bytes_per_minute': {
+                'resident': self._trend('resident_bytes'),
+                'traced': self._trend('traced_bytes'),
+                'games': self._trend('game_bytes'),
+            },
+            'phases': self.phase_growth,
+            'phase_allocation_sites': self.phase_sites,
+            'growth_since_start': self.growth_sites,
+            'history': list(self.history),
+        }
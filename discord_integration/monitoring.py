@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import importlib
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional
+import config
+from metrics import REGISTRY, CONTENT_TYPE
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+# Per-tick phase timings
+TICK_PHASE_SECONDS = REGISTRY.histogram(
+    'snek_tick_phase_seconds', 'Time spent in each phase of a game tick', ('phase',)
+)
+TICK_SECONDS = REGISTRY.histogram('snek_tick_seconds', 'Time spent working on a game tick, excluding the sleep')
+TICK_OVERRUNS = REGISTRY.counter('snek_tick_overruns', 'Ticks whose work took longer than the tick interval')
+
+# Tick phases, with children resolved once so the game loop skips the label lookup
+PHASES = ('ai_decision', 'game_update', 'state_publish', 'render', 'frame_encode', 'frame_publish', 'message_edit')
+_phase_histograms = {name: TICK_PHASE_SECONDS.labels(name) for name in PHASES}
+
+# Master AI search
+AI_SEARCH_DEPTH = REGISTRY.histogram(
+    'snek_ai_search_depth', 'Ticks ahead the master AI finished searching per move', buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24)
+)
+AI_SEARCH_NODES = REGISTRY.counter('snek_ai_search_nodes', 'Positions searched by the master AI')
+AI_SEARCH_SECONDS = REGISTRY.counter('snek_ai_search_seconds', 'Time the master AI spent searching')
+
+ACTIVE_GAMES = REGISTRY.gauge('snek_active_games', 'Games currently running')
+GAMES_REJECTED = REGISTRY.counter('snek_games_rejected', 'Games refused because a capacity limit was reached', ('limit',))
+GAMES_EVICTED = REGISTRY.counter('snek_games_evicted', 'Games ended early for being idle or running too long', ('reason',))
+DISCORD_RATE_LIMITS = REGISTRY.counter('snek_discord_rate_limits', 'HTTP 429 responses received from Discord')
+DISCORD_RATE_LIMIT_WAIT = REGISTRY.counter(
+    'snek_discord_rate_limit_wait_seconds', 'Time spent waiting out Discord 429 responses'
+)
+
+# Event loop health
+LOOP_LAG_SECONDS = REGISTRY.histogram('snek_loop_lag_seconds', 'How late the event loop woke a sleeping task')
+SLOW_CALLBACKS = REGISTRY.counter(
+    'snek_slow_callbacks', 'Event loop callbacks that ran longer than the slow callback threshold', ('phase',)
+)
+SLOW_CALLBACK_SECONDS = REGISTRY.counter(
+    'snek_slow_callback_seconds', 'Time the event loop spent blocked in slow callbacks', ('phase',)
+)
+
+# Channel of the game the running task belongs to, set by each game's tasks
+current_game: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('current_game', default=None)
+
+# Memory diagnostics notified around each phase, when enabled
+memory_hook = None
+
+# Slowest phase timed within the callback the loop is running; the loop runs one callback at a time
+_step_start = 0.0
+_step_phase: Optional[str] = None
+_step_phase_time = 0.0
+
+class phase:
+    """Times a tick phase into snek_tick_phase_seconds and notes it for slow callback reports."""
+    __slots__ = ('name', 'start', 'memory')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> 'phase':
+        self.memory = memory_hook.phase_started(self.name) if memory_hook is not None else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _step_phase, _step_phase_time
+        elapsed = time.perf_counter() - self.start
+        if memory_hook is not None:
+            memory_hook.phase_finished(self.name, self.memory)
+        _phase_histograms[self.name].observe(elapsed)
+        # Phases that awaited are only blamed if they began in this callback
+        if elapsed > _step_phase_time and self.start >= _step_start:
+            _step_phase = self.name
+            _step_phase_time = elapsed
+
+class LoopMonitor:
+    """
+    Watches the event loop for blocking code.
+
+    A sampling task sleeps for a fixed interval and records how late it woke
+    up as loop lag. Every callback the loop runs (including each step of a
+    task) is timed, and any that runs longer than the threshold is recorded
+    with the game it belonged to and the slowest tick phase inside it, in a
+    rolling report of recent slow callbacks.
+    """
+
+    def __init__(self, threshold: float = config.SLOW_CALLBACK_MS / 1000.0,
+                 interval: float = config.LOOP_LAG_INTERVAL, history: int = 100):
+        self.threshold = threshold
+        self.interval = interval
+        self.slow_callbacks: deque = deque(maxlen=history)
+        self.lags: deque = deque(maxlen=max(1, int(60 / interval)))  # About the last minute of samples
+        self.task: Optional[asyncio.Task] = None
+        self._original_run = None
+
+    def start(self) -> None:
+        """Start sampling loop lag and timing callbacks on the running loop."""
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._sample_lag())
+        if self._original_run is None:
+            self._install()
+
+    async def stop(self) -> None:
+        """Stop monitoring and restore the loop's callback runner."""
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _sample_lag(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            self.lags.append(lag)
+
+    def _install(self) -> None:
+        """Wrap Handle._run, which the loop calls for every callback and task step."""
+        monitor = self
+        original_run = self._original_run = asyncio.events.Handle._run
+
+        def _run(handle):
+            global _step_start, _step_phase, _step_phase_time
+            _step_phase = None
+            _step_phase_time = 0.0
+            start = _step_start = time.perf_counter()
+            original_run(handle)
+            elapsed = time.perf_counter() - start
+            if elapsed > monitor.threshold:
+                monitor._record_slow_callback(handle, elapsed)
+
+        asyncio.events.Handle._run = _run
+
+    def _record_slow_callback(self, handle: asyncio.Handle, elapsed: float) -> None:
+        context = handle._context
+        game = context.get(current_game) if context is not None else None
+        phase_name = _step_phase or 'other'
+        SLOW_CALLBACKS.labels(phase_name).inc()
+        SLOW_CALLBACK_SECONDS.labels(phase_name).inc(elapsed)
+
+        callback = getattr(handle._callback, '__self__', None)
+        if isinstance(callback, asyncio.Task):
+            name = callback.get_name()
+            coro = callback.get_coro()
+            if coro is not None:
+                name = f"{name} ({getattr(coro, '__qualname__', coro)})"
+        else:
+            name = getattr(handle._callback, '__qualname__', repr(handle._callback))
+
+        self.slow_callbacks.append({
+            'time': time.time(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'game': game,
+            'phase': phase_name,
+            'phase_ms': round(_step_phase_time * 1000, 2),
+            'callback': name,
+        })
+        log.warning("Slow callback: %s blocked the event loop for %.0fms (game %s, phase %s)",
+                    name, elapsed * 1000, game, phase_name)
+
+    def report(self) -> Dict:
+        """Summarize recent loop lag and slow callbacks."""
+        lags: List[float] = sorted(self.lags)
+        by_phase: Dict[str, Dict] = {}
+        for entry in self.slow_callbacks:
+            stats = by_phase.setdefault(entry['phase'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += entry['duration_ms']
+            stats['max_ms'] = max(stats['max_ms'], entry['duration_ms'])
+
+        return {
+            'threshold_ms': self.threshold * 1000,
+            'loop_lag_ms': {
+                'samples': len(lags),
+                'p50': lags[len(lags) // 2] * 1000 if lags else 0.0,
+                'p99': lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000 if lags else 0.0,
+                'max': lags[-1] * 1000 if lags else 0.0,
+            },
+            'slow_callbacks_by_phase': by_phase,
+            'recent_slow_callbacks': list(self.slow_callbacks),
+        }
+
+def record_search(stats: Dict) -> None:
+    """Count a master AI search; nodes/sec is the rate of snek_ai_search_nodes over snek_ai_search_seconds."""
+    AI_SEARCH_DEPTH.observe(stats['depth'])
+    AI_SEARCH_NODES.inc(stats['nodes'])
+    AI_SEARCH_SECONDS.inc(stats['seconds'])
+
+class RateLimitLogHandler(logging.Handler):
+    """Counts Discord 429 responses from the warnings discord.py logs before it waits them out."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.msg
+        if isinstance(message, str) and message.startswith('We are being rate limited.') \
+                and 'Retrying in' in message and record.args:
+            DISCORD_RATE_LIMITS.inc()
+            DISCORD_RATE_LIMIT_WAIT.inc(float(record.args[-1]))
+
+def install_rate_limit_handler() -> None:
+    """Start counting Discord rate limits."""
+    logger = logging.getLogger('discord.http')
+    if not any(isinstance(handler, RateLimitLogHandler) for handler in logger.handlers):
+        logger.addHandler(RateLimitLogHandler(logging.WARNING))
+
+class MetricsServer:
+    """Serves the bot's metrics in Prometheus text format."""
+
+    def __init__(self, host: str = config.METRICS_HOST, port: int = config.METRICS_PORT,
+                 loop_monitor: Optional[LoopMonitor] = None, memory_diagnostics=None, live_server=None):
+        self.host = host
+        self.port = port
+        self.loop_monitor = loop_monitor
+        self.memory_diagnostics = memory_diagnostics
+        self.live_server = live_server
+        self.runner: Optional['web.AppRunner'] = None
+
+    async def start(self) -> bool:
+        """Start serving /metrics."""
+        # aiohttp's server side is slow to import and not needed to reach Discord,
+        # so import it on a worker thread while the bot connects
+        web = await asyncio.get_running_loop().run_in_executor(None, importlib.import_module, 'aiohttp.web')
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/debug/loop', self.handle_loop_report)
+        app.router.add_get('/debug/memory', self.handle_memory_report)
+        app.router.add_get('/debug/live', self.handle_live_report)
+        self.runner = web.AppRunner(app, access_log=None)
+        try:
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, self.host, self.port)
+            await site.start()
+        except OSError as e:
+            log.error("Failed to start metrics server on %s:%s: %s", self.host, self.port, e)
+            await self.runner.cleanup()
+            self.runner = None
+            return False
+
+        log.info("Metrics available at http://%s:%s/metrics", self.host, self.port)
+        return True
+
+    async def stop(self) -> None:
+        """Stop serving metrics."""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_metrics(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+        return web.Response(body=REGISTRY.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    async def handle_loop_report(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+        if self.loop_monitor is None:
+            return web.json_response({'error': 'Loop monitoring is disabled'}, status=404)
+        return web.json_response(self.loop_monitor.report())
+
+    async def handle_memory_report(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+        if self.memory_diagnostics is None:
+            return web.json_response({'error': 'Memory diagnostics are disabled'}, status=404)
+        return web.json_response(self.memory_diagnostics.report())
+
+    async def handle_live_report(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+        if self.live_server is None:
+            return web.json_response({'error': 'Live game state is disabled'}, status=404)
+        return web.json_response(self.live_server.hub.report())
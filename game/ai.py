@@ -1,13 +1,21 @@
+import heapq
 import random
-from typing import Tuple, List, Dict
+import time
+from collections import deque
+from typing import Tuple, List, Dict, Optional, Set
 import config
 from game.snake import Direction, Snake, SnakeGame
+from game.hamiltonian import get_hamiltonian_cycle
+from game.bitboard import get_bitboard, popcount
+from game.zobrist import get_zobrist
 
 class SnakeAI:
-    def __init__(self, game: SnakeGame, difficulty: str = config.AI_MEDIUM):
+    def __init__(self, game: SnakeGame, difficulty: str = config.AI_MEDIUM, snake_id: str = 'ai'):
         self.game = game
         self.difficulty = difficulty
-        self.snake_id = 'ai'
+        self.snake_id = snake_id
+        self.last_search: Optional[Dict] = None  # Depth, nodes and nodes/sec of the master AI's last search
+        self._table: Dict = {}  # Master AI transposition table, kept between moves
     
     def get_next_move(self) -> Direction:
         """Determine the next move for the AI snake based on difficulty level."""
@@ -17,6 +25,10 @@ class SnakeAI:
             return self._get_medium_move()
         elif self.difficulty == config.AI_HARD:
             return self._get_hard_move()
+        elif self.difficulty == config.AI_EXPERT:
+            return self._get_expert_move()
+        elif self.difficulty == config.AI_MASTER:
+            return self._get_master_move()
         else:
             return self._get_medium_move()  # Default to medium
     
@@ -106,18 +118,114 @@ class SnakeAI:
                 dy = 1
             
             # Convert to Direction enum
+            direction = None
             if dx == 1:
-                return Direction.RIGHT
+                direction = Direction.RIGHT
             elif dx == -1:
-                return Direction.LEFT
+                direction = Direction.LEFT
             elif dy == 1:
-                return Direction.DOWN
+                direction = Direction.DOWN
             elif dy == -1:
-                return Direction.UP
+                direction = Direction.UP
+            
+            # Only follow the path if its first step leaves room for the whole snake
+            free_tail = snake.body[-1] if snake.growth_pending == 0 else None
+            needed = len(snake.body) + snake.growth_pending
+            if direction and self._reachable_space(next_pos, free_tail, needed) >= needed:
+                return direction
         
         # If no path is found, use medium difficulty logic
         return self._find_safe_move_towards_food(snake)
     
+    def _get_expert_move(self) -> Direction:
+        """
+        Expert AI: Follows a Hamiltonian cycle of the board, which can never trap the
+        snake, and cuts ahead along the cycle towards food when that is safe.
+        """
+        snake = self.game.snakes.get(self.snake_id)
+        if not snake or not snake.alive:
+            return Direction.RIGHT
+        
+        cycle = get_hamiltonian_cycle(self.game.grid_size)
+        head_pos = snake.get_head_position()
+        tail_pos = snake.body[-1]
+        free_tail = tail_pos if snake.growth_pending == 0 else None
+        
+        # Our body trails behind the head along the cycle, so the cells up to the
+        # tail are free. Leave room for pending growth when cutting ahead.
+        length = len(snake.body) + snake.growth_pending
+        distance_to_tail = cycle.distance(head_pos, tail_pos) or cycle.size
+        max_jump = distance_to_tail - snake.growth_pending - 3
+        
+        # Never cut past the food, and stop cutting once the snake fills much of the board
+        food = self.game.nearest_food(head_pos)
+        if food is not None:
+            max_jump = min(max_jump, cycle.distance(head_pos, food))
+        if length >= cycle.size * config.EXPERT_SHORTCUT_LIMIT:
+            max_jump = 1
+        
+        # Prefer moves no opponent can also move into this tick (head-on collisions)
+        best_direction = None
+        best_key = None
+        for direction in Direction:
+            if self._is_reverse(snake.direction, direction):
+                continue
+            
+            dx, dy = direction.value
+            new_pos = ((head_pos[0] + dx) % self.game.grid_size, 
+                       (head_pos[1] + dy) % self.game.grid_size)
+            if self._is_blocked(new_pos, free_tail):
+                continue
+            
+            # The next cell on the cycle is always allowed; anything further is a shortcut.
+            # Leaving the cycle is a last resort to dodge an opponent's head.
+            jump = cycle.distance(head_pos, new_pos)
+            on_cycle = jump == 1 or jump <= max_jump
+            
+            key = (not self._is_contested(new_pos), on_cycle, jump if on_cycle else 0)
+            if best_key is None or key > best_key:
+                best_direction = direction
+                best_key = key
+        
+        if best_direction is not None:
+            return best_direction
+        
+        # Another snake is in the way: fall back to medium difficulty logic
+        return self._find_safe_move_towards_food(snake)
+    
+    def _get_master_move(self) -> Direction:
+        """
+        Master AI: Searches ahead against the nearest opponent's best replies for
+        as deep as it can within AI_SEARCH_BUDGET_MS (see AdversarialSearch).
+        """
+        snake = self.game.snakes.get(self.snake_id)
+        if not snake or not snake.alive:
+            return Direction.RIGHT
+        
+        if len(self._table) > config.AI_SEARCH_TABLE_SIZE:
+            self._table.clear()
+        
+        # Start from the medium AI's choice, which is played if not even one tick can be searched in time
+        deadline = time.perf_counter() + config.AI_SEARCH_BUDGET_MS / 1000
+        first_move = self._find_safe_move_towards_food(snake)
+        search = AdversarialSearch(self.game, self.snake_id, self._table)
+        move, self.last_search = search.search(deadline, config.AI_SEARCH_MAX_DEPTH, first_move)
+        return move
+    
+    def _is_contested(self, pos: Tuple[int, int]) -> bool:
+        """Check if another living snake's head is next to a cell, so it could move there too."""
+        for other_snake in self.game.snakes.values():
+            if other_snake.alive and other_snake.player_id != self.snake_id:
+                if self._manhattan_distance(other_snake.get_head_position(), pos) == 1:
+                    return True
+        return False
+    
+    def _is_reverse(self, direction: Direction, new_direction: Direction) -> bool:
+        """Check if a direction change would be a 180-degree turn."""
+        dx, dy = direction.value
+        new_dx, new_dy = new_direction.value
+        return dx == -new_dx and dy == -new_dy
+    
     def _move_towards_food(self, snake: Snake) -> Direction:
         """Simple logic to move towards the nearest food."""
         if not self.game.food:
@@ -125,7 +233,7 @@ class SnakeAI:
             return snake.direction
         
         head_pos = snake.get_head_position()
-        nearest_food = min(self.game.food, key=lambda food: self._manhattan_distance(head_pos, food))
+        nearest_food = self.game.nearest_food(head_pos)
         
         # Determine direction to move
         dx = nearest_food[0] - head_pos[0]
@@ -174,6 +282,9 @@ class SnakeAI:
         elif snake.direction == Direction.RIGHT:
             possible_directions.remove(Direction.LEFT)
         
+        # The tail of our snake moves out of the way unless the snake just ate
+        free_tail = snake.body[-1] if snake.growth_pending == 0 else None
+
         # Check which moves are safe (don't result in immediate collision)
         safe_directions = []
         for direction in possible_directions:
@@ -181,32 +292,34 @@ class SnakeAI:
             new_pos = ((head_pos[0] + dx) % self.game.grid_size, 
                        (head_pos[1] + dy) % self.game.grid_size)
             
-            # Check if new position collides with any snake
-            collision = False
-            for other_snake in self.game.snakes.values():
-                if other_snake.alive:
-                    # For the AI's own snake, check all body parts except the tail
-                    # (which will move out of the way unless the snake just ate)
-                    if other_snake.player_id == self.snake_id:
-                        check_body = other_snake.body[:-1] if other_snake.growth_pending == 0 else other_snake.body
-                        if new_pos in check_body:
-                            collision = True
-                            break
-                    # For other snakes, check the entire body
-                    elif new_pos in other_snake.body:
-                        collision = True
-                        break
-            
-            if not collision:
+            if not self._is_blocked(new_pos, free_tail):
                 safe_directions.append(direction)
         
         if not safe_directions:
             # No safe moves, try to find the least bad option
             return snake.direction  # Continue in current direction and hope for the best
         
+        # Prefer moves that leave enough reachable space for the whole snake,
+        # so it doesn't trap itself in an enclosed region
+        needed = len(snake.body) + snake.growth_pending
+        space = {}
+        for direction in safe_directions:
+            dx, dy = direction.value
+            new_pos = ((head_pos[0] + dx) % self.game.grid_size, 
+                       (head_pos[1] + dy) % self.game.grid_size)
+            space[direction] = self._reachable_space(new_pos, free_tail, needed)
+        
+        roomy_directions = [direction for direction in safe_directions if space[direction] >= needed]
+        if roomy_directions:
+            safe_directions = roomy_directions
+        else:
+            # Every move leads into a dead end: keep the ones with the most room
+            most_space = max(space.values())
+            safe_directions = [direction for direction in safe_directions if space[direction] == most_space]
+        
         # If there's food, try to move towards it
         if self.game.food:
-            nearest_food = min(self.game.food, key=lambda food: self._manhattan_distance(head_pos, food))
+            nearest_food = self.game.nearest_food(head_pos)
             
             # Score each safe direction based on distance to food
             direction_scores = []
@@ -230,41 +343,47 @@ class SnakeAI:
             return []
         
         head_pos = snake.get_head_position()
-        nearest_food = min(self.game.food, key=lambda food: self._manhattan_distance(head_pos, food))
-        
-        # Create a grid representation of the game state
-        grid = [[0 for _ in range(self.game.grid_size)] for _ in range(self.game.grid_size)]
-        
-        # Mark snake bodies as obstacles
-        for other_snake in self.game.snakes.values():
-            if other_snake.alive:
-                for segment in other_snake.body:
-                    grid[segment[1]][segment[0]] = 1
+        nearest_food = self.game.nearest_food(head_pos)
         
         # The tail of our snake is not an obstacle if we're not growing
-        if snake.growth_pending == 0:
-            tail = snake.body[-1]
-            grid[tail[1]][tail[0]] = 0
+        free_tail = snake.body[-1] if snake.growth_pending == 0 else None
         
         # A* pathfinding
-        return self._a_star(grid, head_pos, nearest_food)
+        return self._a_star(head_pos, nearest_food, free_tail)
     
-    def _a_star(self, grid, start, goal) -> List[Tuple[int, int]]:
+    def _is_blocked(self, pos: Tuple[int, int], free_tail: Optional[Tuple[int, int]] = None) -> bool:
+        """Check if a cell holds a living snake segment, ignoring our own tail if it is about to move."""
+        count = self.game.occupied.get(pos, 0)
+        if pos == free_tail:
+            count -= 1
+        return count > 0
+    
+    def _reachable_space(self, pos: Tuple[int, int], free_tail: Optional[Tuple[int, int]] = None,
+                         limit: Optional[int] = None) -> int:
+        """Count the free cells reachable from a cell, stopping once the limit is reached."""
+        bitboard = get_bitboard(self.game.grid_size)
+        free = bitboard.full & ~self.game.occupied_bitboard()
+        if free_tail is not None:
+            free |= bitboard.bit(free_tail)
+        return bitboard.reachable_area(pos, free, limit)
+    
+    def _a_star(self, start, goal, free_tail: Optional[Tuple[int, int]] = None) -> List[Tuple[int, int]]:
         """A* pathfinding algorithm."""
-        # Initialize open and closed sets
-        open_set = {start}
+        # Open set as a heap of (f_score, g_score, position), plus the closed set
+        open_heap = [(self._manhattan_distance(start, goal), 0, start)]
         closed_set = set()
         
-        # Initialize dictionaries to store g_score and f_score
+        # Best known g_score per position
         g_score = {start: 0}
-        f_score = {start: self._manhattan_distance(start, goal)}
         
         # Dictionary to store the path
         came_from = {}
         
-        while open_set:
-            # Find the node in open_set with the lowest f_score
-            current = min(open_set, key=lambda pos: f_score.get(pos, float('inf')))
+        while open_heap:
+            # Take the node with the lowest f_score
+            _, current_g, current = heapq.heappop(open_heap)
+            if current in closed_set:
+                continue  # Stale entry superseded by a shorter path
             
             if current == goal:
                 # Reconstruct the path
@@ -275,7 +394,6 @@ class SnakeAI:
                 path.reverse()
                 return path
             
-            open_set.remove(current)
             closed_set.add(current)
             
             # Check all possible moves from current position
@@ -288,21 +406,19 @@ class SnakeAI:
                     continue
                 
                 # Check if the neighbor is an obstacle
-                if grid[neighbor[1]][neighbor[0]] == 1:
+                if self._is_blocked(neighbor, free_tail):
                     continue
                 
                 # Calculate tentative g_score
-                tentative_g_score = g_score[current] + 1
-                
-                if neighbor not in open_set:
-                    open_set.add(neighbor)
-                elif tentative_g_score >= g_score.get(neighbor, float('inf')):
+                tentative_g_score = current_g + 1
+                if tentative_g_score >= g_score.get(neighbor, float('inf')):
                     continue
                 
                 # This path is the best so far
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = g_score[neighbor] + self._manhattan_distance(neighbor, goal)
+                heapq.heappush(open_heap, (tentative_g_score + self._manhattan_distance(neighbor, goal),
+                                           tentative_g_score, neighbor))
         
         # No path found
         return []
@@ -317,3 +433,381 @@ class SnakeAI:
         dy = min(dy, self.game.grid_size - dy)
         
         return dx + dy
+
+class _OutOfTime(Exception):
+    """Raised inside the search when its time budget has run out."""
+
+# Search scores: a win or loss outweighs any evaluation, and sooner wins (later losses) score higher
+WIN = 1000000
+DRAW = -WIN // 2
+TRAPPED = 1000
+# Scores at least this far from zero are wins or losses, counted in plies from the root
+MATE = WIN - 10000
+
+# Transposition table bound types
+EXACT, LOWER, UPPER = 0, 1, 2
+
+def _to_table(value: int, ply: int) -> int:
+    """Count a win or loss from the position instead of the root, so the entry holds wherever the position recurs."""
+    if value >= MATE:
+        return value + ply
+    if value <= -MATE:
+        return value - ply
+    return value
+
+def _from_table(value: int, ply: int) -> int:
+    """Count a stored win or loss from the root again, as reached at this ply."""
+    if value >= MATE:
+        return value - ply
+    if value <= -MATE:
+        return value + ply
+    return value
+
+class AdversarialSearch:
+    """
+    Iterative-deepening search of the moves of one snake against its nearest
+    opponent, within a time budget.
+
+    Both snakes move at once each tick, so every ply is our move followed by
+    the opponent's reply to it, and the opponent is assumed to reply as badly
+    for us as it can (alpha-beta over max and min nodes). Other snakes stay
+    where they are. Positions are played out on a copy of the occupancy map
+    by making and unmaking moves, with the game's Zobrist hash updated along
+    the way, and the transposition table is keyed by that hash, the searched
+    snakes' directions and pending growth, and the opponent's ID, as the
+    table is kept between moves while the nearest opponent changes; it also
+    stores each position's best move and reply, which are tried first on the
+    next, deeper iteration. Root moves are ordered by the previous
+    iteration's scores.
+
+    Our death is a loss. The opponent's death is only a win when it ends the
+    game, with no other snake left in a multiplayer or arena game; otherwise
+    the line stops there and is scored as if the opponent were gone.
+
+    Leaves are scored by the room each snake has to move (a flood fill on the
+    bitboard), length and distance to food. When the budget runs out, the
+    unfinished iteration is abandoned and the best move from the deepest
+    finished one is played, unless the unfinished one already found better.
+    """
+
+    def __init__(self, game: SnakeGame, snake_id: str, table: Dict):
+        self.game = game
+        self.snake_id = snake_id
+        self.table = table
+        self.zobrist = get_zobrist(game.grid_size)
+        self.bitboard = get_bitboard(game.grid_size)
+        self.nodes = 0
+        self.deadline = 0.0
+
+        # Searched snakes, ours first: body, direction, pending growth and hash key
+        me = game.snakes[snake_id]
+        searched = [me]
+        opponent = self._nearest_opponent(me)
+        if opponent is not None:
+            searched.append(opponent)
+        order = list(game.snakes)
+        self.bodies = [deque(snake.body) for snake in searched]
+        self.directions = [snake.direction for snake in searched]
+        self.growth = [snake.growth_pending for snake in searched]
+        self.keys = [snake.hash_key for snake in searched]
+        self.opponent_id = opponent.player_id if opponent is not None else None
+        # Whether one of the searched snakes dying leaves the other as the game's winner
+        others_alive = any(snake.alive for snake in game.snakes.values() if snake not in searched)
+        self.decisive = game.mode in (config.MULTIPLAYER, config.ARENA) and not others_alive
+        # Collisions are checked in the game's order: of two heads meeting, only the first dies
+        self.collision_order = sorted(range(len(searched)), key=lambda i: order.index(searched[i].player_id))
+
+        self.occupied = dict(game.occupied)
+        self.bits = game.occupied_bitboard()
+        self.food = set(game.food)
+        self.eaten: Set[Tuple[int, int]] = set()  # Food eaten along the line being searched, still in game.food_index
+        self.hash = game.zobrist
+        self.space_cap = min(game.grid_size * game.grid_size,
+                             2 * max(len(body) + growth for body, growth in zip(self.bodies, self.growth)) + 8)
+
+    def _nearest_opponent(self, me: Snake) -> Optional[Snake]:
+        """The living snake with its head closest to ours, if it is close enough to matter."""
+        g = self.game.grid_size
+        hx, hy = me.body[0]
+        nearest = None
+        nearest_distance = config.AI_SEARCH_RADIUS + 1
+        for snake in self.game.snakes.values():
+            if snake is me or not snake.alive:
+                continue
+            dx = abs(snake.body[0][0] - hx)
+            dy = abs(snake.body[0][1] - hy)
+            distance = min(dx, g - dx) + min(dy, g - dy)
+            if distance < nearest_distance:
+                nearest = snake
+                nearest_distance = distance
+        return nearest
+
+    def search(self, deadline: float, max_depth: int, first_move: Direction) -> Tuple[Direction, Dict]:
+        """
+        Search deeper and deeper until time.perf_counter() passes the deadline.
+        Returns the best move and the search's statistics.
+        """
+        start = time.perf_counter()
+        self.deadline = deadline
+        moves = self._moves(0)
+        if first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        best_move = moves[0] if moves else first_move
+        best_score = None
+        depth_reached = 0
+
+        if len(moves) > 1:
+            for depth in range(1, max_depth + 1):
+                scores: Dict[Direction, int] = {}
+                try:
+                    self._search_root(moves, depth, scores)
+                except _OutOfTime:
+                    # Keep a move from the unfinished iteration only if it beat the previous best at this depth
+                    if moves[0] in scores:
+                        move = max(scores, key=scores.get)
+                        if scores[move] > scores[moves[0]]:
+                            best_move = move
+                            best_score = scores[move]
+                    break
+                moves.sort(key=lambda move: -scores[move])
+                best_move = moves[0]
+                best_score = scores[best_move]
+                depth_reached = depth
+                # Nothing changes once every line ends in a win or loss
+                if all(abs(score) >= WIN - max_depth for score in scores.values()):
+                    break
+
+        elapsed = time.perf_counter() - start
+        return best_move, {
+            'depth': depth_reached,
+            'nodes': self.nodes,
+            'seconds': elapsed,
+            'nodes_per_sec': self.nodes / elapsed if elapsed else 0.0,
+            'score': best_score,
+        }
+
+    def _search_root(self, moves: List[Direction], depth: int, scores: Dict[Direction, int]) -> None:
+        """Score the root moves to the given depth; moves that can't beat the best only get an upper bound."""
+        alpha = -WIN - 1
+        for move in moves:
+            score = self._min_reply(move, depth, alpha, WIN + 1, 0)[0]
+            scores[move] = score
+            alpha = max(alpha, score)
+
+    def _min_reply(self, move: Direction, depth: int, alpha: int, beta: int, ply: int,
+                   first_reply: Optional[Direction] = None) -> Tuple[int, Optional[Direction]]:
+        """Score our move against the opponent's worst reply for us; returns the score and that reply."""
+        replies = self._moves(1) if len(self.bodies) > 1 else [None]
+        if first_reply in replies:
+            replies.remove(first_reply)
+            replies.insert(0, first_reply)
+        worst = WIN + 1
+        worst_reply = replies[0]
+        for reply in replies:
+            undo = self._make(move, reply)
+            dead = undo[-1]
+            if dead:
+                score = self._terminal(dead, ply + 1)
+            else:
+                score = self._value(depth - 1, alpha, min(beta, worst), ply + 1)
+            self._unmake(undo)
+            if score < worst:
+                worst = score
+                worst_reply = reply
+                if worst <= alpha:
+                    break  # The opponent can hold us below what we already have elsewhere
+        return worst, worst_reply
+
+    def _value(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Alpha-beta value of the current position to our snake, searching `depth` more ticks."""
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise _OutOfTime()
+
+        key = (self.hash, self.opponent_id, *self.directions, *self.growth)
+        entry = self.table.get(key)
+        best_move = best_reply = None
+        if entry is not None:
+            entry_depth, value, bound, best_move, best_reply = entry
+            value = _from_table(value, ply)
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return value
+                if bound == LOWER and value >= beta:
+                    return value
+                if bound == UPPER and value <= alpha:
+                    return value
+        if depth == 0:
+            return self._evaluate()
+
+        moves = self._moves(0)
+        if best_move in moves:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+        original_alpha = alpha
+        best = -WIN - 1
+        for move in moves:
+            score, reply = self._min_reply(move, depth, alpha, beta, ply, best_reply if move == best_move else None)
+            if score > best:
+                best = score
+                best_move = move
+                best_reply = reply
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        bound = UPPER if best <= original_alpha else LOWER if best >= beta else EXACT
+        self.table[key] = (depth, _to_table(best, ply), bound, best_move, best_reply)
+        return best
+
+    def _moves(self, i: int) -> List[Direction]:
+        """A searched snake's moves that don't run straight into a body (all three if every one does)."""
+        g = self.game.grid_size
+        x, y = self.bodies[i][0]
+        dx, dy = self.directions[i].value
+        moves = []
+        for direction in Direction:
+            new_dx, new_dy = direction.value
+            if new_dx == -dx and new_dy == -dy:
+                continue
+            pos = ((x + new_dx) % g, (y + new_dy) % g)
+            count = self.occupied.get(pos, 0)
+            if count:
+                # A tail moves out of the way as the head moves in, unless the snake is growing
+                for body, growth in zip(self.bodies, self.growth):
+                    if not growth and body[-1] == pos:
+                        count -= 1
+            if count <= 0:
+                moves.append(direction)
+        if not moves:
+            moves = [direction for direction in Direction if not self._is_reverse(i, direction)]
+        return moves
+
+    def _is_reverse(self, i: int, direction: Direction) -> bool:
+        dx, dy = self.directions[i].value
+        new_dx, new_dy = direction.value
+        return dx == -new_dx and dy == -new_dy
+
+    def _make(self, move: Direction, reply: Optional[Direction]) -> Tuple:
+        """Play one tick like SnakeGame.update does; returns what _unmake() needs, ending with the snakes that died."""
+        g = self.game.grid_size
+        occupied = self.occupied
+        bit = self.bitboard.bit
+        zobrist = self.zobrist
+        old_hash = self.hash
+        old_bits = self.bits
+        old_growth = list(self.growth)
+        old_directions = list(self.directions)
+        tails = []
+        for i, direction in enumerate((move, reply)[:len(self.bodies)]):
+            body = self.bodies[i]
+            self.directions[i] = direction
+            old_head = body[0]
+            dx, dy = direction.value
+            new_head = ((old_head[0] + dx) % g, (old_head[1] + dy) % g)
+            body.appendleft(new_head)
+            count = occupied.get(new_head, 0)
+            occupied[new_head] = count + 1
+            if not count:
+                self.bits |= bit(new_head)
+            tail = None
+            if self.growth[i]:
+                self.growth[i] -= 1
+            else:
+                tail = body.pop()
+                count = occupied[tail] - 1
+                if count:
+                    occupied[tail] = count
+                else:
+                    del occupied[tail]
+                    self.bits &= ~bit(tail)
+            tails.append(tail)
+            self.hash ^= zobrist.move(self.keys[i], old_head, new_head, tail)
+
+        eaten = []
+        for i, body in enumerate(self.bodies):
+            if body[0] in self.food:
+                self.food.remove(body[0])
+                self.eaten.add(body[0])
+                self.hash ^= zobrist.food(body[0])
+                self.growth[i] += 1
+                eaten.append(body[0])
+
+        dead = []
+        for i in self.collision_order:
+            head = self.bodies[i][0]
+            count = occupied[head]
+            for j in dead:
+                count -= self.bodies[j].count(head)
+            if count > 1:
+                dead.append(i)
+        return old_hash, old_bits, old_growth, old_directions, tails, eaten, dead
+
+    def _unmake(self, undo: Tuple) -> None:
+        """Take back a tick played by _make()."""
+        self.hash, self.bits, self.growth, self.directions, tails, eaten, _ = undo
+        occupied = self.occupied
+        self.food.update(eaten)
+        self.eaten.difference_update(eaten)
+        for body, tail in zip(self.bodies, tails):
+            head = body.popleft()
+            count = occupied[head] - 1
+            if count:
+                occupied[head] = count
+            else:
+                del occupied[head]
+            if tail is not None:
+                body.append(tail)
+                occupied[tail] = occupied.get(tail, 0) + 1
+
+    def _terminal(self, dead: List[int], ply: int) -> int:
+        """Score a tick where a searched snake died; the search doesn't go past it."""
+        if 0 not in dead:
+            # The opponent is out, but unless that ends the game there's no win yet
+            return WIN - ply if self.decisive else self._evaluate(opponent_dead=True)
+        if len(dead) > 1 and self.decisive:
+            return DRAW
+        return -WIN + ply
+
+    def _evaluate(self, opponent_dead: bool = False) -> int:
+        """Score a position for our snake: room to move, then length, then closeness to food."""
+        bitboard = self.bitboard
+        bits = self.bits
+        bodies = self.bodies
+        if opponent_dead:
+            # A dead snake leaves the board, freeing the cells only it held
+            for pos in bodies[1]:
+                if self.occupied.get(pos) == 1:
+                    bits &= ~bitboard.bit(pos)
+            bodies = bodies[:1]
+        free = bitboard.full & ~bits
+        cap = self.space_cap
+        g = self.game.grid_size
+
+        scores = []
+        for body, growth in zip(bodies, self.growth):
+            space = min(cap, popcount(bitboard.flood_fill(bitboard.bit(body[0]), free, cap)))
+            length = len(body) + growth
+            scores.append(space + 10 * length - (TRAPPED if space < length else 0))
+        score = scores[0] - scores[1] if len(scores) > 1 else scores[0]
+
+        # Closer to the nearest food is better, as a tie-break
+        hx, hy = self.bodies[0][0]
+        if len(self.food) <= 16:
+            nearest = None
+            for fx, fy in self.food:
+                dx = abs(fx - hx)
+                dy = abs(fy - hy)
+                distance = min(dx, g - dx) + min(dy, g - dy)
+                if nearest is None or distance < nearest:
+                    nearest = distance
+        else:
+            food = self.game.food_index.nearest((hx, hy), skip=self.eaten)
+            nearest = None
+            if food is not None:
+                dx = abs(food[0] - hx)
+                dy = abs(food[1] - hy)
+                nearest = min(dx, g - dx) + min(dy, g - dy)
+        return score - (nearest or 0)
@@ -0,0 +1,269 @@
+import random
+from typing import Dict, List, Sequence, Tuple
+import config
+from game.ai import SnakeAI
+from game.snake import Direction, SnakeGame
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it every AI decides on its own
+    np = None
+
+DIRECTIONS = list(Direction)  # Index order used by the arrays: up, down, left, right
+_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+_DX = [direction.value[0] for direction in DIRECTIONS]
+_DY = [direction.value[1] for direction in DIRECTIONS]
+PACKED_WIDTH = 64  # Widest board packed one row per uint64; wider boards are decided one AI at a time
+
+def stack_boards(games: Sequence[SnakeGame]) -> 'np.ndarray':
+    """
+    Stack the occupied cells of games with the same grid size into a
+    (games, grid, grid) boolean array, indexed [game, y, x].
+    """
+    g = games[0].grid_size
+    size = (g * g + 7) // 8
+    packed = np.frombuffer(b''.join(game.occupied_bitboard().to_bytes(size, 'little') for game in games),
+                           dtype=np.uint8).reshape(len(games), size)
+    return np.unpackbits(packed, axis=1, count=g * g, bitorder='little').reshape(len(games), g, g).astype(bool)
+
+def medium_moves(occupied: 'np.ndarray', boards: 'np.ndarray', heads: 'np.ndarray', directions: 'np.ndarray',
+                 tails: 'np.ndarray', free_tails: 'np.ndarray', needed: 'np.ndarray',
+                 targets: 'np.ndarray', has_food: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    The medium AI's safe move towards food (SnakeAI._find_safe_move_towards_food)
+    for a batch of snakes at once, on the boards of `occupied` (see stack_boards()).
+
+    Per snake: the index of its board, its head, tail and target food as (x, y), its direction as an
+    index into DIRECTIONS, whether its tail moves out of the way this tick,
+    and the cells it needs (length plus pending growth). Returns each
+    snake's move as an index into DIRECTIONS (-1 when it has no safe move,
+    or no food to head for), and the moves it would pick from at random
+    when there's no food.
+    """
+    count, g = len(boards), occupied.shape[1]
+    rows = np.arange(count)
+    dx = np.array(_DX)
+    dy = np.array(_DY)
+
+    # Each snake's free cells, with its tail freed if it's about to move
+    free = ~occupied[boards]
+    free[rows, tails[:, 1], tails[:, 0]] |= free_tails
+
+    # Safe moves: not a 180-degree turn, and into a free cell
+    xs = (heads[:, 0:1] + dx) % g
+    ys = (heads[:, 1:2] + dy) % g
+    safe = (np.arange(4) != (directions ^ 1)[:, None]) & free[rows[:, None], ys, xs]
+
+    space = flood_fill_sizes(free, xs, ys, safe, needed)
+
+    # Prefer moves with room for the whole snake, or else the most room
+    roomy = safe & (space >= needed[:, None])
+    most = np.where(safe, space, -1).max(axis=1, keepdims=True)
+    choices = np.where(roomy.any(axis=1, keepdims=True), roomy, safe & (space == most))
+
+    # Of those, the move that ends closest to the food; argmax keeps the first of equals, like max()
+    ddx = np.abs(xs - targets[:, 0:1])
+    ddy = np.abs(ys - targets[:, 1:2])
+    distance = np.minimum(ddx, g - ddx) + np.minimum(ddy, g - ddy)
+    best = np.where(choices, -distance, np.iinfo(np.int64).min).argmax(axis=1)
+    moves = np.where(has_food & safe.any(axis=1), best, -1)
+    return moves, choices
+
+def flood_fill_sizes(free: 'np.ndarray', xs: 'np.ndarray', ys: 'np.ndarray', starts: 'np.ndarray',
+                     limits: 'np.ndarray') -> 'np.ndarray':
+    """
+    Count the free cells reachable from each start cell (xs, ys have one row
+    per board, one column per start), with wrapping, counting at least up to
+    the board's limit like Bitboard.reachable_area(). Starts not set in
+    `starts` count 0.
+
+    Every fill advances its whole frontier one step per iteration, all fills
+    together; fills that have stopped growing or reached their limit are
+    dropped so later iterations only work on those still going. Boards up to
+    64 cells wide are packed one row per uint64, like game.bitboard packs a
+    whole board into an int, so each step is a few shifts per row.
+    """
+    count, columns = starts.shape
+    board, column = np.nonzero(starts)
+    sizes = np.zeros((count, columns), dtype=np.int64)
+    if not len(board):
+        return sizes
+
+    g = free.shape[1]
+    fills = np.arange(len(board))
+    start_x = xs[board, column]
+    start_y = ys[board, column]
+    if g <= PACKED_WIDTH:
+        cells = _pack_rows(free)[board]
+        reached = np.zeros((len(board), g), dtype=np.uint64)
+        reached[fills, start_y] = np.left_shift(np.uint64(1), start_x.astype(np.uint64))
+        step = _grow_packed
+        cell_count = _count_packed
+    else:
+        cells = free[board]
+        reached = np.zeros((len(board), g, g), dtype=bool)
+        reached[fills, start_y, start_x] = True
+        step = _grow
+        cell_count = _count
+    limit = limits[board]
+    total = np.ones(len(board), dtype=np.int64)
+    while len(board):
+        grown = step(reached, cells, g)
+        new_total = cell_count(grown)
+        growing = (new_total > total) & (new_total < limit)
+        reached = grown
+        total = new_total
+
+        done = ~growing
+        if done.any():
+            sizes[board[done], column[done]] = total[done]
+            board = board[growing]
+            column = column[growing]
+            reached = reached[growing]
+            cells = cells[growing]
+            limit = limit[growing]
+            total = total[growing]
+    return sizes
+
+def _grow(reached: 'np.ndarray', cells: 'np.ndarray', g: int) -> 'np.ndarray':
+    """One flood fill step on (fills, grid, grid) boolean boards."""
+    grown = np.roll(reached, 1, axis=2)
+    grown |= np.roll(reached, -1, axis=2)
+    grown |= np.roll(reached, 1, axis=1)
+    grown |= np.roll(reached, -1, axis=1)
+    grown &= cells
+    grown |= reached
+    return grown
+
+def _count(reached: 'np.ndarray') -> 'np.ndarray':
+    return reached.sum(axis=(1, 2))
+
+def _pack_rows(cells: 'np.ndarray') -> 'np.ndarray':
+    """Pack (boards, grid, grid) boolean boards into (boards, grid) uint64s, bit x of row y for cell (x, y)."""
+    packed = np.packbits(cells, axis=2, bitorder='little')
+    padded = np.zeros(cells.shape[:2] + (8,), dtype=np.uint8)
+    padded[:, :, :packed.shape[2]] = packed
+    return padded.view('<u8').reshape(cells.shape[:2]).astype(np.uint64)
+
+def _grow_packed(reached: 'np.ndarray', cells: 'np.ndarray', g: int) -> 'np.ndarray':
+    """One flood fill step on boards packed by _pack_rows(), wrapping at the edges."""
+    last = np.uint64(g - 1)
+    one = np.uint64(1)
+    row = np.uint64((1 << g) - 1)
+    grown = ((reached << one) | (reached >> last)) & row
+    grown |= (reached >> one) | ((reached & one) << last)
+    grown |= np.roll(reached, 1, axis=1)
+    grown |= np.roll(reached, -1, axis=1)
+    grown &= cells
+    grown |= reached
+    return grown
+
+if np is not None and hasattr(np, 'bitwise_count'):
+    def _count_packed(reached: 'np.ndarray') -> 'np.ndarray':
+        return np.bitwise_count(reached).sum(axis=1, dtype=np.int64)
+else:  # numpy < 2.0
+    def _count_packed(reached: 'np.ndarray') -> 'np.ndarray':
+        return np.unpackbits(reached.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+def get_next_moves(ais: Sequence[SnakeAI]) -> List[Direction]:
+    """
+    The moves the AIs would make if each called get_next_move() in turn,
+    with the same random draws in the same order, so seeded games play out
+    identically. Medium AIs on boards up to PACKED_WIDTH wide are decided
+    together, in one vectorized pass per board size; the rest decide on
+    their own as usual, as the scalar AI's bitboards beat unpacked numpy
+    arrays on larger boards.
+    """
+    if np is None:
+        return [ai.get_next_move() for ai in ais]
+
+    # Group the medium AIs with a living snake by board size
+    groups: Dict[int, List[int]] = {}
+    for i, ai in enumerate(ais):
+        snake = ai.game.snakes.get(ai.snake_id)
+        if ai.difficulty == config.AI_MEDIUM and snake and snake.alive and ai.game.grid_size <= PACKED_WIDTH:
+            groups.setdefault(ai.game.grid_size, []).append(i)
+
+    decided: Dict[int, Tuple[int, List[bool]]] = {}
+    for indices in groups.values():
+        moves, choices = _decide_medium([ais[i] for i in indices])
+        decided.update(zip(indices, zip(moves.tolist(), choices.tolist())))
+
+    # Draw random numbers in the order the AIs would have, one at a time
+    results = []
+    for i, ai in enumerate(ais):
+        if i not in decided:
+            results.append(ai.get_next_move())
+            continue
+        snake = ai.game.snakes[ai.snake_id]
+        move, choices = decided[i]
+        if random.random() < 0.1:
+            reverse = DIRECTIONS[_INDEX[snake.direction] ^ 1]
+            results.append(random.choice([direction for direction in DIRECTIONS if direction != reverse]))
+        elif move >= 0:
+            results.append(DIRECTIONS[move])
+        elif not any(choices):
+            results.append(snake.direction)  # No safe moves
+        else:
+            results.append(random.choice([direction for direction, chosen in zip(DIRECTIONS, choices) if chosen]))
+    return results
+
+def _decide_medium(ais: Sequence[SnakeAI]) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Gather the medium AIs' snakes and boards into arrays and run medium_moves() on them."""
+    # Lists first and one conversion per array, as setting numpy elements one by one is slow.
+    # Each game's board is stacked once, however many of its snakes are AIs.
+    snakes = [ai.game.snakes[ai.snake_id] for ai in ais]
+    board_of: Dict[int, int] = {}
+    games: List[SnakeGame] = []
+    for ai in ais:
+        if id(ai.game) not in board_of:
+            board_of[id(ai.game)] = len(games)
+            games.append(ai.game)
+    boards = np.array([board_of[id(ai.game)] for ai in ais], dtype=np.int64)
+    heads = np.array([snake.body[0] for snake in snakes], dtype=np.int64)
+    targets, has_food = _nearest_food(games, boards, heads)
+    return medium_moves(
+        stack_boards(games),
+        boards,
+        heads,
+        np.array([_INDEX[snake.direction] for snake in snakes], dtype=np.int64),
+        np.array([snake.body[-1] for snake in snakes], dtype=np.int64),
+        np.array([snake.growth_pending == 0 for snake in snakes], dtype=bool),
+        np.array([len(snake.body) + snake.growth_pending for snake in snakes], dtype=np.int64),
+        targets,
+        has_food,
+    )
+
+def _nearest_food(games: Sequence[SnakeGame], boards: 'np.ndarray',
+                  heads: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Each head's nearest food, as SnakeGame.nearest_food() finds it, and
+    whether there is any. Games with few enough food that SpatialHash.nearest()
+    scans them all are done together: argmin keeps the first of equally near
+    food in the set's order, as min() does. The rest ask their food index.
+    """
+    g = games[0].grid_size
+    scanned = [list(game.food_index.points) if len(game.food_index) <= game.food_index.scan_threshold else None
+               for game in games]
+    width = max([len(food) for food in scanned if food is not None], default=0)
+    food = np.zeros((len(games), max(1, width), 2), dtype=np.int64)
+    present = np.zeros((len(games), max(1, width)), dtype=bool)
+    for row, points in enumerate(scanned):
+        if points:
+            food[row, :len(points)] = points
+            present[row, :len(points)] = True
+
+    candidates = food[boards]
+    ddx = np.abs(candidates[:, :, 0] - heads[:, 0:1])
+    ddy = np.abs(candidates[:, :, 1] - heads[:, 1:2])
+    distance = np.where(present[boards], np.minimum(ddx, g - ddx) + np.minimum(ddy, g - ddy), 2 * g)
+    rows = np.arange(len(boards))
+    targets = candidates[rows, distance.argmin(axis=1)]
+    has_food = present[boards].any(axis=1)
+
+    for row in np.flatnonzero([scanned[board] is None for board in boards.tolist()]).tolist():
+        game = games[boards[row]]
+        nearest = game.nearest_food(tuple(heads[row].tolist()))
+        targets[row] = nearest
+        has_food[row] = True
+    return targets, has_food
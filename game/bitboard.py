@@ -0,0 +1,79 @@
+from typing import Iterable, Optional, Tuple
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(value: int) -> int:
+        return bin(value).count('1')
+
+class Bitboard:
+    """
+    Bit operations over a toroidal grid packed into a Python int.
+
+    Cell (x, y) is bit y * n + x. Shifts move every set cell one step in a
+    direction at once, wrapping around the edges, so a flood fill advances its
+    whole frontier per iteration instead of visiting cells one by one.
+    """
+
+    def __init__(self, grid_size: int):
+        n = grid_size
+        self.grid_size = n
+        self.size = n * n
+        self.full = (1 << self.size) - 1
+
+        self.first_row = (1 << n) - 1
+        self.last_row_shift = n * (n - 1)
+        self.first_column = sum(1 << (y * n) for y in range(n))
+        self.last_column = self.first_column << (n - 1)
+        self.not_first_column = self.full & ~self.first_column
+        self.not_last_column = self.full & ~self.last_column
+
+    def bit(self, pos: Tuple[int, int]) -> int:
+        """Get the bit for a cell."""
+        return 1 << (pos[1] * self.grid_size + pos[0])
+
+    def from_cells(self, cells: Iterable[Tuple[int, int]]) -> int:
+        """Build a board with the given cells set."""
+        n = self.grid_size
+        data = bytearray((self.size + 7) // 8)
+        for x, y in cells:
+            i = y * n + x
+            data[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(data, 'little')
+
+    def neighbors(self, board: int) -> int:
+        """Get every cell one step away from a set cell, in any direction, with wrapping."""
+        n = self.grid_size
+        right = ((board << 1) & self.not_first_column) | ((board & self.last_column) >> (n - 1))
+        left = ((board >> 1) & self.not_last_column) | ((board & self.first_column) << (n - 1))
+        down = ((board << n) & self.full) | (board >> self.last_row_shift)
+        up = (board >> n) | ((board & self.first_row) << self.last_row_shift)
+        return right | left | down | up
+
+    def flood_fill(self, start: int, free: int, limit: Optional[int] = None) -> int:
+        """
+        Get the free cells reachable from the start cells (which are always included).
+        With a limit, stop early once at least that many cells have been reached.
+        """
+        reached = start
+        frontier = start
+        while frontier:
+            frontier = self.neighbors(frontier) & free & ~reached
+            reached |= frontier
+            if limit is not None and popcount(reached) >= limit:
+                break
+        return reached
+
+    def reachable_area(self, pos: Tuple[int, int], free: int, limit: Optional[int] = None) -> int:
+        """Count the cells reachable from a cell through free cells, including the cell itself."""
+        return popcount(self.flood_fill(self.bit(pos), free, limit))
+
+# Bitboard helpers are shared by every game with the same board size
+_bitboards = {}
+
+def get_bitboard(grid_size: int) -> Bitboard:
+    """Get the bitboard helper for a grid size."""
+    bitboard = _bitboards.get(grid_size)
+    if bitboard is None:
+        bitboard = _bitboards[grid_size] = Bitboard(grid_size)
+    return bitboard
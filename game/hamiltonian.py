@@ -0,0 +1,117 @@
+import logging
+import os
+import tempfile
+from array import array
+from typing import Dict, Tuple
+import config
+
+log = logging.getLogger(__name__)
+
+class HamiltonianCycle:
+    """
+    A Hamiltonian cycle of the toroidal grid: a closed path visiting every cell once.
+
+    `order[y * n + x]` is the position of cell (x, y) along the cycle and
+    `cycle[k]` is the cell at position k, so stepping along the cycle and
+    measuring how far one cell lies ahead of another are O(1) lookups.
+    """
+
+    def __init__(self, grid_size: int, order: array):
+        self.grid_size = grid_size
+        self.size = grid_size * grid_size
+        self.order = order
+        self.cycle = array('I', bytes(4 * self.size))
+        for cell, position in enumerate(order):
+            self.cycle[position] = cell
+
+    @classmethod
+    def build(cls, grid_size: int) -> 'HamiltonianCycle':
+        """
+        Construct the cycle. Each row is walked rightwards for n - 1 steps, then the
+        path steps down; every row starts one column left of the previous one, so after
+        the last row stepping down wraps back to the start. This works for any board
+        size on a torus, including odd ones that have no cycle on a bounded grid.
+        """
+        order = array('I', bytes(4 * grid_size * grid_size))
+        position = 0
+        for y in range(grid_size):
+            start_x = -y % grid_size
+            for i in range(grid_size):
+                x = (start_x + i) % grid_size
+                order[y * grid_size + x] = position
+                position += 1
+        return cls(grid_size, order)
+
+    def index(self, pos: Tuple[int, int]) -> int:
+        """Get the position of a cell along the cycle."""
+        return self.order[pos[1] * self.grid_size + pos[0]]
+
+    def distance(self, start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        """Get the number of steps along the cycle from one cell forward to another."""
+        return (self.index(end) - self.index(start)) % self.size
+
+    def next_cell(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        """Get the cell following a cell along the cycle."""
+        cell = self.cycle[(self.index(pos) + 1) % self.size]
+        return cell % self.grid_size, cell // self.grid_size
+
+    def save(self, path: str) -> None:
+        """Write the cycle order to disk, atomically replacing any previous file."""
+        # A temporary file of its own, as tournament workers may all save the same cycle at once
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path),
+                                         suffix='.tmp', delete=False) as f:
+            self.order.tofile(f)
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    @classmethod
+    def load(cls, grid_size: int, path: str) -> 'HamiltonianCycle':
+        """Read a cycle order written by save(), raising ValueError if it isn't a cycle of this grid."""
+        size = grid_size * grid_size
+        order = array('I')
+        with open(path, 'rb') as f:
+            order.fromfile(f, size)
+            if f.read(1):
+                raise ValueError("trailing data after the cycle")
+        if sorted(order) != list(range(size)):
+            raise ValueError("not a permutation of the grid's cells")
+        cycle = cls(grid_size, order)
+        for position in range(size):
+            a, b = cycle.cycle[position], cycle.cycle[(position + 1) % size]
+            dx = (a % grid_size - b % grid_size) % grid_size
+            dy = (a // grid_size - b // grid_size) % grid_size
+            if (min(dx, grid_size - dx), min(dy, grid_size - dy)) not in ((0, 1), (1, 0)):
+                raise ValueError("consecutive cells are not adjacent")
+        return cycle
+
+# Cycles already built or loaded in this process, by grid size
+_cycles: Dict[int, HamiltonianCycle] = {}
+
+def get_hamiltonian_cycle(grid_size: int) -> HamiltonianCycle:
+    """Get the cycle for a grid size from memory, then from the disk cache, building it if needed."""
+    cycle = _cycles.get(grid_size)
+    if cycle is not None:
+        return cycle
+
+    path = os.path.join(config.AI_CACHE_DIR, f"hamiltonian_{grid_size}.bin")
+    try:
+        cycle = HamiltonianCycle.load(grid_size, path)
+    except FileNotFoundError:
+        cycle = None
+    except Exception as e:
+        # A truncated or corrupt cache must not leave the AI steering along a broken cycle
+        log.warning("Ignoring cached Hamiltonian cycle for grid size %d: %s", grid_size, e)
+        cycle = None
+    if cycle is None:
+        cycle = HamiltonianCycle.build(grid_size)
+        try:
+            os.makedirs(config.AI_CACHE_DIR, exist_ok=True)
+            cycle.save(path)
+        except OSError as e:
+            log.warning("Could not cache Hamiltonian cycle for grid size %d: %s", grid_size, e)
+
+    _cycles[grid_size] = cycle
+    return cycle
@@ -2,8 +2,25 @@ from typing import Dict, Tuple, List
 from PIL import Image, ImageDraw, ImageFont
 import io
 import base64
+import logging
 import config
 
+log = logging.getLogger(__name__)
+
+# Fonts are loaded when first drawn with and shared by every renderer
+_fonts = None
+
+def load_fonts():
+    """Get the (regular, large) fonts, loading them on first use."""
+    global _fonts
+    if _fonts is None:
+        # Try to load a font, fall back to default if not available
+        try:
+            _fonts = (ImageFont.truetype("arial.ttf", 14), ImageFont.truetype("arial.ttf", 24))
+        except IOError:
+            _fonts = (ImageFont.load_default(), ImageFont.load_default())
+    return _fonts
+
 class GameRenderer:
     def __init__(self, grid_size: int = config.GRID_SIZE, cell_size: int = config.CELL_SIZE):
         self.grid_size = grid_size
@@ -11,16 +28,26 @@ class GameRenderer:
         self.width = grid_size * cell_size
         self.height = grid_size * cell_size
 
-        # Try to load a font, fall back to default if not available
-        try:
-            self.font = ImageFont.truetype("arial.ttf", 14)
-            self.large_font = ImageFont.truetype("arial.ttf", 24)
-        except IOError:
-            self.font = ImageFont.load_default()
-            self.large_font = ImageFont.load_default()
+    @property
+    def font(self):
+        return load_fonts()[0]
+
+    @property
+    def large_font(self):
+        return load_fonts()[1]
 
     def render_game(self, game_state: Dict) -> str:
         """Render the game state to a base64 encoded PNG image."""
+        try:
+            png = self.encode_png(self.render_image(game_state))
+            return base64.b64encode(png).decode('utf-8')
+        except Exception as e:
+            log.error("Failed to encode game image: %s", e)
+            # Return a minimal valid base64 PNG as last resort
+            return "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC"
+
+    def render_image(self, game_state: Dict) -> Image.Image:
+        """Draw the game state to an image."""
         try:
             # Create a new image
             image = Image.new("RGB", (self.width, self.height), config.BLACK)
@@ -45,36 +72,34 @@ class GameRenderer:
             if game_state['game_over']:
                 self._draw_game_over(draw, game_state['winner'], game_state['snakes'])
 
-            # Convert image to base64 encoded string
-            buffer = io.BytesIO()
-            image.save(buffer, format="PNG")
-            img_str = base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-            return img_str
+            return image
         except Exception as e:
-            print(f"Error rendering game: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error rendering game: %s", e)
 
             # Create a simple fallback image with error message
+            fallback_image = Image.new("RGB", (self.width, self.height), config.BLACK)
             try:
-                fallback_image = Image.new("RGB", (self.width, self.height), config.BLACK)
                 fallback_draw = ImageDraw.Draw(fallback_image)
 
                 error_text = "Error rendering game"
                 fallback_draw.text((10, 10), error_text, fill=(255, 0, 0), font=self.font)
                 fallback_draw.text((10, 30), str(e), fill=(255, 0, 0), font=self.font)
-
-                buffer = io.BytesIO()
-                fallback_image.save(buffer, format="PNG")
-                return base64.b64encode(buffer.getvalue()).decode('utf-8')
             except Exception as fallback_error:
-                print(f"Failed to create fallback image: {fallback_error}")
-                # Return a minimal valid base64 PNG as last resort
-                return "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC"
+                log.error("Failed to create fallback image: %s", fallback_error)
+            return fallback_image
+
+    def encode_png(self, image: Image.Image) -> bytes:
+        """Encode a rendered image as PNG bytes."""
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
 
     def _draw_grid(self, draw: ImageDraw.Draw) -> None:
         """Draw the grid lines."""
+        # Cells on large arena boards are too small for grid lines to be useful
+        if self.cell_size < 4:
+            return
+
         # Draw vertical lines
         for x in range(0, self.width, self.cell_size):
             draw.line([(x, 0), (x, self.height)], fill=(50, 50, 50), width=1)
@@ -129,18 +154,24 @@ class GameRenderer:
                     fill=color
                 )
 
+    def _top_scores(self, snakes: Dict) -> List[Tuple[str, Dict]]:
+        """Get the players to list, keeping only the highest scores when there are too many."""
+        players = list(snakes.items())
+        if len(players) > config.MAX_SCORE_LINES:
+            players.sort(key=lambda item: item[1]['score'], reverse=True)
+            players = players[:config.MAX_SCORE_LINES]
+        return players
+
     def _draw_scores(self, draw: ImageDraw.Draw, snakes: Dict) -> None:
         """Draw the scores for each player."""
         try:
             y_offset = 10
-            for player_id, snake_data in snakes.items():
+            for player_id, snake_data in self._top_scores(snakes):
                 score_text = f"{player_id}: {snake_data['score']}"
                 draw.text((10, y_offset), score_text, fill=snake_data['color'], font=self.font)
                 y_offset += 20
         except Exception as e:
-            print(f"Error drawing scores: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error drawing scores: %s", e)
             # Continue without drawing scores
 
     def _draw_game_over(self, draw: ImageDraw.Draw, winner: str, snakes: Dict) -> None:
@@ -196,7 +227,7 @@ class GameRenderer:
 
             # Final scores
             y_offset = self.height // 2 + 20
-            for player_id, snake_data in snakes.items():
+            for player_id, snake_data in self._top_scores(snakes):
                 score_text = f"{player_id}: {snake_data['score']}"
 
                 # Get text dimensions
@@ -218,7 +249,5 @@ class GameRenderer:
             # Update the original image
             draw._image = image.convert('RGB')
         except Exception as e:
-            print(f"Error drawing game over screen: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error drawing game over screen: %s", e)
             # Continue without the game over screen
@@ -1,7 +1,12 @@
 import random
+from collections import deque
 from enum import Enum
-from typing import List, Tuple, Dict, Optional
+from itertools import islice
+from typing import List, Set, Tuple, Dict, Optional
 import config
+from game.spatial import SpatialHash
+from game.bitboard import get_bitboard
+from game.zobrist import get_zobrist, snake_key
 
 class Direction(Enum):
     UP = (0, -1)
@@ -10,47 +15,69 @@ class Direction(Enum):
     RIGHT = (1, 0)
 
 class Snake:
-    def __init__(self, start_pos: Tuple[int, int], color, player_id: str):
-        self.body = [start_pos]  # List of positions (x, y)
+    def __init__(self, start_pos: Tuple[int, int], color, player_id: str, grid_size: int = config.GRID_SIZE):
+        self.body = deque([start_pos])  # Positions (x, y), head first
         self.direction = Direction.RIGHT
         self.color = color
         self.player_id = player_id
+        self.grid_size = grid_size
         self.score = 0
         self.alive = True
         self.growth_pending = 3  # Start with a snake of length 4
+        # Turns waiting for upcoming ticks; deque appends and pops are atomic, so any thread may queue
+        self.pending_directions = deque(maxlen=config.INPUT_LOOKAHEAD)
+        self.hash_key = snake_key(player_id)  # Multiplies this snake's Zobrist keys (see game.zobrist)
+        self.zobrist = 0  # This snake's part of the game's Zobrist hash while alive
 
-    def move(self) -> None:
-        """Move the snake one step in the current direction."""
+    def move(self) -> Optional[Tuple[Tuple[int, int], Optional[Tuple[int, int]]]]:
+        """
+        Move the snake one step in the current direction.
+        Returns the new head and the removed tail (None while growing), or None if the snake is dead.
+        """
         if not self.alive:
-            return
+            return None
 
         # Get current head position
         head_x, head_y = self.body[0]
         
         # Calculate new head position based on direction
         dx, dy = self.direction.value
-        new_head = ((head_x + dx) % config.GRID_SIZE, 
-                   (head_y + dy) % config.GRID_SIZE)
+        new_head = ((head_x + dx) % self.grid_size, 
+                   (head_y + dy) % self.grid_size)
         
         # Add new head to the beginning of the body
-        self.body.insert(0, new_head)
+        self.body.appendleft(new_head)
         
         # If growth is pending, don't remove the tail
         if self.growth_pending > 0:
             self.growth_pending -= 1
-        else:
-            self.body.pop()  # Remove the tail
-
-    def change_direction(self, new_direction: Direction) -> None:
-        """Change the snake's direction if it's not a 180-degree turn."""
-        # Prevent 180-degree turns
-        if (self.direction == Direction.UP and new_direction == Direction.DOWN) or \
-           (self.direction == Direction.DOWN and new_direction == Direction.UP) or \
-           (self.direction == Direction.LEFT and new_direction == Direction.RIGHT) or \
-           (self.direction == Direction.RIGHT and new_direction == Direction.LEFT):
-            return
-        
+            return new_head, None
+
+        return new_head, self.body.pop()  # Remove the tail
+
+    def change_direction(self, new_direction: Direction) -> bool:
+        """Change the snake's direction unless it's unchanged or a 180-degree turn; returns whether it turned."""
+        dx, dy = self.direction.value
+        if new_direction.value in ((dx, dy), (-dx, -dy)):
+            return False
+
         self.direction = new_direction
+        return True
+
+    def queue_direction(self, new_direction: Direction) -> None:
+        """Queue a turn for an upcoming tick. When the queue is full the oldest turn is dropped."""
+        self.pending_directions.append(new_direction)
+
+    def apply_queued_direction(self) -> None:
+        """
+        Take the next turn that changes direction from the queue. Each turn is checked
+        against the direction at the tick it's applied, so a quick sequence of turns
+        can't reverse the snake, and later turns wait for later ticks.
+        """
+        pending = self.pending_directions
+        while pending:
+            if self.change_direction(pending.popleft()):
+                return
 
     def grow(self) -> None:
         """Make the snake grow by one segment."""
@@ -60,7 +87,7 @@ class Snake:
     def check_collision_with_self(self) -> bool:
         """Check if the snake has collided with itself."""
         head = self.body[0]
-        return head in self.body[1:]
+        return head in islice(self.body, 1, None)
 
     def check_collision_with_snake(self, other_snake) -> bool:
         """Check if the snake has collided with another snake."""
@@ -72,12 +99,18 @@ class Snake:
         return self.body[0]
 
 class SnakeGame:
-    def __init__(self, mode: str, ai_difficulty: str = None):
+    def __init__(self, mode: str, ai_difficulty: str = None, grid_size: int = None, food_count: int = 1):
         self.mode = mode
         self.ai_difficulty = ai_difficulty
-        self.grid_size = config.GRID_SIZE
+        self.grid_size = grid_size or config.GRID_SIZE
+        self.food_count = food_count  # Food items kept on the board at all times
         self.snakes: Dict[str, Snake] = {}
-        self.food: List[Tuple[int, int]] = []
+        self.food: Set[Tuple[int, int]] = set()
+        self.food_index = SpatialHash(self.grid_size)  # Buckets food by board region for nearest-food queries
+        self.occupied: Dict[Tuple[int, int], int] = {}  # Cell -> number of living snake segments on it
+        self._occupied_bits: Optional[int] = None  # Bitboard of occupied cells, rebuilt lazily after changes
+        self._zobrist = get_zobrist(self.grid_size)
+        self.zobrist = 0  # 64-bit hash of the living snakes and food, kept up to date on every change
         self.game_over = False
         self.winner = None
         self.tick_count = 0
@@ -88,13 +121,18 @@ class SnakeGame:
     def reset(self) -> None:
         """Reset the game state."""
         self.snakes = {}
-        self.food = []
+        self.food = set()
+        self.food_index.clear()
+        self.occupied = {}
+        self._occupied_bits = None
+        self.zobrist = 0
         self.game_over = False
         self.winner = None
         self.tick_count = 0
         
         # Create food
-        self.spawn_food()
+        for _ in range(self.food_count):
+            self.spawn_food()
 
     def add_player(self, player_id: str, color) -> None:
         """Add a player to the game."""
@@ -102,28 +140,88 @@ class SnakeGame:
         if len(self.snakes) == 0:
             # First player starts in the top left quadrant
             start_pos = (self.grid_size // 4, self.grid_size // 4)
-        else:
+        elif len(self.snakes) == 1:
             # Second player starts in the bottom right quadrant
             start_pos = (3 * self.grid_size // 4, 3 * self.grid_size // 4)
+        else:
+            # Further players (arena mode) start at a random spot with room to move
+            start_pos = self._find_empty_cell(clearance=config.SPAWN_CLEARANCE)
+            if start_pos is None:
+                raise ValueError(f"No room left on the board for player {player_id}")
         
         # Create a new snake for the player
-        self.snakes[player_id] = Snake(start_pos, color, player_id)
+        snake = self.snakes[player_id] = Snake(start_pos, color, player_id, self.grid_size)
+        self._occupy(start_pos)
+        snake.zobrist = self._zobrist.snake(snake.hash_key, snake.body)
+        self.zobrist ^= snake.zobrist
 
     def spawn_food(self) -> None:
         """Spawn food at a random empty position on the grid."""
-        # Get all occupied positions
-        occupied_positions = []
-        for snake in self.snakes.values():
-            occupied_positions.extend(snake.body)
-        occupied_positions.extend(self.food)
-        
-        # Find all empty positions
-        all_positions = [(x, y) for x in range(self.grid_size) for y in range(self.grid_size)]
-        empty_positions = [pos for pos in all_positions if pos not in occupied_positions]
-        
         # If there are empty positions, spawn food
-        if empty_positions:
-            self.food.append(random.choice(empty_positions))
+        position = self._find_empty_cell()
+        if position is not None:
+            self.food.add(position)
+            self.food_index.add(position)
+            self.zobrist ^= self._zobrist.food(position)
+
+    def has_food(self, pos: Tuple[int, int]) -> bool:
+        """Check if there is food at a position."""
+        return pos in self.food
+
+    def nearest_food(self, pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Get the food closest to a position (wrap-aware Manhattan distance), if any."""
+        return self.food_index.nearest(pos)
+
+    def _is_cell_free(self, pos: Tuple[int, int], clearance: int = 0) -> bool:
+        """Check that a cell, and the given number of cells to its right, hold no snake or food."""
+        x, y = pos
+        for i in range(clearance + 1):
+            cell = ((x + i) % self.grid_size, y)
+            if cell in self.occupied or cell in self.food:
+                return False
+        return True
+
+    def _find_empty_cell(self, clearance: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Pick a random free cell. Random probing finds one in a few tries unless the
+        board is nearly full, in which case it falls back to scanning every cell.
+        """
+        for _ in range(config.SPAWN_ATTEMPTS):
+            pos = (random.randrange(self.grid_size), random.randrange(self.grid_size))
+            if self._is_cell_free(pos, clearance):
+                return pos
+
+        # Find all empty positions
+        empty_positions = [(x, y) for x in range(self.grid_size) for y in range(self.grid_size)
+                           if self._is_cell_free((x, y), clearance)]
+        return random.choice(empty_positions) if empty_positions else None
+
+    def occupied_bitboard(self) -> int:
+        """Get the cells holding living snake segments as a bitboard (see game.bitboard)."""
+        if self._occupied_bits is None:
+            self._occupied_bits = get_bitboard(self.grid_size).from_cells(self.occupied)
+        return self._occupied_bits
+
+    def _occupy(self, pos: Tuple[int, int]) -> None:
+        """Record a snake segment entering a cell."""
+        self.occupied[pos] = self.occupied.get(pos, 0) + 1
+        self._occupied_bits = None
+
+    def _vacate(self, pos: Tuple[int, int]) -> None:
+        """Record a snake segment leaving a cell."""
+        count = self.occupied[pos] - 1
+        self._occupied_bits = None
+        if count:
+            self.occupied[pos] = count
+        else:
+            del self.occupied[pos]
+
+    def _kill(self, snake: Snake) -> None:
+        """Kill a snake; its body stops being an obstacle."""
+        snake.alive = False
+        self.zobrist ^= snake.zobrist
+        for segment in snake.body:
+            self._vacate(segment)
 
     def update(self) -> None:
         """Update the game state for one tick."""
@@ -132,10 +230,20 @@ class SnakeGame:
         
         self.tick_count += 1
         
-        # Move all snakes
+        # Apply one queued turn per snake, then move all snakes, updating the occupancy map and hash with each new head and removed tail
+        zobrist = self._zobrist
         for snake in self.snakes.values():
             if snake.alive:
-                snake.move()
+                if snake.pending_directions:
+                    snake.apply_queued_direction()
+                old_head = snake.body[0]
+                new_head, old_tail = snake.move()
+                self._occupy(new_head)
+                if old_tail is not None:
+                    self._vacate(old_tail)
+                change = zobrist.move(snake.hash_key, old_head, new_head, old_tail)
+                snake.zobrist ^= change
+                self.zobrist ^= change
         
         # Check for collisions with food
         for snake_id, snake in self.snakes.items():
@@ -147,23 +255,20 @@ class SnakeGame:
             # Check if snake ate food
             if head_pos in self.food:
                 self.food.remove(head_pos)
+                self.food_index.remove(head_pos)
+                self.zobrist ^= self._zobrist.food(head_pos)
                 snake.grow()
                 self.spawn_food()
         
-        # Check for collisions with self or other snakes
+        # Check for collisions with self or other snakes: a head sharing its cell
+        # with any other living segment has collided. Dead snakes are removed from
+        # the occupancy map straight away, so later snakes no longer collide with them.
         for snake_id, snake in self.snakes.items():
             if not snake.alive:
                 continue
-                
-            # Check collision with self
-            if snake.check_collision_with_self():
-                snake.alive = False
-            
-            # Check collision with other snakes
-            for other_id, other_snake in self.snakes.items():
-                if other_id != snake_id and other_snake.alive:
-                    if snake.check_collision_with_snake(other_snake):
-                        snake.alive = False
+
+            if self.occupied[snake.get_head_position()] > 1:
+                self._kill(snake)
         
         # Check if game is over
         alive_snakes = [s for s in self.snakes.values() if s.alive]
@@ -172,8 +277,8 @@ class SnakeGame:
             # All snakes are dead - it's a draw
             self.game_over = True
             self.winner = None
-        elif len(alive_snakes) == 1 and self.mode == config.MULTIPLAYER:
-            # In multiplayer mode, if only one snake is alive, they win
+        elif len(alive_snakes) == 1 and self.mode in (config.MULTIPLAYER, config.ARENA):
+            # In multiplayer and arena modes, if only one snake is alive, they win
             self.game_over = True
             self.winner = alive_snakes[0].player_id
         
@@ -187,19 +292,93 @@ class SnakeGame:
             'grid_size': self.grid_size,
             'snakes': {
                 player_id: {
-                    'body': snake.body,
+                    'body': list(snake.body),
                     'color': snake.color,
                     'score': snake.score,
                     'alive': snake.alive
                 } for player_id, snake in self.snakes.items()
             },
-            'food': self.food,
+            'food': list(self.food),
             'game_over': self.game_over,
             'winner': self.winner,
             'tick_count': self.tick_count
         }
 
+    def to_snapshot(self) -> Dict:
+        """Get a compact, JSON-friendly copy of everything needed to resume the game."""
+        return {
+            'mode': self.mode,
+            'ai_difficulty': self.ai_difficulty,
+            'grid_size': self.grid_size,
+            'food_count': self.food_count,
+            'tick_count': self.tick_count,
+            'game_over': self.game_over,
+            'winner': self.winner,
+            'food': [coord for pos in self.food for coord in pos],
+            'snakes': [
+                [player_id, [coord for pos in snake.body for coord in pos], snake.direction.name,
+                 list(snake.color), snake.score, snake.alive, snake.growth_pending]
+                for player_id, snake in self.snakes.items()
+            ]
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict) -> 'SnakeGame':
+        """Rebuild a game from to_snapshot() output."""
+        game = cls(data['mode'], data['ai_difficulty'], grid_size=data['grid_size'], food_count=data['food_count'])
+        game.tick_count = data['tick_count']
+        game.game_over = data['game_over']
+        game.winner = data['winner']
+
+        # Replace the food spawned by reset()
+        game.food = set()
+        game.food_index.clear()
+        food = data['food']
+        for i in range(0, len(food), 2):
+            pos = (food[i], food[i + 1])
+            game.food.add(pos)
+            game.food_index.add(pos)
+
+        for player_id, body, direction, color, score, alive, growth_pending in data['snakes']:
+            segments = [(body[i], body[i + 1]) for i in range(0, len(body), 2)]
+            snake = Snake(segments[0], tuple(color), player_id, game.grid_size)
+            snake.body = deque(segments)
+            snake.direction = Direction[direction]
+            snake.score = score
+            snake.alive = alive
+            snake.growth_pending = growth_pending
+            game.snakes[player_id] = snake
+            snake.zobrist = game._zobrist.snake(snake.hash_key, segments)
+            if alive:
+                for segment in segments:
+                    game._occupy(segment)
+
+        game.zobrist = game.compute_zobrist()
+        return game
+
+    def compute_zobrist(self) -> int:
+        """
+        Hash the board from scratch. Always equals the incrementally updated
+        `zobrist`; use check_zobrist() to verify that.
+        """
+        zobrist = self._zobrist
+        h = 0
+        for pos in self.food:
+            h ^= zobrist.food(pos)
+        for snake in self.snakes.values():
+            if snake.alive:
+                h ^= zobrist.snake(snake.hash_key, snake.body)
+        return h
+
+    def check_zobrist(self) -> bool:
+        """Check the incremental hash against one computed from scratch."""
+        return self.zobrist == self.compute_zobrist()
+
     def handle_input(self, player_id: str, direction: Direction) -> None:
-        """Handle input from a player to change their snake's direction."""
-        if player_id in self.snakes and self.snakes[player_id].alive:
-            self.snakes[player_id].change_direction(direction)
+        """
+        Queue input from a player to change their snake's direction on an upcoming tick.
+        Safe to call from any thread while the game updates.
+        """
+        snake = self.snakes.get(player_id)
+        if snake is not None and snake.alive:
+            snake.queue_direction(direction)
@@ -0,0 +1,137 @@
+from typing import AbstractSet, Dict, Iterator, Optional, Set, Tuple
+import config
+
+class SpatialHash:
+    """
+    Uniform grid hash over the cells of a toroidal board.
+
+    The board is split into roughly square buckets of at least `bucket_size`
+    cells per side. Points are kept in a set for O(1) membership and in their
+    bucket, so nearest-point queries only visit buckets close to the query.
+    """
+
+    def __init__(self, grid_size: int, bucket_size: int = config.SPATIAL_BUCKET_SIZE):
+        self.grid_size = grid_size
+        self.buckets_per_side = max(1, grid_size // bucket_size)
+        # Every bucket spans at least this many cells, which bounds distances across buckets
+        self.min_bucket_width = grid_size // self.buckets_per_side
+        # With few points, comparing against each of them beats walking mostly empty buckets
+        self.scan_threshold = max(16, 2 * self.buckets_per_side)
+        self.points: Set[Tuple[int, int]] = set()
+        self.buckets: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self.points
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self.points)
+
+    def bucket_of(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        """Get the bucket containing a cell."""
+        return (pos[0] * self.buckets_per_side // self.grid_size,
+                pos[1] * self.buckets_per_side // self.grid_size)
+
+    def add(self, pos: Tuple[int, int]) -> None:
+        """Add a point to the index."""
+        if pos in self.points:
+            return
+        self.points.add(pos)
+        self.buckets.setdefault(self.bucket_of(pos), set()).add(pos)
+
+    def remove(self, pos: Tuple[int, int]) -> None:
+        """Remove a point from the index if present."""
+        if pos not in self.points:
+            return
+        self.points.remove(pos)
+        key = self.bucket_of(pos)
+        bucket = self.buckets[key]
+        bucket.discard(pos)
+        if not bucket:
+            del self.buckets[key]
+
+    def clear(self) -> None:
+        """Remove every point."""
+        self.points.clear()
+        self.buckets.clear()
+
+    def distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
+        """Manhattan distance between two cells, accounting for grid wrapping."""
+        dx = abs(pos1[0] - pos2[0])
+        dy = abs(pos1[1] - pos2[1])
+        return min(dx, self.grid_size - dx) + min(dy, self.grid_size - dy)
+
+    def buckets_within(self, pos: Tuple[int, int], radius: int) -> Set[Tuple[int, int]]:
+        """Get the buckets overlapping the square of cells within `radius` (Chebyshev) of a cell, wrapping around."""
+        g = self.grid_size
+        n = self.buckets_per_side
+        if 2 * radius + 1 >= g:
+            return {(i, j) for i in range(n) for j in range(n)}
+        columns = {(pos[0] + offset) % g * n // g for offset in range(-radius, radius + 1)}
+        rows = {(pos[1] + offset) % g * n // g for offset in range(-radius, radius + 1)}
+        return {(i, j) for i in columns for j in rows}
+
+    def within(self, pos: Tuple[int, int], radius: int) -> Iterator[Tuple[int, int]]:
+        """Yield the points within `radius` cells (Chebyshev) of a cell, visiting only the buckets that overlap."""
+        g = self.grid_size
+        for key in self.buckets_within(pos, radius):
+            for point in self.buckets.get(key, ()):
+                dx = abs(point[0] - pos[0])
+                dy = abs(point[1] - pos[1])
+                if min(dx, g - dx) <= radius and min(dy, g - dy) <= radius:
+                    yield point
+
+    def _ring(self, center: Tuple[int, int], radius: int) -> Set[Tuple[int, int]]:
+        """Get the buckets exactly `radius` buckets away (Chebyshev) from a bucket, wrapping around."""
+        n = self.buckets_per_side
+        cx, cy = center
+        if radius == 0:
+            return {center}
+
+        ring = set()
+        for offset in range(-radius, radius + 1):
+            ring.add(((cx + offset) % n, (cy - radius) % n))
+            ring.add(((cx + offset) % n, (cy + radius) % n))
+            ring.add(((cx - radius) % n, (cy + offset) % n))
+            ring.add(((cx + radius) % n, (cy + offset) % n))
+        return ring
+
+    def nearest(self, pos: Tuple[int, int], skip: AbstractSet[Tuple[int, int]] = frozenset()) -> Optional[Tuple[int, int]]:
+        """
+        Find the point closest to a cell by toroidal Manhattan distance,
+        ignoring any points in `skip`. Searches rings of buckets outwards and
+        stops as soon as no unvisited bucket can hold a closer point.
+        """
+        if not self.points:
+            return None
+
+        if len(self.points) <= self.scan_threshold:
+            points = [point for point in self.points if point not in skip] if skip else self.points
+            return min(points, key=lambda point: self.distance(pos, point), default=None)
+
+        center = self.bucket_of(pos)
+        max_radius = self.buckets_per_side // 2
+        visited = set()
+        best = None
+        best_distance = None
+
+        for radius in range(max_radius + 1):
+            for key in self._ring(center, radius):
+                if key in visited:
+                    continue
+                visited.add(key)
+                for point in self.buckets.get(key, ()):
+                    if point in skip:
+                        continue
+                    d = self.distance(pos, point)
+                    if best_distance is None or d < best_distance:
+                        best = point
+                        best_distance = d
+
+            # Points in the next ring are at least radius * width + 1 cells away
+            if best_distance is not None and best_distance <= radius * self.min_bucket_width:
+                break
+
+        return best
@@ -0,0 +1,220 @@
+"""
+Headless AI-vs-AI tournament.
+
+Plays SnakeAI against SnakeAI for every pair of difficulties at full speed
+across a process pool and writes a JSON report with win rates, game lengths,
+ticks/sec and per-decision latency percentiles, plus the depth reached and
+nodes searched per second by searching AIs (master).
+
+Usage:
+    python -m game.tournament [--games 20] [--difficulties easy medium hard expert master]
+                              [--workers N] [--output report.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import config
+from game.snake import SnakeGame
+from game.ai import SnakeAI
+
+# Seats in every game; seat 'a' is checked for collisions first, so matchups alternate seats
+SEATS = ('a', 'b')
+
+def play_game(difficulty_a: str, difficulty_b: str, seed: int, grid_size: int, max_ticks: int) -> Dict:
+    """Play one game between two AIs and report its outcome and timings."""
+    random.seed(seed)
+    game = SnakeGame(config.MULTIPLAYER, grid_size=grid_size)
+    game.add_player('a', config.GREEN)
+    game.add_player('b', config.BLUE)
+    ais = [SnakeAI(game, difficulty_a, 'a'), SnakeAI(game, difficulty_b, 'b')]
+    latencies: Dict[str, List[float]] = {'a': [], 'b': []}
+    searches: Dict[str, List[Tuple[int, float]]] = {'a': [], 'b': []}  # Depth and nodes/sec of searching AIs
+
+    start = time.perf_counter()
+    while not game.game_over and game.tick_count < max_ticks:
+        for ai in ais:
+            if game.snakes[ai.snake_id].alive:
+                decision_start = time.perf_counter()
+                direction = ai.get_next_move()
+                latencies[ai.snake_id].append(time.perf_counter() - decision_start)
+                if ai.last_search:
+                    searches[ai.snake_id].append((ai.last_search['depth'], ai.last_search['nodes_per_sec']))
+                game.handle_input(ai.snake_id, direction)
+        game.update()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'difficulties': {'a': difficulty_a, 'b': difficulty_b},
+        'seed': seed,
+        'winner': game.winner,
+        'timed_out': not game.game_over,
+        'ticks': game.tick_count,
+        'seconds': elapsed,
+        'scores': {seat: game.snakes[seat].score for seat in SEATS},
+        'latencies': latencies,
+        'searches': searches,
+    }
+
+def _play(args: Tuple) -> Dict:
+    return play_game(*args)
+
+def _percentiles(values: List[float], scale: float = 1.0) -> Dict[str, float]:
+    """Summarize values with the usual percentiles."""
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def pick(pct: float) -> float:
+        return values[min(len(values) - 1, int(pct / 100.0 * len(values)))] * scale
+
+    return {
+        'mean': sum(values) / len(values) * scale,
+        'p50': pick(50),
+        'p90': pick(90),
+        'p99': pick(99),
+        'max': values[-1] * scale,
+    }
+
+def build_schedule(difficulties: List[str], games: int, seed: int) -> List[Tuple[str, str, int]]:
+    """List the games to play: every pair of difficulties (mirrors included), alternating seats."""
+    schedule = []
+    for first, second in itertools.combinations_with_replacement(difficulties, 2):
+        for i in range(games):
+            if i % 2 == 0:
+                schedule.append((first, second, seed + len(schedule)))
+            else:
+                schedule.append((second, first, seed + len(schedule)))
+    return schedule
+
+def build_report(results: List[Dict], wall_seconds: float, settings: Dict) -> Dict:
+    """Aggregate game results into the tournament report."""
+    matchups: Dict[Tuple[str, str], Dict] = {}
+    per_difficulty: Dict[str, Dict] = {}
+
+    for result in results:
+        seats = result['difficulties']
+        key = tuple(sorted(seats.values()))
+        matchup = matchups.setdefault(key, {
+            'difficulties': list(key),
+            'games': 0, 'wins': {}, 'draws': 0, 'timeouts': 0,
+            'lengths': [], 'ticks': 0, 'seconds': 0.0,
+        })
+        matchup['games'] += 1
+        matchup['lengths'].append(result['ticks'])
+        matchup['ticks'] += result['ticks']
+        matchup['seconds'] += result['seconds']
+        if result['timed_out']:
+            matchup['timeouts'] += 1
+        elif result['winner'] is None:
+            matchup['draws'] += 1
+        elif seats['a'] != seats['b']:
+            winner = seats[result['winner']]
+            matchup['wins'][winner] = matchup['wins'].get(winner, 0) + 1
+
+        for seat, difficulty in seats.items():
+            stats = per_difficulty.setdefault(difficulty, {
+                'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'scores': [], 'latencies': [], 'searches': [],
+            })
+            stats['games'] += 1
+            stats['scores'].append(result['scores'][seat])
+            stats['latencies'].extend(result['latencies'][seat])
+            stats['searches'].extend(result['searches'][seat])
+            if result['timed_out'] or result['winner'] is None:
+                stats['draws'] += 1
+            elif result['winner'] == seat:
+                stats['wins'] += 1
+            else:
+                stats['losses'] += 1
+
+    total_ticks = sum(result['ticks'] for result in results)
+    return {
+        'settings': settings,
+        'totals': {
+            'games': len(results),
+            'ticks': total_ticks,
+            'wall_seconds': wall_seconds,
+            'ticks_per_sec': total_ticks / wall_seconds if wall_seconds else 0.0,
+        },
+        'matchups': [
+            {
+                'difficulties': matchup['difficulties'],
+                'games': matchup['games'],
+                'wins': matchup['wins'],
+                'win_rates': {difficulty: wins / matchup['games'] for difficulty, wins in matchup['wins'].items()},
+                'draws': matchup['draws'],
+                'timeouts': matchup['timeouts'],
+                'game_length': _percentiles(matchup['lengths']),
+                'ticks_per_sec': matchup['ticks'] / matchup['seconds'] if matchup['seconds'] else 0.0,
+            }
+            for matchup in matchups.values()
+        ],
+        'difficulties': {
+            difficulty: {
+                'games': stats['games'],
+                'wins': stats['wins'],
+                'losses': stats['losses'],
+                'draws': stats['draws'],
+                'win_rate': stats['wins'] / stats['games'],
+                'score': _percentiles(stats['scores']),
+                'decision_us': _percentiles(stats['latencies'], scale=1e6),
+                **({
+                    'search_depth': _percentiles([depth for depth, _ in stats['searches']]),
+                    'nodes_per_sec': _percentiles([rate for _, rate in stats['searches']]),
+                } if stats['searches'] else {}),
+            }
+            for difficulty, stats in per_difficulty.items()
+        },
+    }
+
+def run_tournament(difficulties: List[str], games: int, grid_size: int, max_ticks: int,
+                   workers: Optional[int], seed: int) -> Dict:
+    """Play the whole schedule across a process pool and build the report."""
+    schedule = build_schedule(difficulties, games, seed)
+    tasks = [(a, b, game_seed, grid_size, max_ticks) for a, b, game_seed in schedule]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_play, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))))
+    wall_seconds = time.perf_counter() - start
+
+    settings = {
+        'difficulties': difficulties,
+        'games_per_matchup': games,
+        'grid_size': grid_size,
+        'max_ticks': max_ticks,
+        'workers': workers or os.cpu_count(),
+        'seed': seed,
+    }
+    return build_report(results, wall_seconds, settings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless AI-vs-AI tournament")
+    parser.add_argument('--games', type=int, default=20, help="Games per pair of difficulties")
+    parser.add_argument('--difficulties', nargs='+',
+                        default=[config.AI_EASY, config.AI_MEDIUM, config.AI_HARD, config.AI_EXPERT, config.AI_MASTER])
+    parser.add_argument('--grid-size', type=int, default=config.GRID_SIZE)
+    parser.add_argument('--max-ticks', type=int, default=5000, help="Ticks before a game counts as a draw")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_tournament(args.difficulties, args.games, args.grid_size, args.max_ticks, args.workers, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        totals = report['totals']
+        print(f"Played {totals['games']} games ({totals['ticks']} ticks) in {totals['wall_seconds']:.1f}s; "
+              f"report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
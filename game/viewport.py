@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Tuple
+from game.snake import SnakeGame
+
+class BoardIndex:
+    """
+    The living snakes' segments on one tick, bucketed on the same grid as the
+    game's food index.
+
+    Built once per tick and shared by every viewport cut from it, so a
+    viewport only visits the buckets it overlaps and costs the same however
+    large the board is.
+    """
+
+    def __init__(self, game: SnakeGame):
+        self.game = game
+        self.segments: Dict[Tuple[int, int], List[Tuple[str, int, int, int]]] = {}  # Bucket -> (snake_id, index, x, y)
+        bucket_of = game.food_index.bucket_of
+        for snake_id, snake in game.snakes.items():
+            if not snake.alive:
+                continue
+            for i, pos in enumerate(snake.body):
+                self.segments.setdefault(bucket_of(pos), []).append((snake_id, i, pos[0], pos[1]))
+
+    def viewport(self, follow: str, radius: int) -> Tuple[Dict, Dict]:
+        """
+        Cut out the square of cells within `radius` of a snake's head.
+        Returns a to_snapshot()-shaped copy of the game holding only what's
+        inside it, and the view: its origin and size, and the snakes shown
+        only in part, with whether their head is among the part shown.
+        """
+        game = self.game
+        g = game.grid_size
+        size = 2 * radius + 1
+        followed = game.snakes.get(follow)
+        center = followed.body[0] if followed else (g // 2, g // 2)
+        ox = (center[0] - radius) % g
+        oy = (center[1] - radius) % g
+
+        # Visible segments of each snake, in body order; the followed snake is always sent whole
+        visible: Dict[str, List[Tuple[int, int, int]]] = {}
+        for key in game.food_index.buckets_within(center, radius):
+            for snake_id, i, x, y in self.segments.get(key, ()):
+                if snake_id != follow and (x - ox) % g < size and (y - oy) % g < size:
+                    visible.setdefault(snake_id, []).append((i, x, y))
+
+        snakes = []
+        partial: Dict[str, bool] = {}
+        if followed:
+            snakes.append(_snapshot_snake(follow, followed, [coord for pos in followed.body for coord in pos]))
+        for snake_id, segments in visible.items():
+            snake = game.snakes[snake_id]
+            segments.sort()
+            if len(segments) < len(snake.body):
+                partial[snake_id] = segments[0][0] == 0
+            snakes.append(_snapshot_snake(snake_id, snake, [coord for _, x, y in segments for coord in (x, y)]))
+
+        state = {
+            'mode': game.mode,
+            'ai_difficulty': game.ai_difficulty,
+            'grid_size': g,
+            'food_count': game.food_count,
+            'tick_count': game.tick_count,
+            'game_over': game.game_over,
+            'winner': game.winner,
+            'food': [coord for pos in game.food_index.within(center, radius) for coord in pos],
+            'snakes': snakes,
+        }
+        view = {'x': ox, 'y': oy, 'size': size, 'follow': follow, 'partial': partial}
+        return state, view
+
+def _snapshot_snake(snake_id: str, snake, body: List[int]) -> List:
+    """A snake in to_snapshot() form, with the given flattened body."""
+    return [snake_id, body, snake.direction.name, list(snake.color), snake.score, snake.alive, snake.growth_pending]
+
+def render_minimap(game: SnakeGame, size: int) -> Optional[str]:
+    """
+    Shrink the board to size x size cells, row by row: '2' where there's a
+    living snake, '1' where there's only food, '0' otherwise.
+    """
+    g = game.grid_size
+    if size <= 0 or size >= g:
+        return None
+    cells = bytearray(b'0' * (size * size))
+    for x, y in game.food:
+        cells[y * size // g * size + x * size // g] = 0x31
+    for x, y in game.occupied:
+        cells[y * size // g * size + x * size // g] = 0x32
+    return cells.decode('ascii')
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+MASK = (1 << 64) - 1
+SEED = 0x736E656B  # 'snek'
+HEAD_SALT = 0x9E3779B97F4A7C15  # Mixed into a cell's key for a snake's head
+FOOD_FACTOR = 0xD6E8FEB86659FD93  # Odd, so multiplying by it maps distinct keys to distinct keys
+
+def splitmix64(state: int) -> Tuple[int, int]:
+    """Advance a splitmix64 generator; returns the new state and the next value."""
+    state = (state + 0x9E3779B97F4A7C15) & MASK
+    z = state
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return state, z ^ (z >> 31)
+
+@lru_cache(maxsize=4096)
+def snake_key(player_id: str) -> int:
+    """An odd 64-bit number for a snake, from the 64-bit FNV-1a hash of its ID."""
+    h = 0xCBF29CE484222325
+    for byte in player_id.encode('utf-8'):
+        h = ((h ^ byte) * 0x100000001B3) & MASK
+    return splitmix64(h)[1] | 1
+
+class Zobrist:
+    """
+    Random 64-bit keys for hashing a board position.
+
+    A position hashes to the XOR of a key for every living snake segment, one
+    more for every living snake's head, and one for every food. A snake's key
+    for a cell is the cell's key times an odd number derived from the snake's
+    ID, so the same cells held by different snakes hash differently while
+    every snake shares one key per cell. Moving, eating or dying changes a
+    few keys, so SnakeGame keeps its hash up to date with a few XORs instead
+    of rehashing the board.
+
+    Direction is left out, as the head and the segment behind it give it, and
+    so is pending growth. Cell keys come from splitmix64 with a fixed seed and
+    snake numbers from the ID, so every process gets the same hash for the
+    same position.
+    """
+
+    def __init__(self, grid_size: int):
+        self.grid_size = grid_size
+        self.cells = []
+        state = SEED
+        for _ in range(grid_size * grid_size):
+            state, value = splitmix64(state)
+            self.cells.append(value)
+
+    def segment(self, key: int, pos: Tuple[int, int]) -> int:
+        """The key for a segment of the snake with the given snake_key() on a cell."""
+        return (self.cells[pos[1] * self.grid_size + pos[0]] * key) & MASK
+
+    def head(self, key: int, pos: Tuple[int, int]) -> int:
+        """The extra key for the snake's head being on a cell."""
+        return ((self.cells[pos[1] * self.grid_size + pos[0]] ^ HEAD_SALT) * key) & MASK
+
+    def food(self, pos: Tuple[int, int]) -> int:
+        """The key for food on a cell."""
+        return (self.cells[pos[1] * self.grid_size + pos[0]] * FOOD_FACTOR) & MASK
+
+    def move(self, key: int, old_head: Tuple[int, int], new_head: Tuple[int, int],
+             old_tail: Optional[Tuple[int, int]] = None) -> int:
+        """The change to a snake's hash when its head moves on, and its tail with it unless growing."""
+        # Inlined, as it runs for every snake on every tick; masking once at the end gives the same low 64 bits
+        cells = self.cells
+        g = self.grid_size
+        new = cells[new_head[1] * g + new_head[0]]
+        change = new * key ^ (new ^ HEAD_SALT) * key ^ (cells[old_head[1] * g + old_head[0]] ^ HEAD_SALT) * key
+        if old_tail is not None:
+            change ^= cells[old_tail[1] * g + old_tail[0]] * key
+        return change & MASK
+
+    def snake(self, key: int, body: Iterable[Tuple[int, int]]) -> int:
+        """Hash a living snake from scratch, head first."""
+        h = 0
+        for i, pos in enumerate(body):
+            h ^= self.segment(key, pos)
+            if i == 0:
+                h ^= self.head(key, pos)
+        return h
+
+# Keys are shared by every game with the same board size
+_tables = {}
+
+def get_zobrist(grid_size: int) -> Zobrist:
+    """Get the keys for a grid size."""
+    table = _tables.get(grid_size)
+    if table is None:
+        table = _tables[grid_size] = Zobrist(grid_size)
+    return table
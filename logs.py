@@ -0,0 +1,158 @@
+"""
+Non-blocking structured logging.
+
+Records are put on a bounded queue by a QueueHandler and written by a
+QueueListener on its own thread, so code on the event loop never waits on
+stdout or a pipe. Formatting also happens on that thread: the producer only
+merges the message with its arguments, and tracebacks are formatted when the
+record is written. If the writer falls behind and the queue fills, records
+are dropped and counted rather than blocking.
+
+Records carry the channel of the game they came from (`game`), either passed
+with extra= or taken from the running task's context, and repeats of the
+same warning or error for the same game are rate limited: the first
+LOG_ERROR_BURST in each LOG_ERROR_WINDOW are logged, the rest are dropped,
+and the next one logged says how many were suppressed. Output is one JSON
+object per line (LOG_FORMAT=json) or plain text.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, Hashable, List, Optional, TextIO
+import config
+from metrics import REGISTRY
+
+LOG_DROPPED = REGISTRY.counter('snek_log_dropped', 'Log records dropped because the log queue was full')
+LOG_SUPPRESSED = REGISTRY.counter('snek_log_suppressed', 'Repeated warnings and errors suppressed per game')
+
+# Attributes every LogRecord has; anything else on a record was passed with extra=
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'game', 'suppressed'
+}
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single-line JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'game', None) is not None:
+            entry['game'] = record.game
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Plain lines, with the game and suppressed repeats appended when there are any."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, 'game', None) is not None:
+            line += f" [game {record.game}]"
+        if getattr(record, 'suppressed', 0):
+            line += f" ({record.suppressed} similar suppressed)"
+        return line
+
+class GameRateLimitFilter(logging.Filter):
+    """Tags records with their game and drops repeats of the same warning or error for a game."""
+
+    def __init__(self, game: Optional[contextvars.ContextVar] = None,
+                 burst: int = config.LOG_ERROR_BURST, window: float = config.LOG_ERROR_WINDOW):
+        super().__init__()
+        self.game = game
+        self.burst = burst
+        self.window = window
+        self.windows: Dict[Hashable, List] = {}  # (game, logger, message, level) -> [window start, logged, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'game', None) is None:
+            record.game = self.game.get() if self.game is not None else None
+        if record.levelno < logging.WARNING or record.game is None or not self.burst:
+            return True
+
+        # The unformatted message identifies the error, whatever the details in its arguments
+        now = time.monotonic()
+        key = (record.game, record.name, record.msg, record.levelno)
+        state = self.windows.get(key)
+        if state is None or now - state[0] >= self.window:
+            if len(self.windows) >= 10000:
+                self._prune(now)
+            suppressed = state[2] if state else 0
+            self.windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        LOG_SUPPRESSED.inc()
+        return False
+
+    def _prune(self, now: float) -> None:
+        """Forget windows that have ended, so finished games don't accumulate."""
+        for key in [key for key, state in self.windows.items() if now - state[0] >= self.window]:
+            del self.windows[key]
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them, and drops them when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, as they may change before the record is written;
+        # the traceback is formatted by the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+def setup_logging(game: Optional[contextvars.ContextVar] = None, level: str = config.LOG_LEVEL,
+                  log_format: str = config.LOG_FORMAT,
+                  max_queue: int = config.LOG_QUEUE_SIZE, stream: Optional[TextIO] = None) -> logging.handlers.QueueListener:
+    """Send the root logger's records through a queue to a thread writing them to stderr; returns the started listener."""
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(max_queue))
+    handler.addFilter(GameRateLimitFilter(game))
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    """Write out whatever is still queued, unless the queue is full because output is stuck."""
+    try:
+        listener.stop()
+    except queue.Full:
+        pass
@@ -1,6 +1,8 @@
 import asyncio
 import discord
 import config
+import logs
+from discord_integration import monitoring
 from discord_integration.bot import SnakeBot
 
 async def main():
@@ -11,6 +13,9 @@ async def main():
         print("Please create a .env file with your Discord bot token.")
         return
 
+    # Errors from game tasks are tagged with their game
+    logs.setup_logging(game=monitoring.current_game)
+
     # Create and start the bot
     bot = SnakeBot()
 
@@ -0,0 +1,177 @@
+"""
+Minimal Prometheus-style metrics.
+
+Counters, gauges and histograms are kept in a registry and rendered in the
+Prometheus text exposition format. Recording a value is a lock and a few
+arithmetic operations, so metrics can sit on per-tick hot paths.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default histogram buckets in seconds, from 50us to 10s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Format label pairs as {name="value",...}."""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Base class for metrics with optional labels."""
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> '_Metric':
+        """Get the child metric for a set of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self) -> '_Metric':
+        raise NotImplementedError
+
+    def _samples_for(self, name: str, label_names: Sequence[str], label_values: Sequence[str]) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        if self.label_names:
+            for values, child in sorted(self._children.items()):
+                lines.extend(child._samples_for(self.name, self.label_names, values))
+        else:
+            lines.extend(self._samples_for(self.name, (), ()))
+        return '\n'.join(lines)
+
+class Counter(_Metric):
+    """A value that only goes up."""
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.value = 0.0
+
+    def _new_child(self) -> 'Counter':
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def _samples_for(self, name, label_names, label_values) -> List[str]:
+        return [f'{name}_total{_format_labels(label_names, label_values)} {_format_value(self.value)}']
+
+class Gauge(_Metric):
+    """A value that can go up and down, or be read from a function at scrape time."""
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self) -> 'Gauge':
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the gauge's value from a function whenever it is rendered."""
+        self._function = function
+
+    def _samples_for(self, name, label_names, label_values) -> List[str]:
+        value = self._function() if self._function else self.value
+        return [f'{name}{_format_labels(label_names, label_values)} {_format_value(value)}']
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets and tracks their sum."""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot counts observations above every bucket
+        self.sum = 0.0
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def _samples_for(self, name, label_names, label_values) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            labels = _format_labels(label_names, label_values, ('le', _format_value(bound)))
+            lines.append(f'{name}_bucket{labels} {cumulative}')
+        labels = _format_labels(label_names, label_values)
+        lines.append(f'{name}_sum{labels} {_format_value(self.sum)}')
+        lines.append(f'{name}_count{labels} {cumulative}')
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and renders them for scraping."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        return '\n'.join(metric.render() for metric in self.metrics.values()) + '\n'
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Registry shared by everything in the process
+REGISTRY = MetricsRegistry()
@@ -1,7 +1,16 @@
+import hmac
 import os
-from flask import Flask, send_from_directory, request, jsonify
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Optional, Tuple
+from flask import Flask, Response, send_from_directory, request, jsonify
 from flask_cors import CORS
 import config
+from metrics import REGISTRY, CONTENT_TYPE
 
 app = Flask(__name__, static_folder='web')
 
@@ -17,6 +26,62 @@ CORS(app, resources={r"/*": cors_config})  # Enable CORS with specific settings
 # Get the base URL from config or environment
 BASE_URL = config.EMBEDDED_APP_URL
 
+class FrameStore:
+    """In-memory store holding the latest rendered frame of each game."""
+
+    def __init__(self, max_games: int = config.FRAME_STORE_MAX_GAMES):
+        self.max_games = max_games
+        self._frames: "OrderedDict[str, Tuple[bytes, int, float]]" = OrderedDict()  # game_id -> (png, version, timestamp)
+        self._lock = threading.Lock()
+
+    def put(self, game_id: str, png: bytes, version: int) -> None:
+        """Replace a game's frame, evicting the least recently updated game when full."""
+        with self._lock:
+            self._frames[game_id] = (png, version, time.time())
+            self._frames.move_to_end(game_id)
+            while len(self._frames) > self.max_games:
+                self._frames.popitem(last=False)
+
+    def get(self, game_id: str) -> Optional[Tuple[bytes, int, float]]:
+        """Get a game's latest frame as (png, version, timestamp)."""
+        with self._lock:
+            return self._frames.get(game_id)
+
+    def discard(self, game_id: str) -> None:
+        """Forget a game's frame."""
+        with self._lock:
+            self._frames.pop(game_id, None)
+
+frame_store = FrameStore()
+
+# Server metrics, exposed at /metrics
+FRAMES_STORED = REGISTRY.gauge('snek_frame_store_games', 'Games with a frame in the frame store')
+FRAMES_STORED.set_function(lambda: len(frame_store._frames))
+FRAMES_PUBLISHED = REGISTRY.counter('snek_frames_published', 'Frames published by the bot')
+FRAME_REQUESTS = REGISTRY.counter('snek_frame_requests', 'Frame requests by response status', ('status',))
+BOT_METRICS_UP = REGISTRY.gauge('snek_bot_metrics_up', "Whether the bot's metrics were included in the last scrape")
+
+def _is_frame_push_authorized() -> bool:
+    """Check that a frame upload comes from the bot."""
+    if config.FRAME_PUSH_TOKEN:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {config.FRAME_PUSH_TOKEN}')
+    # Behind a reverse proxy every request comes from the local machine, so production always needs the token
+    if config.SERVER_MODE == config.SERVER_PRODUCTION:
+        return False
+    # Without a shared token the development server only accepts uploads from the local machine
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+def check_frame_push_token() -> None:
+    """Refuse to serve live frames in production without a token, and warn when running without one."""
+    if config.FRAME_PUSH_TOKEN:
+        return
+    if config.SERVER_MODE != config.SERVER_PRODUCTION:
+        print("Warning: FRAME_PUSH_TOKEN is not set; accepting frame uploads from the local machine without one")
+    elif config.LIVE_FRAMES:
+        sys.exit("FRAME_PUSH_TOKEN must be set to serve live frames in production mode")
+    else:
+        print("Warning: FRAME_PUSH_TOKEN is not set; frame uploads are disabled")
+
 @app.route('/', strict_slashes=False)
 def index():
     """Serve the main HTML file."""
@@ -52,7 +117,9 @@ def get_config():
         'gridSize': config.GRID_SIZE,
         'cellSize': config.CELL_SIZE,
         'fps': config.FPS,
+        'inputLookahead': config.INPUT_LOOKAHEAD,
         'baseUrl': BASE_URL,
+        'liveStateUrl': config.LIVE_STATE_URL,
         'colors': {
             'black': config.BLACK,
             'white': config.WHITE,
@@ -83,6 +150,74 @@ def exchange_token():
         'expires_in': 604800
     })
 
+@app.route('/api/games/<game_id>/frame.png', methods=['GET', 'HEAD'])
+def get_game_frame(game_id):
+    """Serve the latest rendered frame of a game."""
+    frame = frame_store.get(game_id)
+    if frame is None:
+        FRAME_REQUESTS.labels(404).inc()
+        return jsonify({'error': 'No frame for this game'}), 404
+
+    png, version, timestamp = frame
+    response = Response(png, mimetype='image/png')
+    response.set_etag(f'{game_id}-{version}')
+    response.last_modified = timestamp
+
+    # A URL carrying the current version always maps to the same bytes, so it can
+    # be cached forever; the unversioned URL must be revalidated every time
+    if request.args.get('v') == str(version):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+
+    response = response.make_conditional(request)
+    FRAME_REQUESTS.labels(response.status_code).inc()
+    return response
+
+@app.route('/api/games/<game_id>/frame.png', methods=['PUT'])
+def put_game_frame(game_id):
+    """Store the latest rendered frame of a game (pushed by the bot)."""
+    if not _is_frame_push_authorized():
+        return jsonify({'error': 'Not authorized to publish frames'}), 403
+
+    try:
+        version = int(request.args.get('v', '0'))
+    except ValueError:
+        return jsonify({'error': 'Invalid frame version'}), 400
+
+    frame_store.put(game_id, request.get_data(), version)
+    FRAMES_PUBLISHED.inc()
+    return '', 204
+
+@app.route('/api/games/<game_id>/frame.png', methods=['DELETE'])
+def delete_game_frame(game_id):
+    """Drop the frame of a finished game (called by the bot)."""
+    if not _is_frame_push_authorized():
+        return jsonify({'error': 'Not authorized to discard frames'}), 403
+
+    frame_store.discard(game_id)
+    return '', 204
+
+def _bot_metrics() -> str:
+    """Fetch the bot's own metrics (ticks, rendering, loop lag), which live in the bot process."""
+    if not config.METRICS_PORT:
+        BOT_METRICS_UP.set(0)
+        return ''
+    try:
+        with urllib.request.urlopen(f'http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics', timeout=1) as response:
+            body = response.read().decode('utf-8')
+    except (OSError, ValueError):
+        BOT_METRICS_UP.set(0)
+        return ''
+    BOT_METRICS_UP.set(1)
+    return body
+
+@app.route('/metrics')
+def metrics():
+    """Expose server metrics, followed by the bot's, in Prometheus text format."""
+    bot_metrics = _bot_metrics()
+    return Response(REGISTRY.render() + bot_metrics, headers={'Content-Type': CONTENT_TYPE})
+
 @app.route('/api/check-discord')
 def check_discord():
     """Check if the request is coming from Discord."""
@@ -174,6 +309,63 @@ def discord_activity():
 
     return response
 
+def run_production_server(port: int) -> None:
+    """Serve the app with waitress: a pool of worker threads, keep-alive and graceful shutdown."""
+    from waitress import create_server, wasyncore
+
+    server = create_server(
+        app,
+        host=config.SERVER_HOST,
+        port=port,
+        threads=config.SERVER_WORKERS,
+        channel_timeout=config.SERVER_KEEPALIVE,
+        connection_limit=config.SERVER_CONNECTION_LIMIT,
+        ident='snek'
+    )
+
+    # Stop on SIGTERM or Ctrl+C between loop iterations rather than interrupting one,
+    # as waitress stops writing responses as soon as its loop exits
+    stopping = threading.Event()
+
+    def handle_stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    def poll() -> None:
+        wasyncore.loop(timeout=server.adj.asyncore_loop_timeout, map=server._map,
+                       use_poll=server.adj.asyncore_use_poll, count=1)
+
+    print(f"Serving on http://{config.SERVER_HOST}:{port} "
+          f"({config.SERVER_WORKERS} workers, {config.SERVER_KEEPALIVE}s keep-alive)")
+    try:
+        while not stopping.is_set():
+            poll()
+
+        # Stop accepting connections, close idle keep-alive ones and wait for
+        # in-flight requests to send their responses
+        server.del_channel()
+        server.socket.close()
+        deadline = time.monotonic() + config.SERVER_SHUTDOWN_TIMEOUT
+        while server.active_channels and time.monotonic() < deadline:
+            for channel in list(server.active_channels.values()):
+                if not channel.requests and not channel.total_outbufs_len:
+                    channel.will_close = True
+            poll()
+        if server.active_channels:
+            print(f"Closing {len(server.active_channels)} connection(s) still busy after "
+                  f"{config.SERVER_SHUTDOWN_TIMEOUT}s")
+    finally:
+        server.task_dispatcher.shutdown()
+        server.close()
+        print("Server shut down")
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5010))
-    app.run(host='127.0.0.1', port=port, debug=True)
+    check_frame_push_token()
+
+    if config.SERVER_MODE == config.SERVER_PRODUCTION:
+        run_production_server(port)
+    else:
+        app.run(host=config.SERVER_HOST, port=port, debug=True)
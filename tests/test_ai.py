@@ -0,0 +1,34 @@
+import unittest
+import config
+from game.snake import SnakeGame
+from game.ai import AdversarialSearch, WIN, MATE
+
+def game_with(mode: str, players: int) -> SnakeGame:
+    """A board small enough that every snake is within AI_SEARCH_RADIUS of the others."""
+    game = SnakeGame(mode, config.AI_MASTER, grid_size=8, food_count=1)
+    for i in range(players):
+        game.add_player(f'ai_{i}', config.BLUE)
+    return game
+
+class AdversarialSearchTest(unittest.TestCase):
+    def test_opponent_death_wins_only_when_it_ends_the_game(self):
+        search = AdversarialSearch(game_with(config.MULTIPLAYER, 2), 'ai_0', {})
+        self.assertEqual(search._terminal([1], 3), WIN - 3)
+
+        # Other snakes are still playing, so the opponent dying is no win
+        search = AdversarialSearch(game_with(config.ARENA, 3), 'ai_0', {})
+        self.assertIsNotNone(search.opponent_id)
+        self.assertLess(search._terminal([1], 3), MATE)
+        self.assertEqual(search._terminal([0], 3), -WIN + 3)
+        self.assertEqual(search._terminal([0, 1], 3), -WIN + 3)
+
+    def test_table_entries_are_per_opponent(self):
+        table = {}
+        search = AdversarialSearch(game_with(config.MULTIPLAYER, 2), 'ai_0', table)
+        search.deadline = float('inf')
+        search._value(2, -WIN - 1, WIN + 1, 0)
+        self.assertTrue(table)
+        self.assertTrue(all(key[1] == search.opponent_id for key in table))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from benchmarks.batch_ai import run_parity
+from game import batch_ai
+
+@unittest.skipIf(batch_ai.np is None, "numpy is not installed")
+class BatchAIParityTest(unittest.TestCase):
+    def assertParity(self, games: int, grid_size: int, snakes: int, ticks: int, seed: int) -> None:
+        """Seeded games must play out identically with batched and one-at-a-time decisions."""
+        result = run_parity(games, grid_size, snakes, ticks, seed)
+        self.assertGreater(result['decisions'], 0)
+        self.assertIsNone(result['first_mismatch_tick'], result)
+
+    def test_default_board(self):
+        for seed in range(3):
+            self.assertParity(games=10, grid_size=20, snakes=2, ticks=200, seed=seed)
+
+    def test_crowded_odd_board(self):
+        # Many snakes on a small odd board, so moves are often blocked and flood fills wrap
+        self.assertParity(games=10, grid_size=11, snakes=6, ticks=200, seed=0)
+
+    def test_widest_batched_board(self):
+        # The widest board whose rows fit one uint64
+        self.assertParity(games=3, grid_size=64, snakes=4, ticks=100, seed=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+import aiohttp
+from discord_integration.embedded_app import EmbeddedAppManager, FramePublisher
+
+PNG = b'\x89PNG\r\n\x1a\nnot really an image'
+
+class FramePublisherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.manager = EmbeddedAppManager()
+        self.assertTrue(await self.manager.start_server())
+        self.publisher = FramePublisher(server_url=None, manager=self.manager)
+
+    async def asyncTearDown(self):
+        await self.publisher.close()
+        self.manager.stop_server()
+
+    async def test_frames_reach_the_started_server(self):
+        self.assertEqual(self.publisher.server_url, self.manager.server_url)
+        self.assertIsNotNone(await self.publisher.publish(1, PNG, 7))
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'{self.manager.server_url}/api/games/1/frame.png') as response:
+                self.assertEqual(response.status, 200)
+                self.assertEqual(await response.read(), PNG)
+
+if __name__ == '__main__':
+    unittest.main()
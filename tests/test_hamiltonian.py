@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from array import array
+from unittest import mock
+from game import hamiltonian
+from game.hamiltonian import HamiltonianCycle, get_hamiltonian_cycle
+
+GRID_SIZE = 6
+
+class HamiltonianCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, f"hamiltonian_{GRID_SIZE}.bin")
+        patcher = mock.patch('config.AI_CACHE_DIR', self.directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(hamiltonian._cycles.clear)
+        hamiltonian._cycles.clear()
+
+    def write(self, order: array) -> None:
+        with open(self.path, 'wb') as f:
+            order.tofile(f)
+
+    def assertValid(self, cycle: HamiltonianCycle) -> None:
+        expected = HamiltonianCycle.build(GRID_SIZE)
+        self.assertEqual(cycle.order, expected.order)
+
+    def test_saved_cycle_loads(self):
+        HamiltonianCycle.build(GRID_SIZE).save(self.path)
+        self.assertValid(HamiltonianCycle.load(GRID_SIZE, self.path))
+
+    def test_corrupt_caches_are_rebuilt(self):
+        good = HamiltonianCycle.build(GRID_SIZE).order
+        corrupt = {
+            'truncated': good[:-1],
+            'trailing data': good + array('I', [0]),
+            'duplicate cell': array('I', [0] * len(good)),
+            'out of range': array('I', [len(good) + i for i in range(len(good))]),
+            # Row by row, so each row's last cell jumps diagonally to the next row's first
+            'not adjacent': array('I', range(len(good))),
+        }
+        for name, order in corrupt.items():
+            with self.subTest(name):
+                hamiltonian._cycles.clear()
+                self.write(order)
+                with self.assertLogs('game.hamiltonian', 'WARNING'):
+                    self.assertValid(get_hamiltonian_cycle(GRID_SIZE))
+                # The rebuilt cycle replaces the bad cache
+                self.assertValid(HamiltonianCycle.load(GRID_SIZE, self.path))
+
+if __name__ == '__main__':
+    unittest.main()
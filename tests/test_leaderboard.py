@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from itertools import count
+from unittest import mock
+from discord_integration.leaderboard import Leaderboard, GLOBAL, MAX_FLUSH_RETRIES
+
+GUILD_ID = 42
+
+class LeaderboardFlushTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'leaderboard.db')
+        self.leaderboard = Leaderboard(path=self.path, size=10, flush_interval=3600)
+        await self.leaderboard.start()
+
+    async def asyncTearDown(self):
+        await self.leaderboard.stop()
+        self.directory.cleanup()
+
+    def stored(self):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(
+                'SELECT scope, user_id, best_score, games FROM best_scores ORDER BY scope, user_id'
+            ).fetchall()
+
+    async def test_failed_write_is_retried(self):
+        self.leaderboard.record(GUILD_ID, 1, 'one', 5, True)
+        write = self.leaderboard._write
+
+        def failing_write(batch):
+            raise sqlite3.OperationalError('database is locked')
+
+        self.leaderboard._write = failing_write
+        await self.leaderboard.flush()
+        self.assertEqual(len(self.leaderboard.pending), 2)
+
+        self.leaderboard._write = write
+        self.leaderboard.record(GUILD_ID, 2, 'two', 3, False)
+        await self.leaderboard.flush()
+        self.assertEqual(self.leaderboard.pending, [])
+        self.assertEqual(self.stored(), [(GLOBAL, 1, 5, 1), (GLOBAL, 2, 3, 1), (GUILD_ID, 1, 5, 1), (GUILD_ID, 2, 3, 1)])
+
+    async def test_results_are_dropped_after_repeated_failures(self):
+        def failing_write(batch):
+            raise sqlite3.OperationalError('disk I/O error')
+
+        self.leaderboard._write = failing_write
+        for i in range(MAX_FLUSH_RETRIES):
+            self.leaderboard.record(GUILD_ID, i, 'player', i, False)
+            await self.leaderboard.flush()
+        self.assertEqual(self.leaderboard.pending, [])
+
+    async def test_ties_keep_first_to_reach_the_score(self):
+        with mock.patch('time.time', side_effect=count(1000)):
+            self.leaderboard.record(GUILD_ID, 1, 'one', 5, False)
+            self.leaderboard.record(GUILD_ID, 2, 'two', 5, False)
+            self.leaderboard.record(GUILD_ID, 1, 'one', 2, False)  # A later, worse game keeps the earlier best
+        expected = [(5, 1, 'one'), (5, 2, 'two')]
+        self.assertEqual(self.leaderboard.get_top(GUILD_ID), expected)
+        await self.leaderboard.stop()
+
+        reloaded = Leaderboard(path=self.path, size=10, flush_interval=3600)
+        await reloaded.start()
+        self.leaderboard = reloaded
+        self.assertEqual(reloaded.get_top(GUILD_ID), expected)
+
+if __name__ == '__main__':
+    unittest.main()
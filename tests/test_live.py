@@ -0,0 +1,56 @@
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import config
+from game.snake import SnakeGame, Direction
+from discord_integration.live import LiveServer, live_token, verify_live_token
+
+CHANNEL_ID = 1
+USER_ID = '1234'
+
+class LiveTokenTest(unittest.TestCase):
+    def test_token_is_bound_to_channel_and_user(self):
+        token = live_token(CHANNEL_ID, USER_ID)
+        self.assertTrue(verify_live_token(CHANNEL_ID, USER_ID, token))
+        self.assertFalse(verify_live_token(CHANNEL_ID + 1, USER_ID, token))
+        self.assertFalse(verify_live_token(CHANNEL_ID, '5678', token))
+        self.assertFalse(verify_live_token(CHANNEL_ID, USER_ID, None))
+        self.assertFalse(verify_live_token(CHANNEL_ID, USER_ID, '0' * len(token)))
+
+class LiveAuthTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        game = SnakeGame(config.SINGLEPLAYER, config.AI_EASY)
+        game.add_player('player', config.GREEN)
+        self.games = {CHANNEL_ID: {'game': game, 'players': {USER_ID: 'player'}}}
+        self.live = LiveServer(self.games, lambda *args: None)
+        app = web.Application()
+        app.router.add_get('/games/{channel_id}/live', self.live.handle_live)
+        self.client = TestClient(TestServer(app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def send_turn(self, query: str) -> int:
+        """Connect with a query string, send a turn, and count the turns the server scheduled."""
+        async with self.client.ws_connect(f'/games/{CHANNEL_ID}/live?{query}') as ws:
+            self.assertEqual((await ws.receive_json())['inputLookahead'], config.INPUT_LOOKAHEAD)
+            await ws.receive_json()  # Initial state
+            await ws.send_json({'type': 'input', 'seq': 1, 'tick': 1, 'direction': Direction.UP.name})
+            # Replies come in order, so the turn has been handled once the pong arrives
+            await ws.send_json({'type': 'ping', 'time': 0})
+            while (await ws.receive_json())['type'] != 'pong':
+                pass
+        return len(self.live.channels[CHANNEL_ID].inputs)
+
+    async def test_player_with_token_steers(self):
+        self.assertEqual(await self.send_turn(f'user={USER_ID}&token={live_token(CHANNEL_ID, USER_ID)}'), 1)
+
+    async def test_unsigned_user_only_watches(self):
+        self.assertEqual(await self.send_turn(f'user={USER_ID}'), 0)
+
+    async def test_forged_token_only_watches(self):
+        self.assertEqual(await self.send_turn(f'user={USER_ID}&token={live_token(CHANNEL_ID, "5678")}'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
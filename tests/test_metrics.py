@@ -0,0 +1,35 @@
+import asyncio
+import socket
+import unittest
+from unittest import mock
+import config
+import server
+from discord_integration.monitoring import MetricsServer
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class CombinedMetricsTest(unittest.IsolatedAsyncioTestCase):
+    async def scrape(self) -> str:
+        response = await asyncio.get_running_loop().run_in_executor(None, server.app.test_client().get, '/metrics')
+        return response.get_data(as_text=True)
+
+    async def test_web_server_includes_bot_metrics(self):
+        port = free_port()
+        with mock.patch.object(config, 'METRICS_HOST', '127.0.0.1'), mock.patch.object(config, 'METRICS_PORT', port):
+            self.assertIn('snek_bot_metrics_up 0', await self.scrape())
+
+            bot_metrics = MetricsServer(host='127.0.0.1', port=port)
+            self.assertTrue(await bot_metrics.start())
+            try:
+                body = await self.scrape()
+            finally:
+                await bot_metrics.stop()
+        self.assertIn('snek_bot_metrics_up 1', body)
+        self.assertIn('snek_frame_store_games', body)
+        self.assertIn('snek_tick_seconds', body)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import random
+import unittest
+import config
+from game.snake import SnakeGame, Direction
+
+class ZobristParityTest(unittest.TestCase):
+    def play(self, grid_size: int, snakes: int, food: int, ticks: int, seed: int) -> None:
+        """Play a game with random turns, checking the incremental hash against a full rehash every tick."""
+        random.seed(seed)
+        directions = list(Direction)
+        game = SnakeGame(config.ARENA, config.AI_EASY, grid_size=grid_size, food_count=food)
+        for i in range(snakes):
+            game.add_player(f'snake_{i}', config.GREEN)
+        self.assertEqual(game.zobrist, game.compute_zobrist())
+        for tick in range(ticks):
+            if game.game_over:
+                break
+            for player_id in game.snakes:
+                if random.random() < 0.2:
+                    game.handle_input(player_id, random.choice(directions))
+            game.update()
+            self.assertEqual(game.zobrist, game.compute_zobrist(), f"tick {tick}")
+            if tick % 25 == 0:
+                self.assertEqual(SnakeGame.from_snapshot(game.to_snapshot()).zobrist, game.zobrist, f"tick {tick}")
+
+    def test_small_board(self):
+        # Crowded, so snakes eat, collide head-on and die often
+        for seed in range(5):
+            self.play(grid_size=12, snakes=8, food=6, ticks=300, seed=seed)
+
+    def test_arena_board(self):
+        self.play(grid_size=config.ARENA_GRID_SIZE, snakes=20, food=16, ticks=300, seed=0)
+
+    def test_positions_hash_differently(self):
+        game = SnakeGame(config.ARENA, config.AI_EASY, grid_size=20, food_count=0)
+        game.add_player('a', config.GREEN)
+        before = game.zobrist
+        game.update()
+        self.assertNotEqual(game.zobrist, before)
+
+if __name__ == '__main__':
+    unittest.main()
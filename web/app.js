@@ -4,6 +4,7 @@ const CELL_SIZE = 20;
 const GAME_WIDTH = GRID_SIZE * CELL_SIZE;
 const GAME_HEIGHT = GRID_SIZE * CELL_SIZE;
 const FPS = 10;
+let INPUT_LOOKAHEAD = 3; // Turns that can be queued ahead; replaced by config.INPUT_LOOKAHEAD from the server
 
 // Colors
 const BLACK = '#000000';
@@ -61,10 +62,11 @@ window.addEventListener('resize', adjustCanvasForDiscord);
 let game = null;
 let ai = null;
 let gameLoop = null;
+let liveClient = null; // Connection to the bot's game when playing one
 let clientId = ''; // Replace with your Discord client ID
 
 // Initialize the game
-async function initGame(mode = 'singleplayer', difficulty = 'medium', isActivity = false) {
+async function initGame(mode = 'singleplayer', difficulty = 'medium', isActivity = false, liveUrl = null) {
     console.log(`Initializing game: mode=${mode}, difficulty=${difficulty}, isActivity=${isActivity}`);
 
     // Create a new game
@@ -104,10 +106,62 @@ async function initGame(mode = 'singleplayer', difficulty = 'medium', isActivity
         console.log('Initializing as standalone game');
     }
 
+    // Play the bot's game in this channel when its live state is available
+    if (liveUrl && window.discordContext.channelId) {
+        startLiveGame(liveUrl);
+        return;
+    }
+
     // Start the game loop
     startGameLoop();
 }
 
+// Connect to the bot's game in this channel, predicting the player's snake locally
+function startLiveGame(liveUrl) {
+    const userId = window.discordContext.userId || (currentUser && currentUser.id) || '';
+    const url = `${liveUrl.replace(/\/$/, '')}/games/${window.discordContext.channelId}/live` +
+                `?user=${encodeURIComponent(userId)}` +
+                `&token=${encodeURIComponent(window.discordContext.liveToken || '')}`;
+    console.log(`Connecting to live game at ${url}`);
+
+    ai = null;
+    liveClient = new LiveGameClient(url, 'player', {
+        onClose: () => {
+            if (!liveClient.gameOver) {
+                gameStatusElement.textContent = 'Disconnected from the game';
+            }
+        }
+    });
+    liveClient.connect();
+
+    if (gameLoop) {
+        clearInterval(gameLoop);
+    }
+    gameLoop = setInterval(() => {
+        liveClient.step();
+        if (!liveClient.game) return;
+
+        game = liveClient.game;
+        renderGame();
+        updateScores();
+
+        if (liveClient.gameOver) {
+            clearInterval(gameLoop);
+            gameLoop = null;
+            showGameOver();
+        }
+    }, 1000 / FPS);
+}
+
+// Turn the player's snake, through the server when playing the bot's game
+function steer(direction) {
+    if (liveClient) {
+        liveClient.input(direction);
+    } else if (game) {
+        game.handleInput('player', direction);
+    }
+}
+
 // Start the game loop
 function startGameLoop() {
     // Clear any existing game loop
@@ -138,25 +192,29 @@ function startGameLoop() {
         if (game.gameOver) {
             clearInterval(gameLoop);
             gameLoop = null;
+            showGameOver();
+        }
+    }, 1000 / FPS);
+}
 
-            // Update game status
-            if (game.winner) {
-                const winnerName = game.winner === 'player' ? 'You' :
-                                  (game.winner === 'ai' ? 'AI' : 'Player ' + game.winner);
-                gameStatusElement.textContent = `Game Over! Winner: ${winnerName}`;
-            } else {
-                gameStatusElement.textContent = 'Game Over! It\'s a draw!';
-            }
+// Show the result of a finished game
+function showGameOver() {
+    // Update game status
+    if (game.winner) {
+        const winnerName = game.winner === 'player' ? 'You' :
+                          (game.winner === 'ai' ? 'AI' : 'Player ' + game.winner);
+        gameStatusElement.textContent = `Game Over! Winner: ${winnerName}`;
+    } else {
+        gameStatusElement.textContent = 'Game Over! It\'s a draw!';
+    }
 
-            // Update Discord activity state
-            if (window.discordContext && window.discordContext.isActivity) {
-                updateActivityState('Game Over');
-            }
+    // Update Discord activity state
+    if (window.discordContext && window.discordContext.isActivity) {
+        updateActivityState('Game Over');
+    }
 
-            // Show restart button or instructions
-            showRestartInstructions();
-        }
-    }, 1000 / FPS);
+    // Show restart button or instructions
+    showRestartInstructions();
 }
 
 // Update scores in the UI
@@ -188,15 +246,63 @@ function showRestartInstructions() {
     const gameStatusElement = document.getElementById('game-status');
     if (!gameStatusElement) return;
 
-    if (window.discordContext && window.discordContext.isActivity) {
+    if (liveClient) {
+        gameStatusElement.innerHTML += '<br>Use /snek to play again!';
+    } else if (window.discordContext && window.discordContext.isActivity) {
         gameStatusElement.innerHTML += '<br>Type "/restart" to play again!';
     } else {
         gameStatusElement.innerHTML += '<br>Press R to restart';
     }
 }
 
+// Draw the server's overview of the whole board in a corner, with the part in view outlined
+function drawMinimap(minimap, view, gridSize) {
+    const width = Math.round(GAME_WIDTH / 5);
+    const left = GAME_WIDTH - width - 4;
+    const top = 4;
+    const cell = width / minimap.size;
+
+    ctx.fillStyle = 'rgba(0, 0, 0, 0.6)';
+    ctx.fillRect(left, top, width, width);
+    for (let i = 0; i < minimap.cells.length; i++) {
+        const value = minimap.cells[i];
+        if (value === '0') continue;
+        ctx.fillStyle = value === '2' ? '#AAAAAA' : RED;
+        ctx.fillRect(left + (i % minimap.size) * cell, top + Math.floor(i / minimap.size) * cell, cell, cell);
+    }
+
+    // The view can wrap past the board's edges, so it's outlined in up to four pieces
+    const scale = width / gridSize;
+    ctx.save();
+    ctx.beginPath();
+    ctx.rect(left, top, width, width);
+    ctx.clip();
+    ctx.strokeStyle = WHITE;
+    ctx.lineWidth = 1;
+    for (const dx of [0, -gridSize]) {
+        for (const dy of [0, -gridSize]) {
+            ctx.strokeRect(left + (view.x + dx) * scale, top + (view.y + dy) * scale, view.size * scale, view.size * scale);
+        }
+    }
+    ctx.restore();
+    ctx.strokeStyle = '#666666';
+    ctx.strokeRect(left, top, width, width);
+}
+
 // Render the game
 function renderGame() {
+    // Get the game state
+    const state = game.getState();
+
+    // Boards larger than the default (arena games) are drawn with smaller cells,
+    // and only the part in view when the server sends a viewport
+    const view = state.view;
+    const cellSize = GAME_WIDTH / view.size;
+    const inView = pos => (pos.x - view.x + state.gridSize) % state.gridSize < view.size &&
+                          (pos.y - view.y + state.gridSize) % state.gridSize < view.size;
+    const screenX = pos => (pos.x - view.x + state.gridSize) % state.gridSize * cellSize;
+    const screenY = pos => (pos.y - view.y + state.gridSize) % state.gridSize * cellSize;
+
     // Clear the canvas
     ctx.fillStyle = BLACK;
     ctx.fillRect(0, 0, GAME_WIDTH, GAME_HEIGHT);
@@ -206,7 +312,7 @@ function renderGame() {
     ctx.lineWidth = 1;
 
     // Draw vertical lines
-    for (let x = 0; x <= GAME_WIDTH; x += CELL_SIZE) {
+    for (let x = 0; x <= GAME_WIDTH; x += cellSize) {
         ctx.beginPath();
         ctx.moveTo(x, 0);
         ctx.lineTo(x, GAME_HEIGHT);
@@ -214,28 +320,26 @@ function renderGame() {
     }
 
     // Draw horizontal lines
-    for (let y = 0; y <= GAME_HEIGHT; y += CELL_SIZE) {
+    for (let y = 0; y <= GAME_HEIGHT; y += cellSize) {
         ctx.beginPath();
         ctx.moveTo(0, y);
         ctx.lineTo(GAME_WIDTH, y);
         ctx.stroke();
     }
 
-    // Get the game state
-    const state = game.getState();
-
     // Draw food
     state.food.forEach(food => {
-        const x = food.x * CELL_SIZE;
-        const y = food.y * CELL_SIZE;
+        if (!inView(food)) return;
+        const x = screenX(food);
+        const y = screenY(food);
 
         // Draw a red apple-like shape
         ctx.fillStyle = RED;
         ctx.beginPath();
         ctx.arc(
-            x + CELL_SIZE / 2,
-            y + CELL_SIZE / 2,
-            CELL_SIZE / 2 - 2,
+            x + cellSize / 2,
+            y + cellSize / 2,
+            cellSize / 2 - 2,
             0,
             Math.PI * 2
         );
@@ -248,8 +352,9 @@ function renderGame() {
 
         // Draw each segment of the snake
         snake.body.forEach((segment, index) => {
-            const x = segment.x * CELL_SIZE;
-            const y = segment.y * CELL_SIZE;
+            if (!inView(segment)) return;
+            const x = screenX(segment);
+            const y = screenY(segment);
 
             if (index === 0) {
                 // Head
@@ -257,17 +362,17 @@ function renderGame() {
                 ctx.fillRect(
                     x + 1,
                     y + 1,
-                    CELL_SIZE - 2,
-                    CELL_SIZE - 2
+                    cellSize - 2,
+                    cellSize - 2
                 );
 
                 // Eyes
                 ctx.fillStyle = WHITE;
-                const eyeSize = Math.max(2, CELL_SIZE / 5);
+                const eyeSize = Math.max(2, cellSize / 5);
                 ctx.beginPath();
                 ctx.arc(
-                    x + CELL_SIZE / 3,
-                    y + CELL_SIZE / 3,
+                    x + cellSize / 3,
+                    y + cellSize / 3,
                     eyeSize / 2,
                     0,
                     Math.PI * 2
@@ -276,8 +381,8 @@ function renderGame() {
 
                 ctx.beginPath();
                 ctx.arc(
-                    x + 2 * CELL_SIZE / 3,
-                    y + CELL_SIZE / 3,
+                    x + 2 * cellSize / 3,
+                    y + cellSize / 3,
                     eyeSize / 2,
                     0,
                     Math.PI * 2
@@ -289,8 +394,8 @@ function renderGame() {
                 ctx.fillRect(
                     x + 2,
                     y + 2,
-                    CELL_SIZE - 4,
-                    CELL_SIZE - 4
+                    cellSize - 4,
+                    cellSize - 4
                 );
             }
         });
@@ -298,6 +403,10 @@ function renderGame() {
         // We'll handle score updates in the updateScores function
     });
 
+    if (state.minimap) {
+        drawMinimap(state.minimap, view, state.gridSize);
+    }
+
     // Draw game over message if applicable
     if (state.gameOver) {
         // Semi-transparent overlay
@@ -334,19 +443,19 @@ function renderGame() {
 
 // Set up control buttons
 document.getElementById('up-btn').addEventListener('click', () => {
-    if (game) game.handleInput('player', Direction.UP);
+    steer(Direction.UP);
 });
 
 document.getElementById('down-btn').addEventListener('click', () => {
-    if (game) game.handleInput('player', Direction.DOWN);
+    steer(Direction.DOWN);
 });
 
 document.getElementById('left-btn').addEventListener('click', () => {
-    if (game) game.handleInput('player', Direction.LEFT);
+    steer(Direction.LEFT);
 });
 
 document.getElementById('right-btn').addEventListener('click', () => {
-    if (game) game.handleInput('player', Direction.RIGHT);
+    steer(Direction.RIGHT);
 });
 
 // Set up keyboard controls
@@ -355,21 +464,21 @@ document.addEventListener('keydown', (event) => {
 
     switch (event.key) {
         case 'ArrowUp':
-            game.handleInput('player', Direction.UP);
+            steer(Direction.UP);
             break;
         case 'ArrowDown':
-            game.handleInput('player', Direction.DOWN);
+            steer(Direction.DOWN);
             break;
         case 'ArrowLeft':
-            game.handleInput('player', Direction.LEFT);
+            steer(Direction.LEFT);
             break;
         case 'ArrowRight':
-            game.handleInput('player', Direction.RIGHT);
+            steer(Direction.RIGHT);
             break;
         case 'r':
         case 'R':
             // Restart the game if it's over
-            if (game.gameOver) {
+            if (game.gameOver && !liveClient) {
                 restartGame();
             }
             break;
@@ -413,6 +522,7 @@ window.addEventListener('load', () => {
     const mode = urlParams.get('mode') || 'singleplayer';
     const difficulty = urlParams.get('difficulty') || 'medium';
     const isActivity = urlParams.get('is_activity') === 'true';
+    let liveUrl = urlParams.get('live'); // Live state server of the bot, overriding the server config
 
     // Get Discord-specific parameters
     const guildId = urlParams.get('guild_id');
@@ -424,7 +534,9 @@ window.addEventListener('load', () => {
         guildId,
         channelId,
         activityId,
-        isActivity
+        isActivity,
+        userId: urlParams.get('user'), // Used until the Discord SDK identifies the user
+        liveToken: urlParams.get('token') // Lets the player steer their snake over live state
     };
 
     console.log('Discord context:', window.discordContext);
@@ -496,9 +608,13 @@ window.addEventListener('load', () => {
             if (config.clientId) {
                 clientId = config.clientId;
             }
+            if (config.inputLookahead) {
+                INPUT_LOOKAHEAD = config.inputLookahead;
+            }
+            liveUrl = liveUrl || config.liveStateUrl;
 
             // Initialize the game with the activity flag
-            initGame(mode, difficulty, window.discordContext.isActivity);
+            initGame(mode, difficulty, window.discordContext.isActivity, liveUrl);
 
             // Update UI based on mode
             updateUIForMode(mode);
@@ -507,7 +623,7 @@ window.addEventListener('load', () => {
             console.error('Failed to fetch config:', error);
 
             // Initialize the game with default settings
-            initGame(mode, difficulty, window.discordContext.isActivity);
+            initGame(mode, difficulty, window.discordContext.isActivity, liveUrl);
 
             // Update UI based on mode
             updateUIForMode(mode);
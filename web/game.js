@@ -1,19 +1,23 @@
 class Direction {
-    static UP = { x: 0, y: -1 };
-    static DOWN = { x: 0, y: 1 };
-    static LEFT = { x: -1, y: 0 };
-    static RIGHT = { x: 1, y: 0 };
+    // Names match the Python engine's Direction enum, which the server sends
+    static UP = { x: 0, y: -1, name: 'UP' };
+    static DOWN = { x: 0, y: 1, name: 'DOWN' };
+    static LEFT = { x: -1, y: 0, name: 'LEFT' };
+    static RIGHT = { x: 1, y: 0, name: 'RIGHT' };
 }
 
 class Snake {
-    constructor(startX, startY, color, id) {
+    constructor(startX, startY, color, id, gridSize = GRID_SIZE) {
         this.body = [{ x: startX, y: startY }];
         this.direction = Direction.RIGHT;
         this.color = color;
         this.id = id;
+        this.gridSize = gridSize;
         this.score = 0;
         this.alive = true;
         this.growthPending = 3; // Start with a snake of length 4
+        this.pendingDirections = []; // Turns waiting for upcoming ticks, oldest first
+        this.frozen = false; // Only part of the snake is in view and not its head, so it can't be moved
     }
 
     move() {
@@ -24,13 +28,13 @@ class Snake {
         
         // Calculate new head position based on direction
         const newHead = {
-            x: (head.x + this.direction.x) % GRID_SIZE,
-            y: (head.y + this.direction.y) % GRID_SIZE
+            x: (head.x + this.direction.x) % this.gridSize,
+            y: (head.y + this.direction.y) % this.gridSize
         };
         
         // Handle negative values (wrap around)
-        if (newHead.x < 0) newHead.x = GRID_SIZE - 1;
-        if (newHead.y < 0) newHead.y = GRID_SIZE - 1;
+        if (newHead.x < 0) newHead.x = this.gridSize - 1;
+        if (newHead.y < 0) newHead.y = this.gridSize - 1;
         
         // Add new head to the beginning of the body
         this.body.unshift(newHead);
@@ -55,6 +59,27 @@ class Snake {
         this.direction = newDirection;
     }
 
+    queueDirection(newDirection) {
+        // Queue a turn for an upcoming tick; when the queue is full the oldest turn is dropped
+        this.pendingDirections.push(newDirection);
+        if (this.pendingDirections.length > INPUT_LOOKAHEAD) {
+            this.pendingDirections.shift();
+        }
+    }
+
+    applyQueuedDirection() {
+        // Take the next turn that changes direction, skipping repeats and 180-degree turns,
+        // exactly like Snake.apply_queued_direction in the Python engine
+        while (this.pendingDirections.length > 0) {
+            const newDirection = this.pendingDirections.shift();
+            if (newDirection !== this.direction &&
+                (newDirection.x !== -this.direction.x || newDirection.y !== -this.direction.y)) {
+                this.direction = newDirection;
+                return;
+            }
+        }
+    }
+
     grow() {
         this.growthPending++;
         this.score++;
@@ -80,9 +105,13 @@ class Snake {
 }
 
 class SnakeGame {
-    constructor(mode = 'singleplayer', aiDifficulty = 'medium') {
+    constructor(mode = 'singleplayer', aiDifficulty = 'medium', gridSize = GRID_SIZE) {
         this.mode = mode;
         this.aiDifficulty = aiDifficulty;
+        this.gridSize = gridSize;
+        this.predicting = false; // Set on copies of a server's game: no food is spawned and the game never ends locally
+        this.view = null; // { x, y, size, follow }: the part of a large board the server sends, following a snake
+        this.minimap = null; // { size, cells }: the server's coarse overview of the whole board
         this.snakes = {};
         this.food = [];
         this.gameOver = false;
@@ -109,14 +138,47 @@ class SnakeGame {
         let startPos;
         if (Object.keys(this.snakes).length === 0) {
             // First player starts in the top left quadrant
-            startPos = { x: Math.floor(GRID_SIZE / 4), y: Math.floor(GRID_SIZE / 4) };
+            startPos = { x: Math.floor(this.gridSize / 4), y: Math.floor(this.gridSize / 4) };
         } else {
             // Second player starts in the bottom right quadrant
-            startPos = { x: Math.floor(3 * GRID_SIZE / 4), y: Math.floor(3 * GRID_SIZE / 4) };
+            startPos = { x: Math.floor(3 * this.gridSize / 4), y: Math.floor(3 * this.gridSize / 4) };
         }
         
         // Create a new snake for the player
-        this.snakes[playerId] = new Snake(startPos.x, startPos.y, color, playerId);
+        this.snakes[playerId] = new Snake(startPos.x, startPos.y, color, playerId, this.gridSize);
+    }
+
+    static fromSnapshot(data, pending = {}, view = null) {
+        // Rebuild a game from the Python engine's SnakeGame.to_snapshot() output,
+        // plus each snake's queued turns, which snapshots leave out. With a view,
+        // the snapshot only holds what's inside it, and some snakes are cut short
+        const game = new SnakeGame(data.mode, data.ai_difficulty, data.grid_size);
+        if (view) {
+            game.view = { x: view.x, y: view.y, size: view.size, follow: view.follow };
+        }
+        game.tickCount = data.tick_count;
+        game.gameOver = data.game_over;
+        game.winner = data.winner;
+        game.food = [];
+        for (let i = 0; i < data.food.length; i += 2) {
+            game.food.push({ x: data.food[i], y: data.food[i + 1] });
+        }
+
+        data.snakes.forEach(([id, body, direction, color, score, alive, growthPending]) => {
+            const snake = new Snake(body[0], body[1], `rgb(${color.join(',')})`, id, data.grid_size);
+            snake.body = [];
+            for (let i = 0; i < body.length; i += 2) {
+                snake.body.push({ x: body[i], y: body[i + 1] });
+            }
+            snake.direction = Direction[direction];
+            snake.score = score;
+            snake.alive = alive;
+            snake.growthPending = growthPending;
+            snake.pendingDirections = (pending[id] || []).map(name => Direction[name]);
+            snake.frozen = view !== null && view.partial[id] === false;
+            game.snakes[id] = snake;
+        });
+        return game;
     }
 
     spawnFood() {
@@ -129,8 +191,8 @@ class SnakeGame {
         
         // Find all empty positions
         const allPositions = [];
-        for (let x = 0; x < GRID_SIZE; x++) {
-            for (let y = 0; y < GRID_SIZE; y++) {
+        for (let x = 0; x < this.gridSize; x++) {
+            for (let y = 0; y < this.gridSize; y++) {
                 allPositions.push({ x, y });
             }
         }
@@ -151,9 +213,10 @@ class SnakeGame {
         
         this.tickCount++;
         
-        // Move all snakes
+        // Apply one queued turn per snake, then move all snakes
         Object.values(this.snakes).forEach(snake => {
-            if (snake.alive) {
+            if (snake.alive && !snake.frozen) {
+                snake.applyQueuedDirection();
                 snake.move();
             }
         });
@@ -172,29 +235,42 @@ class SnakeGame {
             if (foodIndex !== -1) {
                 this.food.splice(foodIndex, 1);
                 snake.grow();
-                this.spawnFood();
+                // Predicted games wait for the server to say where new food appears
+                if (!this.predicting) {
+                    this.spawnFood();
+                }
             }
         });
         
-        // Check for collisions with self or other snakes
-        Object.entries(this.snakes).forEach(([snakeId, snake]) => {
+        // Check for collisions the way the Python engine does: a head sharing its cell
+        // with any other living segment has collided, and a dead snake stops being an
+        // obstacle straight away, so snakes earlier in the order win head-on collisions
+        const occupied = new Map();
+        const cellKey = pos => pos.y * this.gridSize + pos.x;
+        Object.values(this.snakes).forEach(snake => {
             if (!snake.alive) return;
-                
-            // Check collision with self
-            if (snake.checkCollisionWithSelf()) {
+            snake.body.forEach(segment => {
+                const key = cellKey(segment);
+                occupied.set(key, (occupied.get(key) || 0) + 1);
+            });
+        });
+        Object.values(this.snakes).forEach(snake => {
+            if (!snake.alive) return;
+
+            if (occupied.get(cellKey(snake.getHeadPosition())) > 1) {
                 snake.alive = false;
+                snake.body.forEach(segment => {
+                    const key = cellKey(segment);
+                    occupied.set(key, occupied.get(key) - 1);
+                });
             }
-            
-            // Check collision with other snakes
-            Object.entries(this.snakes).forEach(([otherId, otherSnake]) => {
-                if (otherId !== snakeId && otherSnake.alive) {
-                    if (snake.checkCollisionWithSnake(otherSnake)) {
-                        snake.alive = false;
-                    }
-                }
-            });
         });
         
+        this.followView();
+
+        // Only the server decides when a predicted game ends
+        if (this.predicting) return;
+
         // Check if game is over
         const aliveSnakes = Object.values(this.snakes).filter(s => s.alive);
         
@@ -202,8 +278,8 @@ class SnakeGame {
             // All snakes are dead - it's a draw
             this.gameOver = true;
             this.winner = null;
-        } else if (aliveSnakes.length === 1 && this.mode === 'multiplayer') {
-            // In multiplayer mode, if only one snake is alive, they win
+        } else if (aliveSnakes.length === 1 && (this.mode === 'multiplayer' || this.mode === 'arena')) {
+            // In multiplayer and arena modes, if only one snake is alive, they win
             this.gameOver = true;
             this.winner = aliveSnakes[0].id;
         }
@@ -214,9 +290,21 @@ class SnakeGame {
         }
     }
 
+    followView() {
+        // Keep the view centred on the snake it follows as the snake moves
+        const snake = this.view && this.snakes[this.view.follow];
+        if (!snake || !snake.alive) return;
+        const radius = Math.floor(this.view.size / 2);
+        const head = snake.getHeadPosition();
+        this.view.x = (head.x - radius + this.gridSize) % this.gridSize;
+        this.view.y = (head.y - radius + this.gridSize) % this.gridSize;
+    }
+
     getState() {
         return {
-            gridSize: GRID_SIZE,
+            gridSize: this.gridSize,
+            view: this.view || { x: 0, y: 0, size: this.gridSize },
+            minimap: this.minimap,
             snakes: Object.fromEntries(
                 Object.entries(this.snakes).map(([id, snake]) => [
                     id,
@@ -236,8 +324,9 @@ class SnakeGame {
     }
 
     handleInput(playerId, direction) {
+        // Turns are queued and applied one per tick, like the Python engine
         if (playerId in this.snakes && this.snakes[playerId].alive) {
-            this.snakes[playerId].changeDirection(direction);
+            this.snakes[playerId].queueDirection(direction);
         }
     }
 }
@@ -295,12 +384,13 @@ class SnakeAI {
         let dy = food.y - head.y;
         
         // Handle wrap-around
-        if (Math.abs(dx) > GRID_SIZE / 2) {
-            dx = -Math.sign(dx) * (GRID_SIZE - Math.abs(dx));
+        const gridSize = this.game.gridSize;
+        if (Math.abs(dx) > gridSize / 2) {
+            dx = -Math.sign(dx) * (gridSize - Math.abs(dx));
         }
         
-        if (Math.abs(dy) > GRID_SIZE / 2) {
-            dy = -Math.sign(dy) * (GRID_SIZE - Math.abs(dy));
+        if (Math.abs(dy) > gridSize / 2) {
+            dy = -Math.sign(dy) * (gridSize - Math.abs(dy));
         }
         
         // Prioritize the larger distance
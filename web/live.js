@@ -0,0 +1,151 @@
+// Client-side prediction for games run by the bot.
+//
+// The bot's Python SnakeGame is authoritative and sends its state every tick.
+// The client runs its own copy a little ahead of the server, far enough that
+// inputs reach the server before the tick they're stamped with, so the player's
+// turns show up instantly. Every server state replaces the local copy: inputs
+// the server has acknowledged are dropped, and the rest are replayed at their
+// tick numbers while the copy is stepped forward to the predicted tick again.
+//
+// On large boards the server only sends a viewport around the player's snake,
+// with the other snakes cut to the part inside it, plus a coarse minimap.
+
+const PING_INTERVAL = 1000; // Milliseconds between round-trip measurements
+const LEAD_MARGIN = 1; // Extra ticks the prediction runs ahead of the measured round trip
+
+class LiveGameClient {
+    constructor(url, playerId = 'player', { onState = null, onClose = null } = {}) {
+        this.url = url;
+        this.playerId = playerId;
+        this.onState = onState;
+        this.onClose = onClose;
+        this.socket = null;
+        this.pingTimer = null;
+
+        this.game = null; // Predicted game, the one to render
+        this.serverTick = 0;
+        this.predictedTick = 0;
+        this.inputs = []; // Unacknowledged inputs: { seq, tick, direction }
+        this.nextSeq = 1;
+        this.rtt = 0; // Smoothed round trip in milliseconds
+        this.tickInterval = 1000 / FPS;
+        this.gameOver = false;
+
+        // Prediction quality: how often a server state moved the player's snake
+        this.stats = { states: 0, corrections: 0, inputs: 0 };
+    }
+
+    connect() {
+        this.socket = new WebSocket(this.url);
+        this.socket.onopen = () => {
+            this.ping();
+            this.pingTimer = setInterval(() => this.ping(), PING_INTERVAL);
+        };
+        this.socket.onmessage = event => this.receive(JSON.parse(event.data));
+        this.socket.onclose = () => {
+            clearInterval(this.pingTimer);
+            if (this.onClose) this.onClose();
+        };
+    }
+
+    close() {
+        if (this.socket) this.socket.close();
+    }
+
+    ping() {
+        this.send({ type: 'ping', time: performance.now() });
+    }
+
+    send(message) {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify(message));
+        }
+    }
+
+    // Ticks the prediction should run ahead of the latest server state: one round
+    // trip, so inputs sent now arrive before the server reaches their tick
+    lead() {
+        return Math.ceil(this.rtt / this.tickInterval) + LEAD_MARGIN;
+    }
+
+    input(direction) {
+        if (!this.game || this.gameOver) return;
+
+        // The input applies on the next predicted tick, both here and on the server
+        const input = { seq: this.nextSeq++, tick: this.predictedTick + 1, direction };
+        this.inputs.push(input);
+        this.stats.inputs++;
+        this.send({ type: 'input', seq: input.seq, tick: input.tick, direction: direction.name });
+    }
+
+    // Advance the predicted game one tick; called at the game's frame rate
+    step() {
+        if (!this.game || this.gameOver) return;
+
+        // Hold back when the prediction has run too far ahead of the server
+        if (this.predictedTick - this.serverTick > this.lead() + 2) return;
+        this.advance();
+    }
+
+    advance() {
+        const tick = this.predictedTick + 1;
+        const snake = this.game.snakes[this.playerId];
+        if (snake && snake.alive) {
+            this.inputs.forEach(input => {
+                if (input.tick === tick) snake.queueDirection(input.direction);
+            });
+        }
+        this.game.update();
+        this.predictedTick = tick;
+    }
+
+    receive(message) {
+        if (message.type === 'pong') {
+            const sample = performance.now() - message.time;
+            this.rtt = this.rtt ? this.rtt * 0.8 + sample * 0.2 : sample;
+            return;
+        }
+        if (message.type === 'hello') {
+            // Queue turns as deep as the bot's engine does, or predictions drift
+            INPUT_LOOKAHEAD = message.inputLookahead;
+            return;
+        }
+        if (message.type !== 'state') return;
+        this.stats.states++;
+
+        const before = this.game && this.game.snakes[this.playerId]?.getHeadPosition();
+        const beforeTick = this.predictedTick;
+
+        // Rewind to the server's state, forgetting inputs it has already applied or queued
+        const acked = message.acks[this.playerId] || 0;
+        this.inputs = this.inputs.filter(input => input.seq > acked);
+        this.game = SnakeGame.fromSnapshot(message.game, message.pending, message.view || null);
+        this.game.minimap = message.minimap || null;
+        this.serverTick = message.game.tick_count;
+        this.gameOver = message.game.game_over;
+
+        if (this.gameOver) {
+            this.predictedTick = this.serverTick;
+        } else {
+            // Replay: unacknowledged inputs stamped with a tick the server has already
+            // passed arrived late, and apply on the first replayed tick instead
+            this.game.predicting = true;
+            this.inputs.forEach(input => {
+                input.tick = Math.max(input.tick, this.serverTick + 1);
+            });
+            this.predictedTick = this.serverTick;
+            const target = Math.max(beforeTick, this.serverTick + this.lead());
+            while (this.predictedTick < target) {
+                this.advance();
+            }
+        }
+
+        // Compare with what was predicted for the same tick
+        const after = this.game.snakes[this.playerId]?.getHeadPosition();
+        if (before && after && this.predictedTick === beforeTick && (before.x !== after.x || before.y !== after.y)) {
+            this.stats.corrections++;
+        }
+
+        if (this.onState) this.onState(message);
+    }
+}